@@ -5,5 +5,10 @@ setup(
     version="1.0.0",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
-    install_requires=["boto3~=1.16", "mesh_client~=0.11"],
+    install_requires=["boto3~=1.35", "mesh_client~=0.11"],
+    extras_require={
+        "asyncio": ["aiohttp~=3.7"],
+        "zstd": ["zstandard~=0.22"],
+        "crt": ["botocore[crt]"],
+    },
 )
@@ -0,0 +1,199 @@
+import asyncio
+import ssl
+from typing import List, Optional
+
+import boto3
+from aiohttp import ClientSession, TCPConnector
+
+from s3mesh.aio.mesh import AsyncMeshClient, AsyncMeshInbox
+from s3mesh.aio.s3 import AsyncS3Error, AsyncS3Uploader
+from s3mesh.forwarder import (
+    RetryableException,
+    estimate_backlog_remaining,
+    record_streamed_download,
+    recording_forward_errors,
+)
+from s3mesh.mesh import MeshClientNetworkError
+from s3mesh.monitoring.event.base import (
+    ACKNOWLEDGE_STAGE,
+    COUNT_STAGE,
+    DOWNLOAD_STAGE,
+    LISTING_STAGE,
+    POLL_STAGE,
+    UPLOAD_STAGE,
+)
+from s3mesh.monitoring.probe import LoggingProbe
+from s3mesh.scheduler import PollDelay
+
+DEFAULT_S3_REGION = "us-east-1"
+
+
+class LazyClientSession:
+    def __init__(self, connection_limit: int, ssl_context: Optional[ssl.SSLContext] = None):
+        self._connection_limit = connection_limit
+        self._ssl_context = ssl_context if ssl_context is not None else ssl.create_default_context()
+        self._session: Optional[ClientSession] = None
+
+    async def __call__(self) -> ClientSession:
+        if self._session is None:
+            connector = TCPConnector(limit=self._connection_limit, ssl=self._ssl_context)
+            self._session = ClientSession(connector=connector, raise_for_status=False)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncMeshToS3Forwarder:
+    def __init__(
+        self,
+        inbox: AsyncMeshInbox,
+        uploader: AsyncS3Uploader,
+        probe: LoggingProbe,
+        max_concurrency: int,
+        sessions: Optional[List[LazyClientSession]] = None,
+    ):
+        self._inbox = inbox
+        self._uploader = uploader
+        self._probe = probe
+        self._max_concurrency = max_concurrency
+        self._sessions = sessions or []
+        self._loop = asyncio.new_event_loop()
+
+    def forward_messages(self, preceding_poll_delay: Optional[PollDelay] = None) -> int:
+        return self._loop.run_until_complete(self._forward_messages(preceding_poll_delay))
+
+    def has_backlog(self, batch_count: int) -> bool:
+        if estimate_backlog_remaining(batch_count) == 0:
+            return False
+        return not self.is_mailbox_empty()
+
+    def is_mailbox_empty(self) -> bool:
+        return self._loop.run_until_complete(self._is_mailbox_empty())
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def recover_interrupted_forwards(self):
+        pass
+
+    def close(self):
+        for session in self._sessions:
+            self._loop.run_until_complete(session.close())
+        self._loop.close()
+
+    async def _forward_messages(self, preceding_poll_delay: Optional[PollDelay]) -> int:
+        inbox_entries = await self._poll_messages(preceding_poll_delay)
+        transfer_slots = asyncio.Semaphore(self._max_concurrency)
+        failed = asyncio.Event()
+        results = await asyncio.gather(
+            *(self._process_in_slot(entry, transfer_slots, failed) for entry in inbox_entries),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(inbox_entries)
+
+    async def _is_mailbox_empty(self) -> bool:
+        count_message_event = self._probe.new_count_messages_event()
+        try:
+            with count_message_event.timing(COUNT_STAGE):
+                message_count = await self._inbox.count_messages()
+            count_message_event.record_message_count(message_count)
+            count_message_event.record_backlog_remaining(message_count)
+            return message_count == 0
+        except MeshClientNetworkError as e:
+            count_message_event.record_mesh_client_network_error(e)
+            raise RetryableException()
+        finally:
+            count_message_event.finish()
+
+    async def _poll_messages(self, preceding_poll_delay: Optional[PollDelay]):
+        poll_inbox_event = self._probe.new_poll_inbox_event()
+        if preceding_poll_delay is not None:
+            poll_inbox_event.record_poll_delay(preceding_poll_delay)
+        try:
+            with poll_inbox_event.timing(POLL_STAGE):
+                return await self._list_messages(poll_inbox_event)
+        except MeshClientNetworkError as e:
+            poll_inbox_event.record_mesh_client_network_error(e)
+            raise RetryableException()
+        finally:
+            poll_inbox_event.finish()
+
+    async def _list_messages(self, poll_inbox_event):
+        with poll_inbox_event.timing(LISTING_STAGE):
+            inbox_entries = await self._inbox.list_messages()
+        poll_inbox_event.record_message_batch_count(len(inbox_entries))
+        poll_inbox_event.record_backlog_remaining(estimate_backlog_remaining(len(inbox_entries)))
+        return inbox_entries
+
+    async def _process_in_slot(self, inbox_entry, transfer_slots, failed):
+        async with transfer_slots:
+            if failed.is_set():
+                return
+            try:
+                await self._process_message(inbox_entry)
+            except Exception:
+                failed.set()
+                raise
+
+    async def _process_message(self, inbox_entry):
+        forward_message_event = self._probe.new_forward_message_event()
+        try:
+            with recording_forward_errors(forward_message_event):
+                with forward_message_event.timing(DOWNLOAD_STAGE):
+                    message = await inbox_entry.retrieve()
+                try:
+                    await self._forward_message(message, forward_message_event)
+                finally:
+                    message.close()
+        finally:
+            forward_message_event.finish()
+
+    async def _forward_message(self, message, forward_message_event):
+        forward_message_event.record_message_metadata(message)
+        message.validate()
+        try:
+            with forward_message_event.timing(UPLOAD_STAGE):
+                await self._uploader.upload(message, forward_message_event)
+        except AsyncS3Error as e:
+            forward_message_event.record_s3_error(e)
+            raise RetryableException()
+        record_streamed_download(forward_message_event, message, UPLOAD_STAGE)
+        with forward_message_event.timing(ACKNOWLEDGE_STAGE):
+            await message.acknowledge()
+
+
+def build_async_forwarder(mesh_config, s3_config, probe: LoggingProbe, max_concurrency: int):
+    mesh_ssl_context = ssl.create_default_context(cafile=mesh_config.ca_cert_path)
+    mesh_ssl_context.load_cert_chain(mesh_config.client_cert_path, mesh_config.client_key_path)
+    mesh_session = LazyClientSession(max_concurrency, mesh_ssl_context)
+    s3_session = LazyClientSession(max_concurrency)
+    boto_session = boto3.session.Session()
+
+    mesh = AsyncMeshClient(
+        mesh_session,
+        mesh_config.url,
+        mesh_config.mailbox,
+        mesh_config.password,
+        shared_key=mesh_config.shared_key,
+    )
+    uploader = AsyncS3Uploader(
+        s3_session,
+        boto_session.get_credentials(),
+        boto_session.region_name or DEFAULT_S3_REGION,
+        s3_config.bucket_name,
+        endpoint_url=s3_config.endpoint_url,
+        key_prefix=s3_config.key_prefix,
+        upload_config=s3_config.upload,
+    )
+    return AsyncMeshToS3Forwarder(
+        AsyncMeshInbox(mesh), uploader, probe, max_concurrency, sessions=[mesh_session, s3_session]
+    )
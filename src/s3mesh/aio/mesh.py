@@ -0,0 +1,179 @@
+import hmac
+import time
+import uuid
+from datetime import datetime
+from hashlib import sha256
+from typing import Any, Awaitable, Callable, List, Optional
+
+from aiohttp import ClientConnectionError, ClientResponse, ClientResponseError, ClientSession
+
+from s3mesh.mesh import MEX_HEADER_PREFIX, MeshClientNetworkError, MeshMessageMetadata
+
+MESH_AUTH_SCHEME = "NHSMESH"
+READ_SIZE = 64 * 1024
+
+
+def _wrap_aiohttp_errors(func: Callable[..., Awaitable[Any]]):
+    async def wrapper_function(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except ClientResponseError as e:
+            raise MeshClientNetworkError(
+                f"{e.status} HTTP Error: {e.message}: {e.request_info.url}"
+            )
+        except ClientConnectionError as e:
+            raise MeshClientNetworkError(
+                f"{type(e).__name__} received when attempting to connect: {e}"
+            )
+
+    return wrapper_function
+
+
+class MeshAuthTokenGenerator:
+    def __init__(self, shared_key: bytes, mailbox: str, password: str):
+        self._shared_key = shared_key
+        self._mailbox = mailbox
+        self._password = password
+        self._nonce = uuid.uuid4()
+        self._nonce_count = 0
+
+    def __call__(self) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d%H%M")
+        public_auth_data = _combine(self._mailbox, self._nonce, self._nonce_count, timestamp)
+        private_auth_data = _combine(
+            self._mailbox, self._nonce, self._nonce_count, self._password, timestamp
+        )
+        digest = hmac.new(self._shared_key, private_auth_data.encode("ascii"), sha256).hexdigest()
+        self._nonce_count += 1
+        return f"{MESH_AUTH_SCHEME} {public_auth_data}:{digest}"
+
+
+def _combine(*parts) -> str:
+    return ":".join(str(part) for part in parts)
+
+
+class AsyncMeshClient:
+    def __init__(
+        self,
+        session: Callable[[], Awaitable[ClientSession]],
+        url: str,
+        mailbox: str,
+        password: str,
+        shared_key: bytes,
+    ):
+        self._session = session
+        self._inbox_url = f"{url}/messageexchange/{mailbox}/inbox"
+        self._count_url = f"{url}/messageexchange/{mailbox}/count"
+        self._token_generator = MeshAuthTokenGenerator(shared_key, mailbox, password)
+
+    def _headers(self):
+        return {"Authorization": self._token_generator(), "Accept-Encoding": "gzip"}
+
+    async def count_messages(self) -> int:
+        session = await self._session()
+        async with session.get(self._count_url, headers=self._headers()) as response:
+            response.raise_for_status()
+            return (await response.json())["count"]
+
+    async def list_messages(self) -> List[str]:
+        session = await self._session()
+        async with session.get(self._inbox_url, headers=self._headers()) as response:
+            response.raise_for_status()
+            return (await response.json())["messages"]
+
+    async def retrieve_message(self, message_id: str) -> ClientResponse:
+        return await self._get_streamed(f"{self._inbox_url}/{message_id}")
+
+    async def retrieve_message_chunk(self, message_id: str, chunk_number: int) -> ClientResponse:
+        return await self._get_streamed(f"{self._inbox_url}/{message_id}/{chunk_number}")
+
+    async def acknowledge_message(self, message_id: str):
+        session = await self._session()
+        url = f"{self._inbox_url}/{message_id}/status/acknowledged"
+        async with session.put(url, headers=self._headers()) as response:
+            response.raise_for_status()
+
+    async def _get_streamed(self, url: str) -> ClientResponse:
+        session = await self._session()
+        response = await session.get(url, headers=self._headers())
+        try:
+            response.raise_for_status()
+        except ClientResponseError:
+            response.release()
+            raise
+        return response
+
+
+class AsyncMeshMessage(MeshMessageMetadata):
+    def __init__(self, client: AsyncMeshClient, message_id: str, response: ClientResponse):
+        self.id = message_id
+        self._client = client
+        self._response = response
+        self._next_chunk_number = 2
+        self.bytes_read = 0
+        self.read_sec = 0.0
+        self._mex_headers = {
+            key.lower().removeprefix(MEX_HEADER_PREFIX): value
+            for key, value in response.headers.items()
+            if key.lower().startswith(MEX_HEADER_PREFIX)
+        }
+
+    def _mex_header(self, header_name: str) -> str:
+        return self._mex_headers[header_name]
+
+    @_wrap_aiohttp_errors
+    async def acknowledge(self):
+        await self._client.acknowledge_message(self.id)
+
+    @_wrap_aiohttp_errors
+    async def read(self, n: Optional[int] = None) -> bytes:
+        if n is None:
+            return await self._read_all()
+        started = time.monotonic()
+        data = await self._response.content.read(n)
+        while not data and self._next_chunk_number <= self.chunk_count:
+            self._response.release()
+            self._response = await self._client.retrieve_message_chunk(
+                self.id, self._next_chunk_number
+            )
+            self._next_chunk_number += 1
+            data = await self._response.content.read(n)
+        self.read_sec += time.monotonic() - started
+        self.bytes_read += len(data)
+        return data
+
+    async def _read_all(self) -> bytes:
+        body = bytearray()
+        while data := await self.read(READ_SIZE):
+            body += data
+        return bytes(body)
+
+    def close(self):
+        self._response.release()
+
+
+class AsyncMeshInboxEntry:
+    def __init__(self, client: AsyncMeshClient, message_id: str):
+        self.id = message_id
+        self._client = client
+
+    @_wrap_aiohttp_errors
+    async def retrieve(self) -> AsyncMeshMessage:
+        response = await self._client.retrieve_message(self.id)
+        return AsyncMeshMessage(self._client, self.id, response)
+
+
+class AsyncMeshInbox:
+    def __init__(self, client: AsyncMeshClient):
+        self._client = client
+
+    @_wrap_aiohttp_errors
+    async def list_messages(self) -> List[AsyncMeshInboxEntry]:
+        return [
+            AsyncMeshInboxEntry(self._client, message_id)
+            for message_id in await self._client.list_messages()
+        ]
+
+    @_wrap_aiohttp_errors
+    async def count_messages(self) -> int:
+        return await self._client.count_messages()
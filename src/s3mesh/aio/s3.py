@@ -0,0 +1,128 @@
+import re
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from aiohttp import ClientConnectionError, ClientResponseError, ClientSession
+from botocore.auth import S3SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+from s3mesh.monitoring.event.forward import ForwardMessageEvent
+from s3mesh.s3 import UploadConfig, build_s3_key
+
+UPLOAD_ID_PATTERN = re.compile(rb"<UploadId>([^<]+)</UploadId>")
+
+
+class AsyncS3Error(Exception):
+    pass
+
+
+def _wrap_aiohttp_errors(func: Callable[..., Awaitable[Any]]):
+    async def wrapper_function(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except ClientResponseError as e:
+            raise AsyncS3Error(f"{e.status} HTTP Error: {e.message}: {e.request_info.url}")
+        except ClientConnectionError as e:
+            raise AsyncS3Error(f"{type(e).__name__} received when attempting to connect: {e}")
+
+    return wrapper_function
+
+
+async def _read_up_to(message, n: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < n and (data := await message.read(n - len(buffer))):
+        buffer += data
+    return bytes(buffer)
+
+
+def _complete_multipart_upload_body(etags: List[str]) -> bytes:
+    parts = "".join(
+        f"<Part><PartNumber>{part_number}</PartNumber><ETag>{etag}</ETag></Part>"
+        for part_number, etag in enumerate(etags, start=1)
+    )
+    return f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode("utf-8")
+
+
+class AsyncS3Uploader:
+    def __init__(
+        self,
+        session: Callable[[], Awaitable[ClientSession]],
+        credentials: Credentials,
+        region_name: str,
+        bucket_name: str,
+        endpoint_url: Optional[str] = None,
+        key_prefix: str = "",
+        upload_config: Optional[UploadConfig] = None,
+    ):
+        self._session = session
+        self._credentials = credentials
+        self._region_name = region_name
+        self._key_prefix = key_prefix
+        self._upload_config = upload_config or UploadConfig()
+        self._bucket_url = (
+            f"{endpoint_url or f'https://s3.{region_name}.amazonaws.com'}/{bucket_name}"
+        )
+
+    @_wrap_aiohttp_errors
+    async def upload(self, message, forward_message_event: ForwardMessageEvent):
+        key = f"{self._key_prefix}{build_s3_key(message)}"
+        url = f"{self._bucket_url}/{quote(key)}"
+        head = await _read_up_to(message, self._upload_config.multipart_threshold_bytes)
+        if len(head) < self._upload_config.multipart_threshold_bytes:
+            await self._request("PUT", url, head)
+        else:
+            await self._upload_multipart(url, head, message)
+        forward_message_event.record_s3_key(key)
+
+    async def _upload_multipart(self, url: str, head: bytes, message):
+        _, response_body = await self._request("POST", f"{url}?uploads")
+        upload_id = quote(self._upload_id(response_body), safe="")
+        try:
+            etags = await self._upload_parts(url, upload_id, head, message)
+            _, response_body = await self._request(
+                "POST", f"{url}?uploadId={upload_id}", _complete_multipart_upload_body(etags)
+            )
+            if b"<Error>" in response_body:
+                raise AsyncS3Error(f"CompleteMultipartUpload failed: {response_body!r}")
+        except Exception:
+            with suppress(ClientResponseError, ClientConnectionError):
+                await self._request("DELETE", f"{url}?uploadId={upload_id}")
+            raise
+
+    async def _upload_parts(self, url: str, upload_id: str, head: bytes, message) -> List[str]:
+        part_size = self._upload_config.part_size_bytes
+        buffered = bytearray(head)
+        etags: List[str] = []
+        while True:
+            if len(buffered) < part_size:
+                buffered += await _read_up_to(message, part_size - len(buffered))
+            if not buffered:
+                return etags
+            part, buffered = bytes(buffered[:part_size]), buffered[part_size:]
+            part_url = f"{url}?partNumber={len(etags) + 1}&uploadId={upload_id}"
+            headers, _ = await self._request("PUT", part_url, part)
+            etags.append(headers["ETag"])
+
+    @staticmethod
+    def _upload_id(response_body: bytes) -> str:
+        match = UPLOAD_ID_PATTERN.search(response_body)
+        if match is None:
+            raise AsyncS3Error(f"CreateMultipartUpload returned no upload id: {response_body!r}")
+        return match.group(1).decode("utf-8")
+
+    async def _request(
+        self, method: str, url: str, body: bytes = b""
+    ) -> Tuple[Mapping[str, str], bytes]:
+        session = await self._session()
+        headers = self._signed_headers(method, url, body)
+        async with session.request(method, url, data=body, headers=headers) as response:
+            response.raise_for_status()
+            return response.headers, await response.read()
+
+    def _signed_headers(self, method: str, url: str, body: bytes) -> dict:
+        request = AWSRequest(method=method, url=url, data=body)
+        signer = S3SigV4Auth(self._credentials.get_frozen_credentials(), "s3", self._region_name)
+        signer.add_auth(request)
+        return dict(request.headers.items())
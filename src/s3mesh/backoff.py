@@ -0,0 +1,11 @@
+from typing import Callable
+
+MAX_BACKOFF_EXPONENT = 32
+
+
+def jittered_backoff_sec(
+    failures: int, backoff_sec: float, max_backoff_sec: float, jitter: Callable[[], float]
+) -> float:
+    exponent = min(failures - 1, MAX_BACKOFF_EXPONENT)
+    ceiling = min(max_backoff_sec, backoff_sec * (1 << exponent))
+    return ceiling / 2 + jitter() * ceiling / 2
@@ -0,0 +1,115 @@
+from collections import Counter
+from threading import Condition
+from typing import Optional
+
+
+class ByteBudget:
+    def __init__(self, limit_bytes: int):
+        self._limit_bytes = limit_bytes
+        self._used_bytes = 0
+        self._overdrawn_by: Optional[object] = None
+        self._condition = Condition()
+
+    @property
+    def used_bytes(self) -> int:
+        with self._condition:
+            return self._used_bytes
+
+    def acquire(self, n: int, holder: Optional[object] = None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._fits(n, holder))
+            self._used_bytes += n
+            if self._used_bytes > self._limit_bytes and holder is not None:
+                self._overdrawn_by = holder
+
+    def try_acquire(self, n: int) -> bool:
+        with self._condition:
+            if self._used_bytes + n > self._limit_bytes:
+                return False
+            self._used_bytes += n
+            return True
+
+    def release(self, n: int, holder: Optional[object] = None):
+        with self._condition:
+            self._used_bytes -= n
+            if holder is not None and holder is self._overdrawn_by:
+                self._overdrawn_by = None
+            self._condition.notify_all()
+
+    def _fits(self, n: int, holder: Optional[object]) -> bool:
+        if self._used_bytes == 0 or self._used_bytes + n <= self._limit_bytes:
+            return True
+        return holder is not None and self._overdrawn_by in (None, holder)
+
+
+class BudgetedMessage:
+    def __init__(self, message, budget: ByteBudget, max_held_bytes: int):
+        self._message = message
+        self._budget = budget
+        self._max_held_bytes = max_held_bytes
+        self._held_bytes = 0
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+    def read(self, n=None):
+        data = self._message.read(n)
+        charged_bytes = min(len(data), self._max_held_bytes - self._held_bytes)
+        if charged_bytes > 0:
+            self._budget.acquire(charged_bytes, holder=self if self._held_bytes else None)
+            self._held_bytes += charged_bytes
+        return data
+
+    def release(self):
+        self._budget.release(self._held_bytes, holder=self)
+        self._held_bytes = 0
+
+
+class FairConcurrencyBudget:
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._in_use: Counter = Counter()
+        self._waiting: Counter = Counter()
+        self._condition = Condition()
+
+    def share(self, name: str) -> "ConcurrencyShare":
+        return ConcurrencyShare(self, name)
+
+    def in_use(self, name: str) -> int:
+        with self._condition:
+            return self._in_use[name]
+
+    def acquire(self, name: str):
+        with self._condition:
+            self._waiting[name] += 1
+            self._condition.wait_for(lambda: self._is_next(name))
+            self._waiting[name] -= 1
+            self._in_use[name] += 1
+            self._condition.notify_all()
+
+    def release(self, name: str):
+        with self._condition:
+            self._in_use[name] -= 1
+            self._condition.notify_all()
+
+    def _is_next(self, name: str) -> bool:
+        if sum(self._in_use.values()) >= self._limit:
+            return False
+        return all(
+            self._in_use[name] <= self._in_use[other]
+            for other, waiting in self._waiting.items()
+            if waiting > 0
+        )
+
+
+class ConcurrencyShare:
+    def __init__(self, budget: FairConcurrencyBudget, name: str):
+        self._budget = budget
+        self._name = name
+
+    def __enter__(self):
+        self._budget.acquire(self._name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._budget.release(self._name)
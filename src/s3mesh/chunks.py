@@ -0,0 +1,106 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+from typing import Callable, Dict
+
+from s3mesh.connections import PooledMeshClient
+
+
+class _BufferedChunk:
+    def __init__(self, response):
+        self.headers = response.headers
+        try:
+            self.raw = BytesIO(response.raw.read())
+        finally:
+            response.close()
+
+
+class _ChunkReadAhead:
+    def __init__(
+        self,
+        fetch_chunk: Callable[[int], _BufferedChunk],
+        chunk_count: int,
+        window: int,
+        executor: ThreadPoolExecutor,
+    ):
+        self._fetch_chunk = fetch_chunk
+        self._chunk_count = chunk_count
+        self._window = window
+        self._executor = executor
+        self._pending: Dict[int, Future] = {}
+        self._next_chunk_number = 2
+        self._fill_window()
+
+    def take(self, chunk_number: int) -> _BufferedChunk:
+        future = self._pending.pop(chunk_number)
+        self._fill_window()
+        return future.result()
+
+    def cancel(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def _fill_window(self):
+        while self._next_chunk_number <= self._chunk_count and len(self._pending) < self._window:
+            self._pending[self._next_chunk_number] = self._executor.submit(
+                self._fetch_chunk, self._next_chunk_number
+            )
+            self._next_chunk_number += 1
+
+
+class _ReadAheadMessage:
+    def __init__(self, message, on_close: Callable[[], None]):
+        self._message = message
+        self._on_close = on_close
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+    def close(self):
+        try:
+            self._on_close()
+        finally:
+            self._message.close()
+
+
+class ChunkReadAheadMeshClient(PooledMeshClient):
+    def __init__(self, *args, chunk_read_ahead: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._chunk_read_ahead = chunk_read_ahead
+        self._executor = ThreadPoolExecutor(max_workers=chunk_read_ahead)
+        self._read_aheads: Dict[str, _ChunkReadAhead] = {}
+        self._lock = Lock()
+
+    def retrieve_message(self, message_id):
+        message = super().retrieve_message(message_id)
+        chunk_count = int(message.mex_header("chunk-range", "1:1").split(":")[1])
+        if chunk_count == 1:
+            return message
+        fetch_chunk = super().retrieve_message_chunk
+        read_ahead = _ChunkReadAhead(
+            lambda chunk_number: _BufferedChunk(fetch_chunk(message_id, str(chunk_number))),
+            chunk_count,
+            self._chunk_read_ahead,
+            self._executor,
+        )
+        with self._lock:
+            self._read_aheads[message_id] = read_ahead
+        return _ReadAheadMessage(message, lambda: self._discard_read_ahead(message_id))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+
+    def retrieve_message_chunk(self, message_id, chunk_num):
+        with self._lock:
+            read_ahead = self._read_aheads.get(message_id)
+        if read_ahead is None:
+            return super().retrieve_message_chunk(message_id, chunk_num)
+        return read_ahead.take(int(chunk_num))
+
+    def _discard_read_ahead(self, message_id: str):
+        with self._lock:
+            read_ahead = self._read_aheads.pop(message_id, None)
+        if read_ahead is not None:
+            read_ahead.cancel()
@@ -0,0 +1,106 @@
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+GZIP_COMPRESSION = "gzip"
+ZSTD_COMPRESSION = "zstd"
+
+COMPRESS_READ_SIZE = 1024 * 1024
+
+
+class CompressorFactory(Protocol):
+    def __call__(self) -> Any:
+        ...
+
+
+@dataclass(frozen=True)
+class CompressionCodec:
+    content_encoding: str
+    key_suffix: str
+    new_compressor: CompressorFactory
+
+
+def _new_gzip_compressor():
+    return zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+
+def _new_zstd_compressor():
+    import zstandard
+
+    return zstandard.ZstdCompressor().compressobj()
+
+
+CODECS = {
+    GZIP_COMPRESSION: CompressionCodec("gzip", ".gz", _new_gzip_compressor),
+    ZSTD_COMPRESSION: CompressionCodec("zstd", ".zst", _new_zstd_compressor),
+}
+
+
+def compression_codec(compression: str) -> CompressionCodec:
+    try:
+        return CODECS[compression]
+    except KeyError:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+
+class GzipDecompressingStream:
+    def __init__(self, stream):
+        self._stream = stream
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        self._pending = bytearray()
+        self._finished = False
+
+    def read(self, n=None) -> bytes:
+        unbounded = n is None or n < 0
+        while not self._finished and (unbounded or len(self._pending) < n):
+            self._decompress_next(0 if unbounded else n - len(self._pending))
+        size = len(self._pending) if unbounded else n
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def _decompress_next(self, max_length: int):
+        data = self._decompressor.unconsumed_tail or self._stream.read(COMPRESS_READ_SIZE)
+        if data:
+            self._pending += self._decompressor.decompress(data, max_length)
+        else:
+            self._pending += self._decompressor.flush()
+            self._finished = True
+
+
+class CompressingStream:
+    def __init__(self, stream, codec: CompressionCodec):
+        self._stream = stream
+        self._compressor = codec.new_compressor()
+        self._pending = bytearray()
+        self._finished = False
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.cpu_sec = 0.0
+
+    @property
+    def compression_ratio(self) -> float:
+        if self.compressed_bytes == 0:
+            return 0.0
+        return self.raw_bytes / self.compressed_bytes
+
+    def read(self, n=None) -> bytes:
+        while not self._finished and (n is None or n < 0 or len(self._pending) < n):
+            self._compress_next()
+        size = len(self._pending) if n is None or n < 0 else n
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.compressed_bytes += len(data)
+        return data
+
+    def _compress_next(self):
+        data = self._stream.read(COMPRESS_READ_SIZE)
+        started = time.thread_time()
+        if data:
+            self.raw_bytes += len(data)
+            self._pending += self._compressor.compress(data)
+        else:
+            self._pending += self._compressor.flush()
+            self._finished = True
+        self.cpu_sec += time.thread_time() - started
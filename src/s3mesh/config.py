@@ -31,6 +31,62 @@ class ForwarderConfig:
     forwarder_home: str
     s3_endpoint_url: Optional[str] = None
     ssm_endpoint_url: Optional[str] = None
+    forwarding_engine: str = "pool"
+    forward_worker_count: str = "1"
+    max_in_flight_bytes: Optional[str] = None
+    pipeline_download_workers: str = "2"
+    pipeline_download_queue_size: str = "8"
+    pipeline_upload_workers: str = "4"
+    pipeline_upload_queue_size: str = "8"
+    pipeline_acknowledge_workers: str = "1"
+    pipeline_acknowledge_queue_size: str = "8"
+    pipeline_memory_budget_bytes: str = "67108864"
+    async_max_concurrency: str = "100"
+    poll_scheduler: str = "fixed"
+    burst_poll_frequency: str = "5"
+    max_poll_backoff: str = "900"
+    burst_window_polls: str = "6"
+    s3_key_prefix: str = ""
+    mailboxes: Optional[str] = None
+    mailboxes_max_concurrency: str = "8"
+    lease_store: Optional[str] = None
+    lease_ttl: str = "900"
+    lease_s3_bucket_name: Optional[str] = None
+    lease_s3_key_prefix: str = "leases/"
+    lease_directory: Optional[str] = None
+    forwarded_index_path: Optional[str] = None
+    forwarded_index_max_entries: str = "10000"
+    forward_journal_path: Optional[str] = None
+    forward_journal_compact_after: str = "1000"
+    mesh_chunk_read_ahead: str = "0"
+    s3_multipart_threshold_bytes: str = "8388608"
+    s3_multipart_part_size_bytes: str = "8388608"
+    s3_upload_concurrency: str = "10"
+    s3_compression: Optional[str] = None
+    s3_digest_algorithm: Optional[str] = None
+    mesh_content_compressed_policy: str = "passthrough"
+    pipeline_spool_directory: Optional[str] = None
+    pipeline_spool_message_memory_bytes: str = "8388608"
+    spool_queue_directory: Optional[str] = None
+    spool_queue_acknowledge_on: str = "spool"
+    spool_queue_drain_interval: str = "1"
+    spool_queue_max_bytes: Optional[str] = None
+    mesh_max_pool_connections: str = "10"
+    s3_max_pool_connections: Optional[str] = None
+    message_retry_max_attempts: str = "3"
+    message_retry_backoff: str = "1"
+    message_retry_max_backoff: str = "10"
+    message_retry_systemic_failures: str = "3"
+    quarantine_mode: Optional[str] = None
+    quarantine_dead_letter_prefix: str = "dead-letter/"
+    quarantine_skip_cache_size: str = "10000"
+    mesh_validate_headers_first: str = "false"
+    metrics_prometheus_port: Optional[str] = None
+    metrics_prometheus_address: str = ""
+    metrics_statsd_host: Optional[str] = None
+    metrics_statsd_port: str = "8125"
+    metrics_statsd_prefix: str = ""
+    metrics_statsd_interval: str = "10"
 
     @classmethod
     def from_environment_variables(cls, env_vars):
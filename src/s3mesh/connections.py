@@ -0,0 +1,166 @@
+import socket
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+import requests
+from mesh_client import MeshClient, Message
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+KEEP_ALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+]
+
+
+@dataclass(frozen=True)
+class ConnectionStats:
+    new_connections: int
+    pool_waits: int
+    pool_wait_sec: float
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self._lock = Lock()
+        self._new_connections = 0
+        self._pool_waits = 0
+        self._pool_wait_sec = 0.0
+
+    def record_new_connection(self):
+        with self._lock:
+            self._new_connections += 1
+
+    def record_pool_wait(self, wait_sec: float):
+        with self._lock:
+            self._pool_waits += 1
+            self._pool_wait_sec += wait_sec
+
+    def take(self) -> ConnectionStats:
+        with self._lock:
+            stats = ConnectionStats(self._new_connections, self._pool_waits, self._pool_wait_sec)
+            self._new_connections = 0
+            self._pool_waits = 0
+            self._pool_wait_sec = 0.0
+            return stats
+
+
+class _CountingConnectionPool:
+    connection_counter: ConnectionCounter
+
+    def _new_conn(self):
+        self.connection_counter.record_new_connection()
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        waiting = self.pool is not None and self.pool.empty()
+        started = time.monotonic()
+        connection = super()._get_conn(timeout)
+        if waiting:
+            self.connection_counter.record_pool_wait(time.monotonic() - started)
+        return connection
+
+
+class _CountingHTTPConnectionPool(_CountingConnectionPool, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingConnectionPool, HTTPSConnectionPool):
+    pass
+
+
+class _CountingPoolManager(PoolManager):
+    def __init__(self, connection_counter: ConnectionCounter, **kwargs):
+        super().__init__(**kwargs)
+        self._connection_counter = connection_counter
+        self.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.connection_counter = self._connection_counter
+        return pool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, connection_counter: ConnectionCounter, **kwargs):
+        self._connection_counter = connection_counter
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            self._connection_counter,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            socket_options=KEEP_ALIVE_SOCKET_OPTIONS,
+            **pool_kwargs,
+        )
+
+
+class PooledMeshClient(MeshClient):
+    def __init__(
+        self,
+        *args,
+        max_connections: int = 10,
+        connection_counter: Optional[ConnectionCounter] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.connection_counter = connection_counter or ConnectionCounter()
+        adapter = CountingHTTPAdapter(
+            self.connection_counter,
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            pool_block=True,
+            max_retries=Retry(total=1, connect=1, read=1, status=0),
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def count_messages(self):
+        return self._request("GET", "count").json()["count"]
+
+    def list_messages(self):
+        return self._request("GET", "inbox").json()["messages"]
+
+    def retrieve_message(self, message_id):
+        message_id = getattr(message_id, "_msg_id", message_id)
+        return Message(message_id, self._request("GET", f"inbox/{message_id}", stream=True), self)
+
+    def retrieve_message_headers(self, message_id):
+        return self._request("HEAD", f"inbox/{message_id}").headers
+
+    def retrieve_message_chunk(self, message_id, chunk_num):
+        return self._request("GET", f"inbox/{message_id}/{chunk_num}", stream=True)
+
+    def acknowledge_message(self, message_id):
+        message_id = getattr(message_id, "_msg_id", message_id)
+        self._request("PUT", f"inbox/{message_id}/status/acknowledged")
+
+    def close(self):
+        self._session.close()
+
+    def _request(self, method: str, path: str, stream: bool = False) -> requests.Response:
+        response = self._session.request(
+            method,
+            f"{self._url}/messageexchange/{self._mailbox}/{path}",
+            headers=self._headers(),
+            stream=stream,
+            cert=self._cert,
+            verify=self._verify,
+            proxies=self._proxies,
+            timeout=self._timeout,
+        )
+        response.raise_for_status()
+        return response
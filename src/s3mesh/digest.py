@@ -0,0 +1,85 @@
+import base64
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Protocol
+
+MD5_DIGEST = "md5"
+SHA256_DIGEST = "sha256"
+CRC32C_DIGEST = "crc32c"
+
+
+class _Crc32c:
+    def __init__(self):
+        from awscrt import checksums
+
+        self._crc32c = checksums.crc32c
+        self._crc = 0
+
+    def update(self, data: bytes):
+        self._crc = self._crc32c(data, self._crc)
+
+    def digest(self) -> bytes:
+        return self._crc.to_bytes(4, "big")
+
+
+class HashFactory(Protocol):
+    def __call__(self) -> Any:
+        ...
+
+
+@dataclass(frozen=True)
+class DigestAlgorithm:
+    name: str
+    new_hash: HashFactory
+    put_object_checksum_arg: str
+    multipart_checksum_algorithm: Optional[str]
+
+
+DIGEST_ALGORITHMS = {
+    MD5_DIGEST: DigestAlgorithm(MD5_DIGEST, hashlib.md5, "ContentMD5", None),
+    SHA256_DIGEST: DigestAlgorithm(SHA256_DIGEST, hashlib.sha256, "ChecksumSHA256", "SHA256"),
+    CRC32C_DIGEST: DigestAlgorithm(CRC32C_DIGEST, _Crc32c, "ChecksumCRC32C", "CRC32C"),
+}
+
+
+def digest_algorithm(name: str) -> DigestAlgorithm:
+    try:
+        return DIGEST_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported digest algorithm: {name}")
+
+
+class DigestingStream:
+    def __init__(self, stream, algorithm: DigestAlgorithm):
+        self._stream = stream
+        self.algorithm = algorithm
+        self._hash = algorithm.new_hash()
+        self.bytes_hashed = 0
+        self.hash_sec = 0.0
+
+    @property
+    def digest(self) -> bytes:
+        return self._hash.digest()
+
+    @property
+    def hex_digest(self) -> str:
+        return self.digest.hex()
+
+    @property
+    def base64_digest(self) -> str:
+        return base64.b64encode(self.digest).decode("ascii")
+
+    @property
+    def bytes_per_sec(self) -> Optional[float]:
+        if self.hash_sec == 0:
+            return None
+        return self.bytes_hashed / self.hash_sec
+
+    def read(self, n=None) -> bytes:
+        data = self._stream.read(n)
+        started = time.perf_counter()
+        self._hash.update(data)
+        self.hash_sec += time.perf_counter() - started
+        self.bytes_hashed += len(data)
+        return data
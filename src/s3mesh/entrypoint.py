@@ -1,14 +1,39 @@
+import json
 import logging
-from os import environ
+from dataclasses import replace
+from os import environ, makedirs
 from os.path import join
 from signal import SIGINT, SIGTERM, signal
+from typing import Optional
 
 import boto3
 
 from s3mesh.config import ForwarderConfig
-from s3mesh.forwarder_service import MeshConfig, S3Config, build_forwarder_service
+from s3mesh.forwarder_service import (
+    ForwardingConfig,
+    MailboxConfig,
+    MeshConfig,
+    S3Config,
+    build_forwarder_service,
+    build_multi_mailbox_forwarder_service,
+)
+from s3mesh.index import ForwardedMessageIndex
+from s3mesh.journal import ForwardJournal
+from s3mesh.lease import LeaseStore, LocalFileLeaseStore, S3LeaseStore, default_lease_owner
 from s3mesh.logging import JsonFormatter
+from s3mesh.monitoring.metrics import MetricsConfig
+from s3mesh.pipeline import PipelineConfig, StageConfig
+from s3mesh.quarantine import QuarantineConfig
+from s3mesh.retry import MessageRetryConfig
+from s3mesh.s3 import UploadConfig
+from s3mesh.scheduler import AdaptivePollScheduler, FixedPollScheduler, PollScheduler
 from s3mesh.secrets import SsmSecretManager
+from s3mesh.spool import SpoolConfig
+from s3mesh.spool_queue import SpoolQueueConfig
+
+ADAPTIVE_POLL_SCHEDULER = "adaptive"
+S3_LEASE_STORE = "s3"
+FILE_LEASE_STORE = "file"
 
 
 def build_mesh_config_from_ssm(ssm, config) -> MeshConfig:
@@ -34,6 +59,182 @@ def build_mesh_config_from_ssm(ssm, config) -> MeshConfig:
         client_cert_path=mesh_client_cert_path,
         client_key_path=mesh_client_key_path,
         ca_cert_path=mesh_ca_cert_path,
+        content_compressed_policy=config.mesh_content_compressed_policy,
+    )
+
+
+def build_s3_config(config) -> S3Config:
+    return S3Config(
+        bucket_name=config.s3_bucket_name,
+        endpoint_url=config.s3_endpoint_url,
+        key_prefix=config.s3_key_prefix,
+        upload=UploadConfig(
+            multipart_threshold_bytes=int(config.s3_multipart_threshold_bytes),
+            part_size_bytes=int(config.s3_multipart_part_size_bytes),
+            max_concurrency=int(config.s3_upload_concurrency),
+            compression=config.s3_compression,
+            digest_algorithm=config.s3_digest_algorithm,
+        ),
+    )
+
+
+def build_pipeline_config(config) -> PipelineConfig:
+    return PipelineConfig(
+        download=StageConfig(
+            worker_count=int(config.pipeline_download_workers),
+            queue_size=int(config.pipeline_download_queue_size),
+        ),
+        upload=StageConfig(
+            worker_count=int(config.pipeline_upload_workers),
+            queue_size=int(config.pipeline_upload_queue_size),
+        ),
+        acknowledge=StageConfig(
+            worker_count=int(config.pipeline_acknowledge_workers),
+            queue_size=int(config.pipeline_acknowledge_queue_size),
+        ),
+        memory_budget_bytes=int(config.pipeline_memory_budget_bytes),
+        spool=build_spool_config(config),
+    )
+
+
+def build_spool_config(config) -> Optional[SpoolConfig]:
+    if config.pipeline_spool_directory is None:
+        return None
+    return SpoolConfig(
+        directory=join(config.forwarder_home, config.pipeline_spool_directory),
+        max_message_memory_bytes=int(config.pipeline_spool_message_memory_bytes),
+    )
+
+
+def build_forwarding_config(config) -> ForwardingConfig:
+    return ForwardingConfig(
+        engine=config.forwarding_engine,
+        worker_count=int(config.forward_worker_count),
+        max_in_flight_bytes=_optional_int(config.max_in_flight_bytes),
+        pipeline=build_pipeline_config(config),
+        async_max_concurrency=int(config.async_max_concurrency),
+        chunk_read_ahead=int(config.mesh_chunk_read_ahead),
+        spool_queue=build_spool_queue_config(config),
+        mesh_max_pool_connections=int(config.mesh_max_pool_connections),
+        s3_max_pool_connections=_optional_int(config.s3_max_pool_connections),
+        message_retry=build_message_retry_config(config),
+        quarantine=build_quarantine_config(config),
+        validate_headers_first=config.mesh_validate_headers_first.lower() == "true",
+        metrics=build_metrics_config(config),
+    )
+
+
+def build_metrics_config(config) -> Optional[MetricsConfig]:
+    if config.metrics_prometheus_port is None and config.metrics_statsd_host is None:
+        return None
+    return MetricsConfig(
+        prometheus_port=_optional_int(config.metrics_prometheus_port),
+        prometheus_address=config.metrics_prometheus_address,
+        statsd_host=config.metrics_statsd_host,
+        statsd_port=int(config.metrics_statsd_port),
+        statsd_prefix=config.metrics_statsd_prefix,
+        statsd_interval_sec=float(config.metrics_statsd_interval),
+    )
+
+
+def build_message_retry_config(config) -> MessageRetryConfig:
+    return MessageRetryConfig(
+        max_attempts=int(config.message_retry_max_attempts),
+        backoff_sec=float(config.message_retry_backoff),
+        max_backoff_sec=float(config.message_retry_max_backoff),
+        systemic_failures=int(config.message_retry_systemic_failures),
+    )
+
+
+def build_quarantine_config(config) -> Optional[QuarantineConfig]:
+    if config.quarantine_mode is None:
+        return None
+    return QuarantineConfig(
+        mode=config.quarantine_mode,
+        dead_letter_prefix=config.quarantine_dead_letter_prefix,
+        skip_cache_size=int(config.quarantine_skip_cache_size),
+    )
+
+
+def build_spool_queue_config(config) -> Optional[SpoolQueueConfig]:
+    if config.spool_queue_directory is None:
+        return None
+    return SpoolQueueConfig(
+        directory=join(config.forwarder_home, config.spool_queue_directory),
+        acknowledge_on=config.spool_queue_acknowledge_on,
+        drain_interval_sec=int(config.spool_queue_drain_interval),
+        max_bytes=_optional_int(config.spool_queue_max_bytes),
+    )
+
+
+def _optional_int(value):
+    return None if value is None else int(value)
+
+
+def build_poll_scheduler(config) -> PollScheduler:
+    if config.poll_scheduler == ADAPTIVE_POLL_SCHEDULER:
+        return AdaptivePollScheduler(
+            poll_frequency_sec=int(config.poll_frequency),
+            burst_poll_frequency_sec=int(config.burst_poll_frequency),
+            max_backoff_sec=int(config.max_poll_backoff),
+            burst_window_polls=int(config.burst_window_polls),
+        )
+    return FixedPollScheduler(int(config.poll_frequency))
+
+
+def build_lease_store(config) -> Optional[LeaseStore]:
+    if config.lease_store == S3_LEASE_STORE:
+        return S3LeaseStore(
+            boto3.client(service_name="s3", endpoint_url=config.s3_endpoint_url),
+            config.lease_s3_bucket_name or config.s3_bucket_name,
+            config.lease_s3_key_prefix,
+            owner=default_lease_owner(),
+            ttl_sec=int(config.lease_ttl),
+        )
+    if config.lease_store == FILE_LEASE_STORE:
+        return LocalFileLeaseStore(
+            config.lease_directory or join(config.forwarder_home, "leases"),
+            owner=default_lease_owner(),
+            ttl_sec=int(config.lease_ttl),
+        )
+    return None
+
+
+def build_forwarded_index(config) -> Optional[ForwardedMessageIndex]:
+    if config.forwarded_index_path is None:
+        return None
+    return ForwardedMessageIndex(
+        join(config.forwarder_home, config.forwarded_index_path),
+        int(config.forwarded_index_max_entries),
+    )
+
+
+def build_forward_journal(config) -> Optional[ForwardJournal]:
+    if config.forward_journal_path is None:
+        return None
+    return ForwardJournal(
+        join(config.forwarder_home, config.forward_journal_path),
+        int(config.forward_journal_compact_after),
+    )
+
+
+def build_mailbox_config(ssm, config, mailbox_overrides: dict) -> MailboxConfig:
+    name = mailbox_overrides["name"]
+    mailbox_config = replace(
+        config, **{key: value for key, value in mailbox_overrides.items() if key != "name"}
+    )
+    mailbox_config = replace(
+        mailbox_config, forwarder_home=join(mailbox_config.forwarder_home, name)
+    )
+    makedirs(mailbox_config.forwarder_home, exist_ok=True)
+    return MailboxConfig(
+        name=name,
+        mesh=build_mesh_config_from_ssm(ssm, mailbox_config),
+        s3=build_s3_config(mailbox_config),
+        poll_frequency_sec=int(mailbox_config.poll_frequency),
+        poll_scheduler=build_poll_scheduler(mailbox_config),
+        forwarded_index=build_forwarded_index(mailbox_config),
+        journal=build_forward_journal(mailbox_config),
     )
 
 
@@ -41,10 +242,26 @@ def build_forwarder_from_environment_variables(env_vars=environ):
     config = ForwarderConfig.from_environment_variables(env_vars)
     ssm = boto3.client("ssm", endpoint_url=config.ssm_endpoint_url)
 
+    if config.mailboxes is not None:
+        return build_multi_mailbox_forwarder_service(
+            mailbox_configs=[
+                build_mailbox_config(ssm, config, mailbox_overrides)
+                for mailbox_overrides in json.loads(config.mailboxes)
+            ],
+            max_concurrency=int(config.mailboxes_max_concurrency),
+            forwarding_config=build_forwarding_config(config),
+            lease_store=build_lease_store(config),
+        )
+
     return build_forwarder_service(
         mesh_config=build_mesh_config_from_ssm(ssm, config),
-        s3_config=S3Config(bucket_name=config.s3_bucket_name, endpoint_url=config.s3_endpoint_url),
+        s3_config=build_s3_config(config),
         poll_frequency_sec=int(config.poll_frequency),
+        forwarding_config=build_forwarding_config(config),
+        poll_scheduler=build_poll_scheduler(config),
+        lease_store=build_lease_store(config),
+        forwarded_index=build_forwarded_index(config),
+        journal=build_forward_journal(config),
     )
 
 
@@ -1,8 +1,35 @@
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from threading import BoundedSemaphore, Event
+from typing import List, Optional
 
-from s3mesh.mesh import InvalidMeshHeader, MeshClientNetworkError, MeshInbox, MissingMeshHeader
+from s3mesh.budget import BudgetedMessage, ByteBudget, ConcurrencyShare
+from s3mesh.connections import ConnectionCounter
+from s3mesh.index import ForwardedMessage, ForwardedMessageIndex
+from s3mesh.journal import UPLOADED, ForwardJournal, JournalEntry
+from s3mesh.lease import LeaseStore, holding_lease
+from s3mesh.mesh import (
+    MESH_INBOX_PAGE_LIMIT,
+    InvalidMeshHeader,
+    MeshClientNetworkError,
+    MeshInbox,
+    MeshInboxEntry,
+    MissingMeshHeader,
+)
+from s3mesh.monitoring.event.base import (
+    ACKNOWLEDGE_STAGE,
+    COUNT_STAGE,
+    DOWNLOAD_STAGE,
+    LISTING_STAGE,
+    POLL_STAGE,
+    UPLOAD_STAGE,
+)
 from s3mesh.monitoring.probe import LoggingProbe
+from s3mesh.quarantine import Quarantine, quarantining_poison
+from s3mesh.retry import NO_MESSAGE_RETRY, MessageRetryConfig, MessageRetryQueue
 from s3mesh.s3 import S3Uploader
+from s3mesh.scheduler import PollDelay
 
 logger = logging.getLogger(__name__)
 
@@ -11,21 +38,116 @@ class RetryableException(Exception):
     pass
 
 
+def estimate_backlog_remaining(batch_count: int) -> Optional[int]:
+    if batch_count < MESH_INBOX_PAGE_LIMIT:
+        return 0
+    return None
+
+
+@contextmanager
+def recording_forward_errors(forward_message_event):
+    try:
+        yield
+    except MissingMeshHeader as e:
+        forward_message_event.record_missing_mesh_header(e)
+    except InvalidMeshHeader as e:
+        forward_message_event.record_invalid_mesh_header(e)
+    except MeshClientNetworkError as e:
+        forward_message_event.record_mesh_client_network_error(e)
+        raise RetryableException()
+
+
+def record_streamed_download(forward_message_event, message, streamed_during: str):
+    forward_message_event.record_download(message.bytes_read, message.read_sec)
+    forward_message_event.record_stage_sec(DOWNLOAD_STAGE, message.read_sec)
+    forward_message_event.record_stage_sec(streamed_during, -message.read_sec)
+
+
 class MeshToS3Forwarder:
-    def __init__(self, inbox: MeshInbox, uploader: S3Uploader, probe: LoggingProbe):
+    def __init__(
+        self,
+        inbox: MeshInbox,
+        uploader: S3Uploader,
+        probe: LoggingProbe,
+        worker_count: int = 1,
+        in_flight_budget: Optional[ByteBudget] = None,
+        concurrency_share: Optional[ConcurrencyShare] = None,
+        lease_store: Optional[LeaseStore] = None,
+        forwarded_index: Optional[ForwardedMessageIndex] = None,
+        journal: Optional[ForwardJournal] = None,
+        connection_counter: Optional[ConnectionCounter] = None,
+        retry_config: Optional[MessageRetryConfig] = None,
+        quarantine: Optional[Quarantine] = None,
+        validate_headers_first: bool = False,
+    ):
         self._inbox = inbox
         self._uploader = uploader
         self._probe = probe
+        self._worker_count = worker_count
+        self._in_flight_budget = in_flight_budget
+        self._concurrency_share = concurrency_share or nullcontext()
+        self._lease_store = lease_store
+        self._forwarded_index = forwarded_index
+        self._journal = journal
+        self._connection_counter = connection_counter
+        self._retry_config = retry_config or NO_MESSAGE_RETRY
+        self._quarantine = quarantine
+        self._validate_headers_first = validate_headers_first
+        self._stopping = Event()
+        self._skipped_count = 0
+
+    def forward_messages(self, preceding_poll_delay: Optional[PollDelay] = None) -> int:
+        inbox_entries = self._poll_messages(preceding_poll_delay)
+        retry_queue = MessageRetryQueue(self._retry_config, wait=self._stopping.wait)
+        self._forward_entries(inbox_entries, retry_queue)
+        while due_entries := retry_queue.wait_for_due():
+            self._forward_entries(due_entries, retry_queue)
+        return len(inbox_entries)
+
+    def close(self):
+        self._inbox.close()
+        self._uploader.close()
+        if self._forwarded_index is not None:
+            self._forwarded_index.close()
+        if self._journal is not None:
+            self._journal.close()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self._stopping.set()
+
+    def recover_interrupted_forwards(self):
+        if self._journal is None:
+            return
+        for journal_entry in self._journal.interrupted_entries():
+            self._recover_interrupted_forward(self._journal, journal_entry)
+
+    def _recover_interrupted_forward(self, journal: ForwardJournal, journal_entry: JournalEntry):
+        forward_message_event = self._probe.new_forward_message_event()
+        forward_message_event.record_journal_recovery(journal_entry)
+        try:
+            if journal_entry.state == UPLOADED:
+                self._inbox.entry(journal_entry.message_id).acknowledge()
+                journal.record_acknowledged(journal_entry.message_id)
+        except MeshClientNetworkError as e:
+            forward_message_event.record_mesh_client_network_error(e)
+        finally:
+            forward_message_event.finish()
 
-    def forward_messages(self):
-        for message in self._poll_messages():
-            self._process_message(message)
+    def has_backlog(self, batch_count: int) -> bool:
+        if estimate_backlog_remaining(batch_count) == 0 or self._skipped_count >= batch_count:
+            return False
+        return not self.is_mailbox_empty()
 
     def is_mailbox_empty(self):
         count_message_event = self._probe.new_count_messages_event()
         try:
-            message_count = self._inbox.count_messages()
+            with count_message_event.timing(COUNT_STAGE):
+                message_count = self._inbox.count_messages()
             count_message_event.record_message_count(message_count)
+            count_message_event.record_backlog_remaining(message_count)
             return message_count == 0
         except MeshClientNetworkError as e:
             count_message_event.record_mesh_client_network_error(e)
@@ -33,31 +155,190 @@ class MeshToS3Forwarder:
         finally:
             count_message_event.finish()
 
-    def _poll_messages(self):
+    def _poll_messages(self, preceding_poll_delay: Optional[PollDelay] = None):
         poll_inbox_event = self._probe.new_poll_inbox_event()
+        if preceding_poll_delay is not None:
+            poll_inbox_event.record_poll_delay(preceding_poll_delay)
+        if self._connection_counter is not None:
+            poll_inbox_event.record_mesh_connections(self._connection_counter.take())
         try:
-            messages = self._inbox.read_messages()
-            poll_inbox_event.record_message_batch_count(len(messages))
-            return messages
+            with poll_inbox_event.timing(POLL_STAGE):
+                return self._list_messages(poll_inbox_event)
         except MeshClientNetworkError as e:
             poll_inbox_event.record_mesh_client_network_error(e)
             raise RetryableException()
         finally:
             poll_inbox_event.finish()
 
-    def _process_message(self, message):
-        forward_message_event = self._probe.new_forward_message_event()
-        try:
-            forward_message_event.record_message_metadata(message)
-            message.validate()
-            self._uploader.upload(message, forward_message_event)
-            message.acknowledge()
-        except MissingMeshHeader as e:
-            forward_message_event.record_missing_mesh_header(e)
-        except InvalidMeshHeader as e:
-            forward_message_event.record_invalid_mesh_header(e)
-        except MeshClientNetworkError as e:
-            forward_message_event.record_mesh_client_network_error(e)
+    def _list_messages(self, poll_inbox_event):
+        with poll_inbox_event.timing(LISTING_STAGE):
+            inbox_entries = self._inbox.list_messages()
+        self._skipped_count = sum(self._skips_poison(e) for e in inbox_entries)
+        self._record_listing(inbox_entries, poll_inbox_event)
+        return inbox_entries
+
+    def _skips_poison(self, inbox_entry) -> bool:
+        return self._quarantine is not None and self._quarantine.should_skip(inbox_entry.id)
+
+    def _record_listing(self, inbox_entries, poll_inbox_event):
+        poll_inbox_event.record_message_batch_count(len(inbox_entries))
+        poll_inbox_event.record_backlog_remaining(estimate_backlog_remaining(len(inbox_entries)))
+        if self._quarantine is not None:
+            poll_inbox_event.record_poison_messages(self._quarantine.poison_count)
+            self._record_skipped(self._skipped_count, poll_inbox_event)
+
+    @staticmethod
+    def _record_skipped(skipped_count: int, poll_inbox_event):
+        poll_inbox_event.record_skipped_messages(skipped_count)
+        if skipped_count >= MESH_INBOX_PAGE_LIMIT:
+            logger.warning(
+                "Every message MESH listed is a skipped poison message, so messages behind "
+                "them cannot be forwarded until the poison messages leave the inbox"
+            )
+
+    def _forward_entries(self, inbox_entries, retry_queue: MessageRetryQueue):
+        if self._worker_count > 1:
+            self._forward_concurrently(inbox_entries, retry_queue)
+        else:
+            for inbox_entry in inbox_entries:
+                self._process_message(inbox_entry, retry_queue)
+
+    def _forward_concurrently(self, inbox_entries, retry_queue: MessageRetryQueue):
+        pool = _WorkerPool(self._worker_count)
+        with ThreadPoolExecutor(max_workers=self._worker_count) as executor:
+            for inbox_entry in inbox_entries:
+                if not pool.wait_for_free_worker():
+                    break
+                pool.track(executor.submit(self._process_message, inbox_entry, retry_queue))
+        pool.raise_first_failure()
+
+    def _process_message(self, inbox_entry, retry_queue: MessageRetryQueue):
+        if self._skips_poison(inbox_entry):
+            return
+        with self._concurrency_share:
+            forward_message_event = self._probe.new_forward_message_event()
+            forward_message_event.record_attempt(retry_queue.attempt(inbox_entry))
+            try:
+                with recording_forward_errors(forward_message_event):
+                    self._forward_leased_message(inbox_entry, forward_message_event)
+                retry_queue.record_success()
+            except RetryableException:
+                self._retry_later(inbox_entry, retry_queue, forward_message_event)
+            finally:
+                forward_message_event.finish()
+
+    def _retry_later(self, inbox_entry, retry_queue: MessageRetryQueue, forward_message_event):
+        retrying = retry_queue.retry_later(inbox_entry)
+        if not retrying and self._retry_config.max_attempts > 1:
+            forward_message_event.record_retries_exhausted()
+        if retry_queue.failures_look_systemic():
             raise RetryableException()
+
+    def _forward_leased_message(self, inbox_entry, forward_message_event):
+        with holding_lease(self._lease_store, inbox_entry.id) as leased:
+            if not leased:
+                forward_message_event.record_leased_elsewhere(inbox_entry.id)
+                return
+            if self._acknowledge_if_already_forwarded(inbox_entry, forward_message_event):
+                return
+            if self._validate_headers_first:
+                self._validate_headers(inbox_entry, forward_message_event)
+            self._record_claimed(inbox_entry)
+            with forward_message_event.timing(DOWNLOAD_STAGE):
+                message = inbox_entry.retrieve()
+            self._forward_message(message, forward_message_event)
+
+    def _validate_headers(self, inbox_entry: MeshInboxEntry, forward_message_event):
+        headers = inbox_entry.retrieve_headers()
+        try:
+            forward_message_event.record_message_metadata(headers)
+            headers.validate()
+        except (MissingMeshHeader, InvalidMeshHeader):
+            if self._quarantine is not None and self._quarantine.needs_body:
+                return
+            forward_message_event.record_body_download_avoided(headers.size_bytes)
+            if self._quarantine is not None:
+                self._quarantine.quarantine(headers, forward_message_event)
+            raise
+
+    def _acknowledge_if_already_forwarded(self, inbox_entry, forward_message_event) -> bool:
+        if self._forwarded_index is None:
+            return False
+        forwarded_message = self._forwarded_index.get(inbox_entry.id)
+        if forwarded_message is None:
+            forward_message_event.record_forwarded_index_miss()
+            return False
+        forward_message_event.record_forwarded_index_hit(forwarded_message)
+        with forward_message_event.timing(ACKNOWLEDGE_STAGE):
+            inbox_entry.acknowledge()
+        self._forwarded_index.remove(inbox_entry.id)
+        return True
+
+    def _forward_message(self, message, forward_message_event):
+        try:
+            with quarantining_poison(self._quarantine, message, forward_message_event):
+                forward_message_event.record_message_metadata(message)
+                message.validate()
+            with forward_message_event.timing(UPLOAD_STAGE):
+                s3_key = self._upload(message, forward_message_event)
+            record_streamed_download(forward_message_event, message, UPLOAD_STAGE)
+            self._record_uploaded(message, s3_key)
+            with forward_message_event.timing(ACKNOWLEDGE_STAGE):
+                message.acknowledge()
+            self._record_acknowledged(message)
         finally:
-            forward_message_event.finish()
+            message.close()
+
+    def _record_claimed(self, inbox_entry):
+        if self._journal is not None:
+            self._journal.record_claimed(inbox_entry.id)
+
+    def _record_uploaded(self, message, s3_key: str):
+        if self._journal is not None:
+            self._journal.record_uploaded(message.id, s3_key)
+        if self._forwarded_index is not None:
+            self._forwarded_index.record(ForwardedMessage(message.id, s3_key, message.bytes_read))
+
+    def _record_acknowledged(self, message):
+        if self._journal is not None:
+            self._journal.record_acknowledged(message.id)
+        if self._forwarded_index is not None:
+            self._forwarded_index.remove(message.id)
+
+    def _upload(self, message, forward_message_event) -> str:
+        if self._in_flight_budget is None:
+            return self._uploader.upload(message, forward_message_event)
+        budgeted_message = BudgetedMessage(
+            message, self._in_flight_budget, self._uploader.max_buffered_bytes
+        )
+        try:
+            return self._uploader.upload(budgeted_message, forward_message_event)
+        finally:
+            budgeted_message.release()
+
+
+class _WorkerPool:
+    def __init__(self, worker_count: int):
+        self._free_workers = BoundedSemaphore(worker_count)
+        self._failed = Event()
+        self._futures: List[Future] = []
+
+    def wait_for_free_worker(self) -> bool:
+        self._free_workers.acquire()
+        if self._failed.is_set():
+            self._free_workers.release()
+            return False
+        return True
+
+    def track(self, future):
+        self._futures.append(future)
+        future.add_done_callback(self._on_done)
+
+    def raise_first_failure(self):
+        for future in self._futures:
+            future.result()
+
+    def _on_done(self, future):
+        if future.exception() is not None:
+            self._failed.set()
+        self._free_workers.release()
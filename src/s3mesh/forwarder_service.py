@@ -1,15 +1,35 @@
 import logging
-from dataclasses import dataclass
-from threading import Event
-from typing import Optional
+from dataclasses import dataclass, field
+from threading import Event, Thread
+from typing import Dict, List, Optional, Sequence
 
 import boto3
-import mesh_client
+from botocore.config import Config
 
+from s3mesh.budget import ByteBudget, ConcurrencyShare, FairConcurrencyBudget
+from s3mesh.chunks import ChunkReadAheadMeshClient
+from s3mesh.connections import ConnectionCounter, PooledMeshClient
 from s3mesh.forwarder import MeshToS3Forwarder, RetryableException
-from s3mesh.mesh import MeshInbox
+from s3mesh.index import ForwardedMessageIndex
+from s3mesh.journal import ForwardJournal
+from s3mesh.lease import LeaseStore
+from s3mesh.mesh import PASSTHROUGH_CONTENT_COMPRESSED, MeshInbox
+from s3mesh.monitoring.exporters import MetricsExporter, build_metrics_exporters
+from s3mesh.monitoring.metrics import ForwarderMetrics, MetricsConfig, MetricsRegistry
 from s3mesh.monitoring.probe import LoggingProbe
-from s3mesh.s3 import S3Uploader
+from s3mesh.pipeline import PipelineConfig, PipelinedMeshToS3Forwarder
+from s3mesh.quarantine import (
+    DEAD_LETTER_QUARANTINE,
+    SKIP_QUARANTINE,
+    DeadLetterQuarantine,
+    Quarantine,
+    QuarantineConfig,
+    SkipQuarantine,
+)
+from s3mesh.retry import MessageRetryConfig
+from s3mesh.s3 import S3Uploader, UploadConfig
+from s3mesh.scheduler import FixedPollScheduler, PollDelay, PollScheduler
+from s3mesh.spool_queue import SpoolingMeshToS3Forwarder, SpoolQueue, SpoolQueueConfig
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +43,49 @@ class MeshConfig:
     client_cert_path: str
     client_key_path: str
     ca_cert_path: str
+    content_compressed_policy: str = PASSTHROUGH_CONTENT_COMPRESSED
 
 
 @dataclass
 class S3Config:
     bucket_name: str
     endpoint_url: Optional[str]
+    key_prefix: str = ""
+    upload: UploadConfig = field(default_factory=UploadConfig)
+
+
+POOL_FORWARDING_ENGINE = "pool"
+PIPELINE_FORWARDING_ENGINE = "pipeline"
+ASYNCIO_FORWARDING_ENGINE = "asyncio"
+SPOOL_QUEUE_FORWARDER = "spool queue"
+
+
+@dataclass
+class ForwardingConfig:
+    engine: str = POOL_FORWARDING_ENGINE
+    worker_count: int = 1
+    max_in_flight_bytes: Optional[int] = None
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    async_max_concurrency: int = 100
+    chunk_read_ahead: int = 0
+    spool_queue: Optional[SpoolQueueConfig] = None
+    mesh_max_pool_connections: int = 10
+    s3_max_pool_connections: Optional[int] = None
+    message_retry: Optional[MessageRetryConfig] = None
+    quarantine: Optional[QuarantineConfig] = None
+    validate_headers_first: bool = False
+    metrics: Optional[MetricsConfig] = None
+
+
+@dataclass
+class MailboxConfig:
+    name: str
+    mesh: MeshConfig
+    s3: S3Config
+    poll_frequency_sec: int
+    poll_scheduler: Optional[PollScheduler] = None
+    forwarded_index: Optional[ForwardedMessageIndex] = None
+    journal: Optional[ForwardJournal] = None
 
 
 class MeshToS3ForwarderService:
@@ -37,44 +94,511 @@ class MeshToS3ForwarderService:
         forwarder: MeshToS3Forwarder,
         poll_frequency_sec: int,
         exit_event: Optional[Event] = None,
+        poll_scheduler: Optional[PollScheduler] = None,
+        metrics_exporters: Sequence[MetricsExporter] = (),
     ):
         self._forwarder = forwarder
         self._exit_event = exit_event or Event()
-        self._poll_frequency_sec = poll_frequency_sec
+        self._poll_scheduler = poll_scheduler or FixedPollScheduler(poll_frequency_sec)
+        self._metrics_exporters = metrics_exporters
 
     def start(self):
         logger.info("Started forwarder service")
+        _start_exporters(self._metrics_exporters)
+        try:
+            self._forwarder.recover_interrupted_forwards()
+            self._forwarder.start()
+            self._poll_until_stopped()
+        finally:
+            self._forwarder.close()
+            _close_exporters(self._metrics_exporters)
+        logger.info("Exiting forwarder service")
+
+    def _poll_until_stopped(self):
+        poll_delay = None
         while not self._exit_event.is_set():
-            try:
-                self._forwarder.forward_messages()
+            poll_delay = self._forward_and_schedule(poll_delay)
+            if poll_delay.seconds > 0:
+                self._exit_event.wait(poll_delay.seconds)
 
-                if self._forwarder.is_mailbox_empty():
-                    self._exit_event.wait(self._poll_frequency_sec)
-            except RetryableException:
-                self._exit_event.wait(self._poll_frequency_sec)
-        logger.info("Exiting forwarder service")
+    def _forward_and_schedule(self, preceding_poll_delay: Optional[PollDelay]) -> PollDelay:
+        try:
+            batch_count = self._forwarder.forward_messages(preceding_poll_delay)
+            backlog = self._forwarder.has_backlog(batch_count)
+            return self._poll_scheduler.after_success(batch_count, backlog)
+        except RetryableException:
+            return self._poll_scheduler.after_failure()
 
     def stop(self):
         logger.info("Received request to stop")
         self._exit_event.set()
+        self._forwarder.stop()
+
+
+class MultiMailboxForwarderService:
+    def __init__(
+        self,
+        services: Dict[str, MeshToS3ForwarderService],
+        exit_event: Optional[Event] = None,
+        metrics_exporters: Sequence[MetricsExporter] = (),
+    ):
+        self._services = services
+        self._exit_event = exit_event or Event()
+        self._metrics_exporters = metrics_exporters
+        self._failures: List[Exception] = []
+
+    def start(self):
+        logger.info("Started multi-mailbox forwarder service")
+        _start_exporters(self._metrics_exporters)
+        threads = [
+            Thread(target=self._run, args=(service,), name=f"mailbox-{name}")
+            for name, service in self._services.items()
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop_services()
+            _close_exporters(self._metrics_exporters)
+        if self._failures:
+            raise self._failures[0]
+        logger.info("Exiting multi-mailbox forwarder service")
+
+    def stop(self):
+        logger.info("Received request to stop")
+        self._stop_services()
+
+    def _run(self, service: MeshToS3ForwarderService):
+        try:
+            service.start()
+        except Exception as e:
+            self._failures.append(e)
+        finally:
+            self._stop_services()
+
+    def _stop_services(self):
+        if self._exit_event.is_set():
+            return
+        self._exit_event.set()
+        for service in self._services.values():
+            service.stop()
+
+
+def _start_exporters(metrics_exporters: Sequence[MetricsExporter]):
+    for exporter in metrics_exporters:
+        exporter.start()
+
+
+def _close_exporters(metrics_exporters: Sequence[MetricsExporter]):
+    for exporter in metrics_exporters:
+        exporter.close()
+
+
+def _build_metrics_registry(forwarding_config: ForwardingConfig) -> Optional[MetricsRegistry]:
+    if forwarding_config.metrics is None:
+        return None
+    return MetricsRegistry()
+
+
+def _build_metrics_exporters(
+    forwarding_config: ForwardingConfig, registry: Optional[MetricsRegistry]
+) -> List[MetricsExporter]:
+    if registry is None:
+        return []
+    return build_metrics_exporters(forwarding_config.metrics, registry)
+
+
+def _build_probe(registry: Optional[MetricsRegistry], mailbox: Optional[str] = None):
+    common_fields = None if mailbox is None else {"mailbox": mailbox}
+    if registry is None:
+        return LoggingProbe(common_fields=common_fields)
+    metrics = ForwarderMetrics(registry, common_fields)
+    return LoggingProbe(common_fields=common_fields, metrics=metrics)
+
+
+def _build_in_flight_budget(forwarding_config: ForwardingConfig) -> Optional[ByteBudget]:
+    if forwarding_config.max_in_flight_bytes is None:
+        return None
+    return ByteBudget(forwarding_config.max_in_flight_bytes)
+
+
+def _build_quarantine(
+    quarantine_config: Optional[QuarantineConfig], uploader: S3Uploader
+) -> Optional[Quarantine]:
+    if quarantine_config is None:
+        return None
+    if quarantine_config.mode == DEAD_LETTER_QUARANTINE:
+        return DeadLetterQuarantine(uploader, quarantine_config.dead_letter_prefix)
+    if quarantine_config.mode == SKIP_QUARANTINE:
+        return SkipQuarantine(quarantine_config.skip_cache_size)
+    raise ValueError(f"Unsupported quarantine mode: {quarantine_config.mode}")
+
+
+def _build_forwarder(
+    inbox: MeshInbox,
+    uploader: S3Uploader,
+    probe: LoggingProbe,
+    forwarding_config: ForwardingConfig,
+    in_flight_budget: Optional[ByteBudget] = None,
+    concurrency_share: Optional[ConcurrencyShare] = None,
+    lease_store: Optional[LeaseStore] = None,
+    forwarded_index: Optional[ForwardedMessageIndex] = None,
+    journal: Optional[ForwardJournal] = None,
+    connection_counter: Optional[ConnectionCounter] = None,
+) -> MeshToS3Forwarder:
+    if forwarding_config.spool_queue is not None:
+        return _build_spooling_forwarder(
+            inbox,
+            uploader,
+            probe,
+            forwarding_config,
+            forwarding_config.spool_queue,
+            lease_store,
+            connection_counter,
+        )
+    if forwarding_config.engine == PIPELINE_FORWARDING_ENGINE:
+        return PipelinedMeshToS3Forwarder(
+            inbox,
+            uploader,
+            probe,
+            forwarding_config.pipeline,
+            lease_store=lease_store,
+            connection_counter=connection_counter,
+        )
+    return MeshToS3Forwarder(
+        inbox,
+        uploader,
+        probe,
+        worker_count=forwarding_config.worker_count,
+        in_flight_budget=in_flight_budget,
+        concurrency_share=concurrency_share,
+        lease_store=lease_store,
+        forwarded_index=forwarded_index,
+        journal=journal,
+        connection_counter=connection_counter,
+        retry_config=forwarding_config.message_retry,
+        quarantine=_build_quarantine(forwarding_config.quarantine, uploader),
+        validate_headers_first=forwarding_config.validate_headers_first,
+    )
+
+
+def _build_spooling_forwarder(
+    inbox: MeshInbox,
+    uploader: S3Uploader,
+    probe: LoggingProbe,
+    forwarding_config: ForwardingConfig,
+    spool_queue_config: SpoolQueueConfig,
+    lease_store: Optional[LeaseStore],
+    connection_counter: Optional[ConnectionCounter],
+) -> SpoolingMeshToS3Forwarder:
+    return SpoolingMeshToS3Forwarder(
+        inbox,
+        uploader,
+        probe,
+        SpoolQueue(spool_queue_config.directory, spool_queue_config.max_bytes),
+        acknowledge_on=spool_queue_config.acknowledge_on,
+        drain_interval_sec=spool_queue_config.drain_interval_sec,
+        worker_count=forwarding_config.worker_count,
+        lease_store=lease_store,
+        connection_counter=connection_counter,
+        retry_config=forwarding_config.message_retry,
+        quarantine=_build_quarantine(forwarding_config.quarantine, uploader),
+        validate_headers_first=forwarding_config.validate_headers_first,
+    )
+
+
+def _build_mesh_client(
+    mesh_config: MeshConfig,
+    forwarding_config: ForwardingConfig,
+    connection_counter: ConnectionCounter,
+) -> PooledMeshClient:
+    client_args = {
+        "url": mesh_config.url,
+        "mailbox": mesh_config.mailbox,
+        "password": mesh_config.password,
+        "shared_key": mesh_config.shared_key,
+        "cert": (mesh_config.client_cert_path, mesh_config.client_key_path),
+        "verify": mesh_config.ca_cert_path,
+        "max_connections": forwarding_config.mesh_max_pool_connections,
+        "connection_counter": connection_counter,
+    }
+    if forwarding_config.chunk_read_ahead > 0:
+        return ChunkReadAheadMeshClient(
+            **client_args, chunk_read_ahead=forwarding_config.chunk_read_ahead
+        )
+    return PooledMeshClient(**client_args)
+
+
+def _build_mesh_inbox(
+    mesh_config: MeshConfig,
+    forwarding_config: ForwardingConfig,
+    connection_counter: ConnectionCounter,
+) -> MeshInbox:
+    return MeshInbox(
+        _build_mesh_client(mesh_config, forwarding_config, connection_counter),
+        mesh_config.content_compressed_policy,
+    )
+
+
+def _build_async_forwarder(
+    mesh_config: MeshConfig,
+    s3_config: S3Config,
+    forwarding_config: ForwardingConfig,
+    probe: LoggingProbe,
+):
+    from s3mesh.aio.forwarder import build_async_forwarder
+
+    return build_async_forwarder(
+        mesh_config, s3_config, probe, forwarding_config.async_max_concurrency
+    )
+
+
+def _check_spool_queue_engine(forwarding_config: ForwardingConfig):
+    if forwarding_config.spool_queue is None:
+        return
+    if forwarding_config.engine != POOL_FORWARDING_ENGINE:
+        raise ValueError("The spool queue requires the pool forwarding engine")
+
+
+def _forwarder_kind(forwarding_config: ForwardingConfig) -> str:
+    if forwarding_config.spool_queue is not None:
+        return SPOOL_QUEUE_FORWARDER
+    return forwarding_config.engine
+
+
+def _check_supported(
+    forwarding_config: ForwardingConfig, setting: str, configured: bool, supported_by: tuple
+):
+    forwarder_kind = _forwarder_kind(forwarding_config)
+    if configured and forwarder_kind not in supported_by:
+        description = (
+            forwarder_kind
+            if forwarder_kind == SPOOL_QUEUE_FORWARDER
+            else f"{forwarder_kind} forwarding engine"
+        )
+        raise ValueError(f"{setting} is not supported by the {description}")
+
+
+def _check_settings_supported(
+    forwarding_config: ForwardingConfig,
+    s3_config: S3Config,
+    lease_store: Optional[LeaseStore],
+    forwarded_index: Optional[ForwardedMessageIndex],
+    journal: Optional[ForwardJournal],
+):
+    _check_supported(
+        forwarding_config,
+        "Message leasing",
+        lease_store is not None,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "The forwarded message index",
+        forwarded_index is not None,
+        (POOL_FORWARDING_ENGINE,),
+    )
+    _check_supported(
+        forwarding_config, "The forward journal", journal is not None, (POOL_FORWARDING_ENGINE,)
+    )
+    _check_supported(
+        forwarding_config,
+        "S3 compression",
+        s3_config.upload.compression is not None,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Digesting uploads",
+        s3_config.upload.digest_algorithm is not None,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Retrying messages within a poll",
+        forwarding_config.message_retry not in (None, MessageRetryConfig()),
+        (POOL_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Quarantining poison messages",
+        forwarding_config.quarantine is not None,
+        (POOL_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Validating headers first",
+        forwarding_config.validate_headers_first,
+        (POOL_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Forwarding with several workers",
+        forwarding_config.worker_count != 1,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "MESH chunk read-ahead",
+        forwarding_config.chunk_read_ahead > 0,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
+    _check_supported(
+        forwarding_config,
+        "Capping in-flight bytes",
+        forwarding_config.max_in_flight_bytes is not None,
+        (POOL_FORWARDING_ENGINE, PIPELINE_FORWARDING_ENGINE, SPOOL_QUEUE_FORWARDER),
+    )
 
 
 def build_forwarder_service(
     mesh_config: MeshConfig,
     s3_config: S3Config,
     poll_frequency_sec,
+    forwarding_config: Optional[ForwardingConfig] = None,
+    poll_scheduler: Optional[PollScheduler] = None,
+    lease_store: Optional[LeaseStore] = None,
+    forwarded_index: Optional[ForwardedMessageIndex] = None,
+    journal: Optional[ForwardJournal] = None,
 ) -> MeshToS3ForwarderService:
-    s3 = boto3.client(service_name="s3", endpoint_url=s3_config.endpoint_url)
-    uploader = S3Uploader(s3, s3_config.bucket_name)
-
-    mesh = mesh_client.MeshClient(
-        mesh_config.url,
-        mesh_config.mailbox,
-        mesh_config.password,
-        shared_key=mesh_config.shared_key,
-        cert=(mesh_config.client_cert_path, mesh_config.client_key_path),
-        verify=mesh_config.ca_cert_path,
-    )
-    inbox = MeshInbox(mesh)
-    forwarder = MeshToS3Forwarder(inbox, uploader, LoggingProbe())
-    return MeshToS3ForwarderService(forwarder, poll_frequency_sec)
+    forwarding_config = forwarding_config or ForwardingConfig()
+    _check_spool_queue_engine(forwarding_config)
+    _check_settings_supported(forwarding_config, s3_config, lease_store, forwarded_index, journal)
+    registry = _build_metrics_registry(forwarding_config)
+    if forwarding_config.engine == ASYNCIO_FORWARDING_ENGINE:
+        return MeshToS3ForwarderService(
+            _build_async_forwarder(
+                mesh_config, s3_config, forwarding_config, _build_probe(registry)
+            ),
+            poll_frequency_sec,
+            poll_scheduler=poll_scheduler,
+            metrics_exporters=_build_metrics_exporters(forwarding_config, registry),
+        )
+
+    s3 = _build_s3_client(s3_config, forwarding_config)
+    uploader = S3Uploader(s3, s3_config.bucket_name, s3_config.key_prefix, s3_config.upload)
+    connection_counter = ConnectionCounter()
+    forwarder = _build_forwarder(
+        _build_mesh_inbox(mesh_config, forwarding_config, connection_counter),
+        uploader,
+        _build_probe(registry),
+        forwarding_config,
+        in_flight_budget=_build_in_flight_budget(forwarding_config),
+        lease_store=lease_store,
+        forwarded_index=forwarded_index,
+        journal=journal,
+        connection_counter=connection_counter,
+    )
+    return MeshToS3ForwarderService(
+        forwarder,
+        poll_frequency_sec,
+        poll_scheduler=poll_scheduler,
+        metrics_exporters=_build_metrics_exporters(forwarding_config, registry),
+    )
+
+
+def _concurrent_uploads(forwarding_config: ForwardingConfig) -> int:
+    if forwarding_config.engine == PIPELINE_FORWARDING_ENGINE:
+        return forwarding_config.pipeline.upload.worker_count
+    return forwarding_config.worker_count
+
+
+def _s3_client_config(forwarding_config: ForwardingConfig, connections_needed: int) -> Config:
+    return Config(
+        max_pool_connections=forwarding_config.s3_max_pool_connections or connections_needed,
+        tcp_keepalive=True,
+    )
+
+
+def _build_s3_client(s3_config: S3Config, forwarding_config: ForwardingConfig):
+    connections_needed = s3_config.upload.max_concurrency + _concurrent_uploads(forwarding_config)
+    return boto3.client(
+        service_name="s3",
+        endpoint_url=s3_config.endpoint_url,
+        config=_s3_client_config(forwarding_config, connections_needed),
+    )
+
+
+def _build_shared_s3_clients(
+    mailbox_configs: List[MailboxConfig],
+    max_concurrency: int,
+    forwarding_config: ForwardingConfig,
+) -> dict:
+    transfer_threads = sum(
+        mailbox_config.s3.upload.max_concurrency for mailbox_config in mailbox_configs
+    )
+    client_config = _s3_client_config(forwarding_config, max_concurrency + transfer_threads)
+    return {
+        endpoint_url: boto3.client(
+            service_name="s3", endpoint_url=endpoint_url, config=client_config
+        )
+        for endpoint_url in {mailbox_config.s3.endpoint_url for mailbox_config in mailbox_configs}
+    }
+
+
+def _build_mailbox_forwarder(
+    mailbox_config: MailboxConfig,
+    s3_client,
+    forwarding_config: ForwardingConfig,
+    in_flight_budget: Optional[ByteBudget],
+    concurrency_share: ConcurrencyShare,
+    lease_store: Optional[LeaseStore],
+    registry: Optional[MetricsRegistry],
+) -> MeshToS3Forwarder:
+    s3_config = mailbox_config.s3
+    uploader = S3Uploader(s3_client, s3_config.bucket_name, s3_config.key_prefix, s3_config.upload)
+    connection_counter = ConnectionCounter()
+    return _build_forwarder(
+        _build_mesh_inbox(mailbox_config.mesh, forwarding_config, connection_counter),
+        uploader,
+        _build_probe(registry, mailbox_config.name),
+        forwarding_config,
+        in_flight_budget=in_flight_budget,
+        concurrency_share=concurrency_share,
+        lease_store=lease_store,
+        forwarded_index=mailbox_config.forwarded_index,
+        journal=mailbox_config.journal,
+        connection_counter=connection_counter,
+    )
+
+
+def build_multi_mailbox_forwarder_service(
+    mailbox_configs: List[MailboxConfig],
+    max_concurrency: int,
+    forwarding_config: Optional[ForwardingConfig] = None,
+    lease_store: Optional[LeaseStore] = None,
+) -> MultiMailboxForwarderService:
+    forwarding_config = forwarding_config or ForwardingConfig()
+    if forwarding_config.engine != POOL_FORWARDING_ENGINE:
+        raise ValueError("Forwarding from multiple mailboxes requires the pool forwarding engine")
+    if forwarding_config.spool_queue is not None:
+        raise ValueError("The spool queue is not supported when forwarding from multiple mailboxes")
+    s3_clients = _build_shared_s3_clients(mailbox_configs, max_concurrency, forwarding_config)
+    concurrency_budget = FairConcurrencyBudget(max_concurrency)
+    in_flight_budget = _build_in_flight_budget(forwarding_config)
+    registry = _build_metrics_registry(forwarding_config)
+    exit_event = Event()
+    services = {
+        mailbox_config.name: MeshToS3ForwarderService(
+            _build_mailbox_forwarder(
+                mailbox_config,
+                s3_clients[mailbox_config.s3.endpoint_url],
+                forwarding_config,
+                in_flight_budget,
+                concurrency_budget.share(mailbox_config.name),
+                lease_store,
+                registry,
+            ),
+            mailbox_config.poll_frequency_sec,
+            exit_event=exit_event,
+            poll_scheduler=mailbox_config.poll_scheduler,
+        )
+        for mailbox_config in mailbox_configs
+    }
+    return MultiMailboxForwarderService(
+        services,
+        exit_event,
+        metrics_exporters=_build_metrics_exporters(forwarding_config, registry),
+    )
@@ -0,0 +1,61 @@
+import sqlite3
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ForwardedMessage:
+    message_id: str
+    s3_key: str
+    size_bytes: int
+
+
+class ForwardedMessageIndex:
+    def __init__(self, path: str, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS forwarded_messages ("
+            "message_id TEXT PRIMARY KEY, s3_key TEXT NOT NULL, size_bytes INTEGER NOT NULL)"
+        )
+
+    def get(self, message_id: str) -> Optional[ForwardedMessage]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT message_id, s3_key, size_bytes FROM forwarded_messages "
+                "WHERE message_id = ?",
+                (message_id,),
+            ).fetchone()
+        return None if row is None else ForwardedMessage(*row)
+
+    def record(self, forwarded_message: ForwardedMessage):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO forwarded_messages VALUES (?, ?, ?)",
+                (
+                    forwarded_message.message_id,
+                    forwarded_message.s3_key,
+                    forwarded_message.size_bytes,
+                ),
+            )
+            self._connection.execute(
+                "DELETE FROM forwarded_messages WHERE rowid NOT IN "
+                "(SELECT rowid FROM forwarded_messages ORDER BY rowid DESC LIMIT ?)",
+                (self._max_entries,),
+            )
+
+    def remove(self, message_id: str):
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM forwarded_messages WHERE message_id = ?", (message_id,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM forwarded_messages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
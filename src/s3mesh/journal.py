@@ -0,0 +1,98 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Dict, List, Optional
+
+CLAIMED = "CLAIMED"
+UPLOADED = "UPLOADED"
+ACKNOWLEDGED = "ACKNOWLEDGED"
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    message_id: str
+    state: str
+    s3_key: Optional[str] = None
+    etag: Optional[str] = None
+
+
+def _read_entries(path: str) -> Dict[str, JournalEntry]:
+    entries: Dict[str, JournalEntry] = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            _apply(entries, _parse(line))
+    return entries
+
+
+def _parse(line: str) -> Optional[JournalEntry]:
+    try:
+        return JournalEntry(**json.loads(line))
+    except (ValueError, TypeError):
+        return None
+
+
+def _apply(entries: Dict[str, JournalEntry], entry: Optional[JournalEntry]):
+    if entry is None:
+        return
+    if entry.state == ACKNOWLEDGED:
+        entries.pop(entry.message_id, None)
+    else:
+        entries[entry.message_id] = entry
+
+
+class ForwardJournal:
+    def __init__(self, path: str, compact_after_entries: int):
+        self._path = path
+        self._compact_after_entries = compact_after_entries
+        self._lock = Lock()
+        entries = _read_entries(path)
+        self._interrupted = list(entries.values())
+        self._entries = {
+            message_id: entry for message_id, entry in entries.items() if entry.state == UPLOADED
+        }
+        self._compact()
+
+    def interrupted_entries(self) -> List[JournalEntry]:
+        return list(self._interrupted)
+
+    def record_claimed(self, message_id: str):
+        self._append(JournalEntry(message_id, CLAIMED))
+
+    def record_uploaded(self, message_id: str, s3_key: str, etag: Optional[str] = None):
+        self._append(JournalEntry(message_id, UPLOADED, s3_key, etag))
+
+    def record_acknowledged(self, message_id: str):
+        self._append(JournalEntry(message_id, ACKNOWLEDGED))
+
+    def pending_entries(self) -> List[JournalEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _append(self, entry: JournalEntry):
+        with self._lock:
+            self._file.write(json.dumps(asdict(entry)) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            _apply(self._entries, entry)
+            self._appended_entries += 1
+            if self._appended_entries >= self._compact_after_entries:
+                self._file.close()
+                self._compact()
+
+    def _compact(self):
+        compacted_path = f"{self._path}.compacting"
+        with open(compacted_path, "w") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(asdict(entry)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted_path, self._path)
+        self._file = open(self._path, "a")
+        self._appended_entries = 0
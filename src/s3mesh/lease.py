@@ -0,0 +1,187 @@
+import fcntl
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from os.path import join
+from typing import Callable, Optional, Protocol
+
+from botocore.exceptions import ClientError
+
+LOST_CONDITIONAL_WRITE_ERROR_CODES = {"PreconditionFailed", "ConditionalRequestConflict"}
+MISSING_OBJECT_ERROR_CODES = {"NoSuchKey", "404"}
+LOST_LEASE_ERROR_CODES = LOST_CONDITIONAL_WRITE_ERROR_CODES | MISSING_OBJECT_ERROR_CODES
+
+
+def default_lease_owner() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+@dataclass(frozen=True)
+class Lease:
+    message_id: str
+    token: str
+
+
+class LeaseStore(Protocol):
+    def try_acquire(self, message_id: str) -> Optional[Lease]:
+        ...
+
+    def release(self, lease: Lease):
+        ...
+
+
+@contextmanager
+def holding_lease(lease_store: Optional[LeaseStore], message_id: str):
+    if lease_store is None:
+        yield True
+        return
+    lease = lease_store.try_acquire(message_id)
+    if lease is None:
+        yield False
+        return
+    try:
+        yield True
+    except BaseException:
+        lease_store.release(lease)
+        raise
+
+
+def _lease_body(owner: str, expires_at: float) -> str:
+    return json.dumps({"owner": owner, "expiresAt": expires_at})
+
+
+def _error_code(error: ClientError) -> str:
+    return error.response.get("Error", {}).get("Code", "")
+
+
+class S3LeaseStore:
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key_prefix: str,
+        owner: str,
+        ttl_sec: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._s3_client = s3_client
+        self._bucket_name = bucket_name
+        self._key_prefix = key_prefix
+        self._owner = owner
+        self._ttl_sec = ttl_sec
+        self._clock = clock
+
+    def try_acquire(self, message_id: str) -> Optional[Lease]:
+        lease = self._put_lease(message_id, IfNoneMatch="*")
+        if lease is not None:
+            return lease
+        return self._take_over_if_expired(message_id)
+
+    def release(self, lease: Lease):
+        try:
+            self._s3_client.delete_object(
+                Bucket=self._bucket_name, Key=self._key(lease.message_id), IfMatch=lease.token
+            )
+        except ClientError as e:
+            if _error_code(e) not in LOST_LEASE_ERROR_CODES:
+                raise
+
+    def _take_over_if_expired(self, message_id: str) -> Optional[Lease]:
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self._bucket_name, Key=self._key(message_id)
+            )
+        except ClientError as e:
+            if _error_code(e) in MISSING_OBJECT_ERROR_CODES:
+                return None
+            raise
+        if json.loads(response["Body"].read())["expiresAt"] > self._clock():
+            return None
+        return self._put_lease(message_id, IfMatch=response["ETag"])
+
+    def _put_lease(self, message_id: str, **condition) -> Optional[Lease]:
+        try:
+            response = self._s3_client.put_object(
+                Bucket=self._bucket_name,
+                Key=self._key(message_id),
+                Body=_lease_body(self._owner, self._clock() + self._ttl_sec),
+                **condition,
+            )
+        except ClientError as e:
+            if _error_code(e) in LOST_CONDITIONAL_WRITE_ERROR_CODES:
+                return None
+            raise
+        return Lease(message_id, response["ETag"])
+
+    def _key(self, message_id: str) -> str:
+        return f"{self._key_prefix}{message_id}"
+
+
+class LocalFileLeaseStore:
+    def __init__(
+        self,
+        directory: str,
+        owner: str,
+        ttl_sec: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._directory = directory
+        self._owner = owner
+        self._ttl_sec = ttl_sec
+        self._clock = clock
+        self._next_purge_at = clock()
+        os.makedirs(directory, exist_ok=True)
+
+    def try_acquire(self, message_id: str) -> Optional[Lease]:
+        with self._locked():
+            self._purge_expired_if_due()
+            current = self._read(message_id)
+            if current is not None and current["expiresAt"] > self._clock():
+                return None
+            token = uuid.uuid4().hex
+            with open(self._path(message_id), "w") as f:
+                json.dump({"token": token, "owner": self._owner, "expiresAt": self._expiry()}, f)
+            return Lease(message_id, token)
+
+    def release(self, lease: Lease):
+        with self._locked():
+            current = self._read(lease.message_id)
+            if current is not None and current["token"] == lease.token:
+                os.remove(self._path(lease.message_id))
+
+    def _purge_expired_if_due(self):
+        now = self._clock()
+        if now < self._next_purge_at:
+            return
+        self._next_purge_at = now + self._ttl_sec
+        for file_name in os.listdir(self._directory):
+            message_id, extension = os.path.splitext(file_name)
+            current = self._read(message_id) if extension == ".lease" else None
+            if current is not None and current["expiresAt"] <= now:
+                os.remove(self._path(message_id))
+
+    def _expiry(self) -> float:
+        return self._clock() + self._ttl_sec
+
+    def _read(self, message_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(message_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _path(self, message_id: str) -> str:
+        return join(self._directory, f"{message_id}.lease")
+
+    @contextmanager
+    def _locked(self):
+        with open(join(self._directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
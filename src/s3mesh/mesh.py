@@ -1,13 +1,24 @@
 import logging
+import time
 from datetime import datetime
-from typing import Any, Callable, List
+from functools import cached_property
+from typing import Any, Callable, List, Mapping, Optional
 
 from mesh_client import MeshClient, Message
 from requests import ConnectionError, HTTPError
 
+from s3mesh.compression import GzipDecompressingStream
+
 MESH_STATUS_EVENT_TRANSFER = "TRANSFER"
 MESH_MESSAGE_TYPE_DATA = "DATA"
 MESH_STATUS_SUCCESS = "SUCCESS"
+MESH_INBOX_PAGE_LIMIT = 500
+MESH_CONTENT_COMPRESSED_VALUES = {"Y", "TRUE"}
+MEX_HEADER_PREFIX = "mex-"
+MESH_TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+PASSTHROUGH_CONTENT_COMPRESSED = "passthrough"
+DECOMPRESS_CONTENT_COMPRESSED = "decompress"
 
 logger = logging.getLogger(__name__)
 
@@ -28,34 +39,67 @@ def _wrap_http_errors(func: Callable[[Any], Any]):
     return wrapper_function
 
 
-class MeshMessage:
-    def __init__(self, client_message: Message):
-        self.id: str = client_message.id()
-        self._client_message: Message = client_message
+def parse_mesh_timestamp(timestamp: str) -> datetime:
+    if len(timestamp) != 14 or not timestamp.isdigit():
+        return datetime.strptime(timestamp, MESH_TIMESTAMP_FORMAT)
+    return datetime(
+        int(timestamp[0:4]),
+        int(timestamp[4:6]),
+        int(timestamp[6:8]),
+        int(timestamp[8:10]),
+        int(timestamp[10:12]),
+        int(timestamp[12:14]),
+    )
+
+
+def parse_chunk_count(chunk_range: Optional[str]) -> int:
+    _, _, chunk_count = (chunk_range or "1:1").partition(":")
+    if not chunk_count.isdigit() or int(chunk_count) < 1:
+        return 1
+    return int(chunk_count)
+
+
+class MeshMessageMetadata:
+    def _mex_header(self, header_name: str) -> str:
+        raise NotImplementedError
 
     def _read_header(self, header_name: str):
         try:
-            return self._client_message.mex_header(header_name)
+            return self._mex_header(header_name)
         except KeyError:
             raise MissingMeshHeader(header_name=header_name)
 
-    @property
+    def _read_optional_header(self, header_name: str):
+        try:
+            return self._mex_header(header_name)
+        except KeyError:
+            return None
+
+    @cached_property
     def file_name(self) -> str:
         return self._read_header("filename")
 
-    @property
+    @cached_property
     def date_delivered(self) -> datetime:
-        date_header = self._read_header("statustimestamp")
-        return datetime.strptime(date_header, "%Y%m%d%H%M%S")
+        return parse_mesh_timestamp(self._read_header("statustimestamp"))
 
-    @property
+    @cached_property
     def sender(self) -> str:
         return self._read_header("from")
 
-    @property
+    @cached_property
     def recipient(self) -> str:
         return self._read_header("to")
 
+    @cached_property
+    def chunk_count(self) -> int:
+        return parse_chunk_count(self._read_optional_header("chunk-range"))
+
+    @cached_property
+    def content_compressed(self) -> bool:
+        content_compressed = self._read_optional_header("content-compressed")
+        return (content_compressed or "N").upper() in MESH_CONTENT_COMPRESSED_VALUES
+
     def validate(self):
         if (header_value := self._read_header("statusevent").upper()) != MESH_STATUS_EVENT_TRANSFER:
             raise UnexpectedStatusEvent(header_value)
@@ -64,28 +108,100 @@ class MeshMessage:
         if (header_value := self._read_header("messagetype").upper()) != MESH_MESSAGE_TYPE_DATA:
             raise UnexpectedMessageType(header_value)
 
+
+class MeshMessageHeaders(MeshMessageMetadata):
+    def __init__(self, message_id: str, headers: Mapping[str, str]):
+        self.id = message_id
+        self._mex_headers = {
+            key.lower().removeprefix(MEX_HEADER_PREFIX): value
+            for key, value in headers.items()
+            if key.lower().startswith(MEX_HEADER_PREFIX)
+        }
+        content_length = headers.get("Content-Length")
+        self.size_bytes = None if content_length is None else int(content_length)
+
+    def _mex_header(self, header_name: str) -> str:
+        return self._mex_headers[header_name]
+
+
+class MeshMessage(MeshMessageMetadata):
+    def __init__(
+        self,
+        client_message: Message,
+        content_compressed_policy: str = PASSTHROUGH_CONTENT_COMPRESSED,
+    ):
+        self.id: str = client_message.id()
+        self._client_message: Message = client_message
+        self._body = client_message
+        self.bytes_read = 0
+        self.read_sec = 0.0
+        decompress = content_compressed_policy == DECOMPRESS_CONTENT_COMPRESSED
+        if decompress and self.content_compressed:
+            self._body = GzipDecompressingStream(client_message)
+
+    def _mex_header(self, header_name: str) -> str:
+        return self._client_message.mex_header(header_name)
+
     @_wrap_http_errors
     def acknowledge(self):
         self._client_message.acknowledge()
 
     def read(self, n=None):
-        return self._client_message.read(n)
+        started = time.monotonic()
+        data = self._body.read(n)
+        self.read_sec += time.monotonic() - started
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self._client_message.close()
+
+
+class MeshInboxEntry:
+    def __init__(
+        self,
+        client: MeshClient,
+        message_id: str,
+        content_compressed_policy: str = PASSTHROUGH_CONTENT_COMPRESSED,
+    ):
+        self.id = message_id
+        self._client = client
+        self._content_compressed_policy = content_compressed_policy
+
+    @_wrap_http_errors
+    def retrieve(self) -> MeshMessage:
+        return MeshMessage(self._client.retrieve_message(self.id), self._content_compressed_policy)
+
+    @_wrap_http_errors
+    def retrieve_headers(self) -> MeshMessageHeaders:
+        return MeshMessageHeaders(self.id, self._client.retrieve_message_headers(self.id))
+
+    @_wrap_http_errors
+    def acknowledge(self):
+        self._client.acknowledge_message(self.id)
 
 
 class MeshInbox:
-    def __init__(self, client: MeshClient):
+    def __init__(
+        self, client: MeshClient, content_compressed_policy: str = PASSTHROUGH_CONTENT_COMPRESSED
+    ):
         self._client = client
+        self._content_compressed_policy = content_compressed_policy
 
     @_wrap_http_errors
-    def read_messages(self) -> List[MeshMessage]:
-        return [
-            MeshMessage(client_message) for client_message in self._client.iterate_all_messages()
-        ]
+    def list_messages(self) -> List[MeshInboxEntry]:
+        return [self.entry(message_id) for message_id in self._client.list_messages()]
+
+    def entry(self, message_id: str) -> MeshInboxEntry:
+        return MeshInboxEntry(self._client, message_id, self._content_compressed_policy)
 
     @_wrap_http_errors
     def count_messages(self) -> int:
         return self._client.count_messages()
 
+    def close(self):
+        self._client.close()
+
 
 class MeshClientNetworkError(Exception):
     def __init__(self, message):
@@ -1,3 +1,4 @@
 MESH_CLIENT_NETWORK_ERROR = "MESH_CLIENT_NETWORK_ERROR"
 INVALID_MESH_HEADER_ERROR = "INVALID_MESH_HEADER"
 MISSING_MESH_HEADER_ERROR = "MISSING_MESH_HEADER"
+S3_ERROR = "S3_ERROR"
@@ -1,16 +1,43 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
 from s3mesh.mesh import MeshClientNetworkError
 from s3mesh.monitoring.error import MESH_CLIENT_NETWORK_ERROR
 
+POLL_STAGE = "poll"
+LISTING_STAGE = "listing"
+COUNT_STAGE = "count"
+DOWNLOAD_STAGE = "download"
+SPOOL_STAGE = "spool"
+UPLOAD_STAGE = "upload"
+ACKNOWLEDGE_STAGE = "acknowledge"
+
 
 class ForwarderEvent:
-    def __init__(self, output, event_name):
+    def __init__(self, output, event_name, clock: Callable[[], float] = time.monotonic):
         self._event_name = event_name
-        self._fields = {}
+        self._fields: Dict[str, Any] = {}
         self._output = output
+        self._clock = clock
+        self._stage_sec: Dict[str, float] = {}
+
+    @contextmanager
+    def timing(self, stage: str):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record_stage_sec(stage, self._clock() - started)
+
+    def record_stage_sec(self, stage: str, seconds: float):
+        self._stage_sec[stage] = self._stage_sec.get(stage, 0.0) + seconds
 
     def record_mesh_client_network_error(self, exception: MeshClientNetworkError):
         self._fields["error"] = MESH_CLIENT_NETWORK_ERROR
         self._fields["errorMessage"] = exception.error_message
 
     def finish(self):
+        for stage, seconds in self._stage_sec.items():
+            self._fields[f"{stage}Sec"] = round(max(seconds, 0.0), 6)
         self._output.log_event(self._event_name, self._fields)
@@ -1,11 +1,17 @@
+import time
+from typing import Callable
+
 from s3mesh.monitoring.event.base import ForwarderEvent
 
 COUNT_MESSAGES_EVENT = "COUNT_MESSAGES"
 
 
 class CountMessagesEvent(ForwarderEvent):
-    def __init__(self, output):
-        super().__init__(output, COUNT_MESSAGES_EVENT)
+    def __init__(self, output, clock: Callable[[], float] = time.monotonic):
+        super().__init__(output, COUNT_MESSAGES_EVENT, clock)
 
     def record_message_count(self, count: int):
         self._fields["inboxMessageCount"] = count
+
+    def record_backlog_remaining(self, count: int):
+        self._fields["backlogRemaining"] = count
@@ -1,23 +1,98 @@
+import time
+from typing import Callable, Optional
+
+from s3mesh.index import ForwardedMessage
+from s3mesh.journal import JournalEntry
 from s3mesh.mesh import InvalidMeshHeader, MeshMessage, MissingMeshHeader
-from s3mesh.monitoring.error import INVALID_MESH_HEADER_ERROR, MISSING_MESH_HEADER_ERROR
+from s3mesh.monitoring.error import INVALID_MESH_HEADER_ERROR, MISSING_MESH_HEADER_ERROR, S3_ERROR
 from s3mesh.monitoring.event.base import ForwarderEvent
 
 FORWARD_MESSAGE_EVENT = "FORWARD_MESH_MESSAGE"
+FORWARDED_INDEX_HIT = "HIT"
+FORWARDED_INDEX_MISS = "MISS"
 
 
 class ForwardMessageEvent(ForwarderEvent):
-    def __init__(self, output):
-        super().__init__(output, FORWARD_MESSAGE_EVENT)
+    def __init__(self, output, clock: Callable[[], float] = time.monotonic):
+        super().__init__(output, FORWARD_MESSAGE_EVENT, clock)
 
     def record_message_metadata(self, message: MeshMessage):
         self._fields["messageId"] = message.id
         self._fields["sender"] = message.sender
         self._fields["recipient"] = message.recipient
         self._fields["fileName"] = message.file_name
+        self._fields["chunkCount"] = message.chunk_count
+        self._fields["contentCompressed"] = message.content_compressed
+
+    def record_attempt(self, attempt: int):
+        self._fields["attempt"] = attempt
+
+    def record_retries_exhausted(self):
+        self._fields["retriesExhausted"] = True
+
+    def record_body_download_avoided(self, size_bytes: Optional[int]):
+        self._fields["bodyDownloadAvoided"] = True
+        if size_bytes is not None:
+            self._fields["bodyBytesAvoided"] = size_bytes
+
+    def record_quarantine(self, quarantine_mode: str):
+        self._fields["quarantine"] = quarantine_mode
+
+    def record_leased_elsewhere(self, message_id: str):
+        self._fields["messageId"] = message_id
+        self._fields["leasedElsewhere"] = True
+
+    def record_forwarded_index_hit(self, forwarded_message: ForwardedMessage):
+        self._fields["messageId"] = forwarded_message.message_id
+        self._fields["forwardedIndex"] = FORWARDED_INDEX_HIT
+        self._fields["s3Key"] = forwarded_message.s3_key
+        self._fields["sizeBytes"] = forwarded_message.size_bytes
+
+    def record_forwarded_index_miss(self):
+        self._fields["forwardedIndex"] = FORWARDED_INDEX_MISS
+
+    def record_journal_recovery(self, journal_entry: JournalEntry):
+        self._fields["messageId"] = journal_entry.message_id
+        self._fields["journalState"] = journal_entry.state
+        if journal_entry.s3_key is not None:
+            self._fields["s3Key"] = journal_entry.s3_key
 
     def record_s3_key(self, key):
         self._fields["s3Key"] = key
 
+    def record_download(self, size_bytes: int, read_sec: float):
+        self._fields["downloadedBytes"] = size_bytes
+        if read_sec > 0:
+            self._fields["downloadBytesPerSec"] = round(size_bytes / read_sec)
+
+    def record_upload(self, strategy: str, size_bytes: int, duration_sec: float):
+        self._fields["uploadStrategy"] = strategy
+        self._fields["uploadedBytes"] = size_bytes
+        if duration_sec > 0:
+            self._fields["uploadBytesPerSec"] = round(size_bytes / duration_sec)
+
+    def record_compression(self, compression: str, compression_ratio: float, cpu_sec: float):
+        self._fields["compression"] = compression
+        self._fields["compressionRatio"] = round(compression_ratio, 2)
+        self._fields["compressionCpuSec"] = round(cpu_sec, 6)
+
+    def record_digest(self, algorithm: str, hex_digest: str, bytes_per_sec: Optional[float]):
+        self._fields["digestAlgorithm"] = algorithm
+        self._fields["digest"] = hex_digest
+        if bytes_per_sec is not None:
+            self._fields["digestBytesPerSec"] = round(bytes_per_sec)
+
+    def record_spill(self, spilled_bytes: int):
+        self._fields["spilledToDisk"] = True
+        self._fields["spilledBytes"] = spilled_bytes
+
+    def record_spool_depth(self, depth: int):
+        self._fields["spoolDepth"] = depth
+
+    def record_s3_error(self, exception: Exception):
+        self._fields["error"] = S3_ERROR
+        self._fields["errorMessage"] = str(exception)
+
     def record_missing_mesh_header(self, exception: MissingMeshHeader):
         self._fields["error"] = MISSING_MESH_HEADER_ERROR
         self._fields["missingHeaderName"] = exception.header_name
@@ -1,11 +1,34 @@
+import time
+from typing import Callable, Optional
+
+from s3mesh.connections import ConnectionStats
 from s3mesh.monitoring.event.base import ForwarderEvent
+from s3mesh.scheduler import PollDelay
 
 POLL_INBOX_EVENT = "POLL_MESSAGE"
 
 
 class PollInboxEvent(ForwarderEvent):
-    def __init__(self, output):
-        super().__init__(output, POLL_INBOX_EVENT)
+    def __init__(self, output, clock: Callable[[], float] = time.monotonic):
+        super().__init__(output, POLL_INBOX_EVENT, clock)
 
     def record_message_batch_count(self, count: int):
         self._fields["batchMessageCount"] = count
+
+    def record_poll_delay(self, poll_delay: PollDelay):
+        self._fields["pollDelaySec"] = poll_delay.seconds
+        self._fields["pollDelayReason"] = poll_delay.reason
+
+    def record_backlog_remaining(self, count: Optional[int]):
+        self._fields["backlogRemaining"] = count
+
+    def record_mesh_connections(self, connection_stats: ConnectionStats):
+        self._fields["meshNewConnections"] = connection_stats.new_connections
+        self._fields["meshPoolWaits"] = connection_stats.pool_waits
+        self._fields["meshPoolWaitSec"] = round(connection_stats.pool_wait_sec, 3)
+
+    def record_poison_messages(self, count: int):
+        self._fields["poisonMessages"] = count
+
+    def record_skipped_messages(self, count: int):
+        self._fields["skippedMessages"] = count
@@ -0,0 +1,187 @@
+import logging
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+from typing import Dict, Iterator, List, Optional, Protocol
+
+from s3mesh.monitoring.metrics import COUNTER, HISTOGRAM, Labels, MetricsConfig, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PROMETHEUS_METRICS_PATH = "/metrics"
+STATSD_MAX_PACKET_BYTES = 1432
+
+
+class MetricsExporter(Protocol):
+    def start(self):
+        ...
+
+    def close(self):
+        ...
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_sample(name: str, labels: Labels, value) -> str:
+    if not labels:
+        return f"{name} {value}"
+    label_text = ",".join(f'{key}="{_escape_label_value(str(val))}"' for key, val in labels)
+    return f"{name}{{{label_text}}} {value}"
+
+
+def render_prometheus(registry: MetricsRegistry) -> str:
+    lines = []
+    for family in registry.collect():
+        lines.append(f"# HELP {family.name} {family.help_text}")
+        lines.append(f"# TYPE {family.name} {family.metric_type}")
+        for metric in family.metrics.values():
+            for suffix, labels, value in metric.samples():
+                lines.append(_format_sample(f"{family.name}{suffix}", labels, value))
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    def __init__(self, registry: MetricsRegistry, port: int, address: str = ""):
+        self._server = ThreadingHTTPServer((address, port), self._handler(registry))
+        self._server.daemon_threads = True
+        self._thread = Thread(
+            target=self._server.serve_forever, name="prometheus-exporter", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _handler(registry: MetricsRegistry):
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != PROMETHEUS_METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = render_prometheus(registry).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return _MetricsHandler
+
+
+def _statsd_name(prefix: str, name: str, labels: Labels, suffix: str) -> str:
+    parts = [prefix] if prefix else []
+    parts.append(name)
+    parts.extend(str(value).replace(".", "_") for _, value in labels)
+    if suffix:
+        parts.append(suffix)
+    return ".".join(parts)
+
+
+class StatsdExporter:
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str,
+        port: int = 8125,
+        prefix: str = "",
+        interval_sec: float = 10,
+    ):
+        self._registry = registry
+        self._address = (host, port)
+        self._prefix = prefix
+        self._interval_sec = interval_sec
+        self._pushed: Dict[str, float] = {}
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._stopping = Event()
+        self._thread = Thread(target=self._push_periodically, name="statsd-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.push()
+        self._socket.close()
+
+    def push(self):
+        for packet in self._packets(list(self._lines())):
+            try:
+                self._socket.sendto(packet, self._address)
+            except OSError as e:
+                logger.warning(f"Failed to push metrics to StatsD: {e}")
+
+    def _push_periodically(self):
+        while not self._stopping.wait(self._interval_sec):
+            self.push()
+
+    def _lines(self) -> Iterator[str]:
+        for family in self._registry.collect():
+            for metric in family.metrics.values():
+                for suffix, labels, value in metric.samples():
+                    line = self._line(family.name, family.metric_type, suffix, labels, value)
+                    if line is not None:
+                        yield line
+
+    def _line(self, name, metric_type, suffix, labels, value) -> Optional[str]:
+        if suffix == "_bucket":
+            return None
+        stat = _statsd_name(self._prefix, name, labels, suffix.lstrip("_"))
+        if metric_type in (COUNTER, HISTOGRAM):
+            delta = value - self._pushed.get(stat, 0)
+            self._pushed[stat] = value
+            return f"{stat}:{delta}|c" if delta else None
+        return f"{stat}:{value}|g"
+
+    @staticmethod
+    def _packets(lines: List[str]) -> Iterator[bytes]:
+        packet = bytearray()
+        for line in lines:
+            encoded = line.encode("utf-8")
+            if packet and len(packet) + len(encoded) + 1 > STATSD_MAX_PACKET_BYTES:
+                yield bytes(packet)
+                packet = bytearray()
+            if packet:
+                packet += b"\n"
+            packet += encoded
+        if packet:
+            yield bytes(packet)
+
+
+def build_metrics_exporters(
+    metrics_config: MetricsConfig, registry: MetricsRegistry
+) -> List[MetricsExporter]:
+    exporters: List[MetricsExporter] = []
+    if metrics_config.prometheus_port is not None:
+        exporters.append(
+            PrometheusExporter(
+                registry, metrics_config.prometheus_port, metrics_config.prometheus_address
+            )
+        )
+    if metrics_config.statsd_host is not None:
+        exporters.append(
+            StatsdExporter(
+                registry,
+                metrics_config.statsd_host,
+                metrics_config.statsd_port,
+                metrics_config.statsd_prefix,
+                metrics_config.statsd_interval_sec,
+            )
+        )
+    return exporters
@@ -0,0 +1,285 @@
+import math
+from bisect import bisect_left
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from s3mesh.monitoring.error import (
+    INVALID_MESH_HEADER_ERROR,
+    MESH_CLIENT_NETWORK_ERROR,
+    MISSING_MESH_HEADER_ERROR,
+    S3_ERROR,
+)
+from s3mesh.monitoring.event.base import (
+    ACKNOWLEDGE_STAGE,
+    COUNT_STAGE,
+    DOWNLOAD_STAGE,
+    LISTING_STAGE,
+    POLL_STAGE,
+    SPOOL_STAGE,
+    UPLOAD_STAGE,
+)
+from s3mesh.monitoring.event.count import COUNT_MESSAGES_EVENT
+from s3mesh.monitoring.event.forward import FORWARD_MESSAGE_EVENT
+from s3mesh.monitoring.event.poll import POLL_INBOX_EVENT
+from s3mesh.quarantine import DEAD_LETTER_QUARANTINE, SKIP_QUARANTINE
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+STAGE_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+MESSAGE_BYTES_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(10))
+
+STAGES = (
+    POLL_STAGE,
+    LISTING_STAGE,
+    COUNT_STAGE,
+    DOWNLOAD_STAGE,
+    SPOOL_STAGE,
+    UPLOAD_STAGE,
+    ACKNOWLEDGE_STAGE,
+)
+EVENTS = (POLL_INBOX_EVENT, COUNT_MESSAGES_EVENT, FORWARD_MESSAGE_EVENT)
+ERRORS = (
+    MESH_CLIENT_NETWORK_ERROR,
+    INVALID_MESH_HEADER_ERROR,
+    MISSING_MESH_HEADER_ERROR,
+    S3_ERROR,
+)
+QUARANTINE_MODES = (DEAD_LETTER_QUARANTINE, SKIP_QUARANTINE)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class MetricsConfig:
+    prometheus_port: Optional[int] = None
+    prometheus_address: str = ""
+    statsd_host: Optional[str] = None
+    statsd_port: int = 8125
+    statsd_prefix: str = ""
+    statsd_interval_sec: float = 10
+
+
+class Counter:
+    def __init__(self, labels: Labels):
+        self.labels = labels
+        self._lock = Lock()
+        self._value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        yield "", self.labels, self._value
+
+
+class Gauge:
+    def __init__(self, labels: Labels):
+        self.labels = labels
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        yield "", self.labels, self._value
+
+
+class Histogram:
+    def __init__(self, labels: Labels, buckets: Tuple[float, ...]):
+        self.labels = labels
+        self._upper_bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = Lock()
+        self._bucket_counts = [0] * len(self._upper_bounds)
+        self._sum = 0
+        self._count = 0
+
+    def observe(self, value):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            bucket_counts = list(self._bucket_counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self._upper_bounds, bucket_counts):
+            cumulative += bucket_count
+            le = "+Inf" if upper_bound == math.inf else repr(float(upper_bound))
+            yield "_bucket", self.labels + (("le", le),), cumulative
+        yield "_sum", self.labels, total
+        yield "_count", self.labels, count
+
+
+@dataclass
+class MetricFamily:
+    name: str
+    help_text: str
+    metric_type: str
+    metrics: Dict[Labels, object]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._families: Dict[str, MetricFamily] = {}
+
+    def counter(self, name: str, help_text: str, labels: Optional[dict] = None) -> Counter:
+        return self._metric(name, help_text, COUNTER, labels, Counter)
+
+    def gauge(self, name: str, help_text: str, labels: Optional[dict] = None) -> Gauge:
+        return self._metric(name, help_text, GAUGE, labels, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Tuple[float, ...],
+        labels: Optional[dict] = None,
+    ) -> Histogram:
+        return self._metric(name, help_text, HISTOGRAM, labels, lambda key: Histogram(key, buckets))
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            return [
+                MetricFamily(f.name, f.help_text, f.metric_type, dict(f.metrics))
+                for f in self._families.values()
+            ]
+
+    def _metric(self, name, help_text, metric_type, labels, build):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            family = self._families.setdefault(name, MetricFamily(name, help_text, metric_type, {}))
+            if family.metric_type != metric_type:
+                raise ValueError(f"Metric {name} is already registered as a {family.metric_type}")
+            if key not in family.metrics:
+                family.metrics[key] = build(key)
+            return family.metrics[key]
+
+
+class ForwarderMetrics:
+    def __init__(self, registry: MetricsRegistry, labels: Optional[dict] = None):
+        self._registry = registry
+        self._labels = labels or {}
+        self._events = {
+            event_name: registry.counter(
+                "s3mesh_events_total", "Forwarder events observed", self._with(event=event_name)
+            )
+            for event_name in EVENTS
+        }
+        self._errors = {error: self._error_counter(error) for error in ERRORS}
+        self._quarantines = {mode: self._quarantine_counter(mode) for mode in QUARANTINE_MODES}
+        self._field_recorders = {
+            f"{stage}Sec": registry.histogram(
+                "s3mesh_stage_seconds",
+                "Time spent in each forwarding stage",
+                STAGE_SECONDS_BUCKETS,
+                self._with(stage=stage),
+            ).observe
+            for stage in STAGES
+        }
+        inbox_messages = self._gauge("inbox_messages", "Messages in the MESH inbox")
+        self._field_recorders.update(
+            {
+                "error": self._record_error,
+                "downloadedBytes": self._bytes_counter("downloaded").inc,
+                "uploadedBytes": self._record_uploaded_bytes,
+                "inboxMessageCount": inbox_messages,
+                "backlogRemaining": inbox_messages,
+                "batchMessageCount": self._gauge(
+                    "poll_batch_messages", "Messages listed by a poll"
+                ),
+                "spoolDepth": self._gauge("spool_depth", "Messages waiting in the spool queue"),
+                "spilledToDisk": self._record_spill,
+                "spilledBytes": self._bytes_counter("spilled").inc,
+                "meshNewConnections": self._counter(
+                    "mesh_new_connections_total", "Connections opened to MESH"
+                ).inc,
+                "meshPoolWaits": self._counter(
+                    "mesh_pool_waits_total", "Waits for a free MESH connection"
+                ).inc,
+                "meshPoolWaitSec": self._counter(
+                    "mesh_pool_wait_seconds_total", "Time spent waiting for a free MESH connection"
+                ).inc,
+                "quarantine": self._record_quarantine,
+                "poisonMessages": self._gauge(
+                    "poison_messages", "Poison messages quarantined since the forwarder started"
+                ),
+                "skippedMessages": self._gauge(
+                    "poll_skipped_messages", "Poison messages skipped by a poll"
+                ),
+            }
+        )
+        self._uploaded_bytes = self._bytes_counter("uploaded")
+        self._spilled_messages = registry.counter(
+            "s3mesh_spilled_messages_total", "Prefetched messages spilled to disk", self._labels
+        )
+        self._message_bytes = registry.histogram(
+            "s3mesh_message_bytes",
+            "Size of messages uploaded to S3",
+            MESSAGE_BYTES_BUCKETS,
+            self._labels,
+        )
+
+    def record_event(self, event_name: str, fields: dict):
+        events = self._events.get(event_name)
+        if events is not None:
+            events.inc()
+        for field_name, value in fields.items():
+            recorder = self._field_recorders.get(field_name)
+            if recorder is not None and value is not None:
+                recorder(value)
+
+    def _record_error(self, error: str):
+        errors = self._errors.get(error)
+        if errors is None:
+            errors = self._errors.setdefault(error, self._error_counter(error))
+        errors.inc()
+
+    def _record_quarantine(self, quarantine_mode: str):
+        quarantines = self._quarantines.get(quarantine_mode)
+        if quarantines is None:
+            quarantines = self._quarantines.setdefault(
+                quarantine_mode, self._quarantine_counter(quarantine_mode)
+            )
+        quarantines.inc()
+
+    def _record_spill(self, spilled_to_disk: bool):
+        if spilled_to_disk:
+            self._spilled_messages.inc()
+
+    def _record_uploaded_bytes(self, size_bytes: int):
+        self._uploaded_bytes.inc(size_bytes)
+        self._message_bytes.observe(size_bytes)
+
+    def _error_counter(self, error: str) -> Counter:
+        return self._registry.counter(
+            "s3mesh_errors_total", "Errors recorded on forwarder events", self._with(error=error)
+        )
+
+    def _quarantine_counter(self, quarantine_mode: str) -> Counter:
+        return self._registry.counter(
+            "s3mesh_quarantined_messages_total",
+            "Poison messages quarantined",
+            self._with(quarantine=quarantine_mode),
+        )
+
+    def _bytes_counter(self, direction: str) -> Counter:
+        return self._registry.counter(
+            f"s3mesh_{direction}_bytes_total", f"Message bytes {direction}", self._labels
+        )
+
+    def _counter(self, name: str, help_text: str) -> Counter:
+        return self._registry.counter(f"s3mesh_{name}", help_text, self._labels)
+
+    def _gauge(self, name: str, help_text: str):
+        return self._registry.gauge(f"s3mesh_{name}", help_text, self._labels).set
+
+    def _with(self, **labels) -> dict:
+        return {**self._labels, **labels}
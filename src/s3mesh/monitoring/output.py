@@ -1,10 +1,27 @@
 from logging import Logger
+from threading import Lock
+from typing import Optional
+
+from s3mesh.monitoring.metrics import ForwarderMetrics
 
 
 class LoggingOutput:
-    def __init__(self, log: Logger):
+    def __init__(self, log: Logger, common_fields: Optional[dict] = None):
         self._logger = log
+        self._common_fields = common_fields or {}
+        self._lock = Lock()
+
+    def log_event(self, event_name: str, fields: dict):
+        extra_fields = {**self._common_fields, **fields, "event": event_name}
+        with self._lock:
+            self._logger.info(f"Observed {event_name}", extra=extra_fields)
+
+
+class MetricsRecordingOutput:
+    def __init__(self, output, metrics: ForwarderMetrics):
+        self._output = output
+        self._metrics = metrics
 
     def log_event(self, event_name: str, fields: dict):
-        extra_fields = {**fields, "event": event_name}
-        self._logger.info(f"Observed {event_name}", extra=extra_fields)
+        self._metrics.record_event(event_name, fields)
+        self._output.log_event(event_name, fields)
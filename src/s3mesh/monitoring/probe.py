@@ -1,16 +1,25 @@
 from logging import Logger, getLogger
+from typing import Optional
 
 from s3mesh.monitoring.event.count import CountMessagesEvent
 from s3mesh.monitoring.event.forward import ForwardMessageEvent
 from s3mesh.monitoring.event.poll import PollInboxEvent
-from s3mesh.monitoring.output import LoggingOutput
+from s3mesh.monitoring.metrics import ForwarderMetrics
+from s3mesh.monitoring.output import LoggingOutput, MetricsRecordingOutput
 
 logger = getLogger(__name__)
 
 
 class LoggingProbe:
-    def __init__(self, log: Logger = logger):
-        self._output = LoggingOutput(log)
+    def __init__(
+        self,
+        log: Logger = logger,
+        common_fields: Optional[dict] = None,
+        metrics: Optional[ForwarderMetrics] = None,
+    ):
+        self._output = LoggingOutput(log, common_fields)
+        if metrics is not None:
+            self._output = MetricsRecordingOutput(self._output, metrics)
 
     def new_count_messages_event(self) -> CountMessagesEvent:
         return CountMessagesEvent(self._output)
@@ -0,0 +1,279 @@
+import os
+from dataclasses import dataclass, field
+from io import BytesIO
+from queue import Queue
+from threading import Event, Lock, Thread
+from typing import Callable, Optional, Union
+
+from s3mesh.budget import ByteBudget
+from s3mesh.connections import ConnectionCounter
+from s3mesh.forwarder import MeshToS3Forwarder, recording_forward_errors
+from s3mesh.lease import LeaseStore
+from s3mesh.mesh import MeshInbox
+from s3mesh.monitoring.event.base import ACKNOWLEDGE_STAGE, DOWNLOAD_STAGE, UPLOAD_STAGE
+from s3mesh.monitoring.event.forward import ForwardMessageEvent
+from s3mesh.monitoring.probe import LoggingProbe
+from s3mesh.s3 import S3Uploader
+from s3mesh.scheduler import PollDelay
+from s3mesh.spool import SpoolConfig, SpooledBody
+
+PREFETCH_READ_SIZE = 1024 * 1024
+
+_END_OF_BATCH = object()
+
+
+@dataclass
+class StageConfig:
+    worker_count: int = 1
+    queue_size: int = 1
+
+
+@dataclass
+class PipelineConfig:
+    download: StageConfig = field(default_factory=lambda: StageConfig(2, 8))
+    upload: StageConfig = field(default_factory=lambda: StageConfig(4, 8))
+    acknowledge: StageConfig = field(default_factory=lambda: StageConfig(1, 8))
+    memory_budget_bytes: int = 64 * 1024 * 1024
+    spool: Optional[SpoolConfig] = None
+
+
+class PrefetchedMessage:
+    def __init__(self, message, budget: ByteBudget):
+        self._message = message
+        self._budget = budget
+        self._held_bytes = 0
+        self._body = BytesIO()
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+    def prefetch(self):
+        while chunk := self._message.read(PREFETCH_READ_SIZE):
+            self._budget.acquire(len(chunk), holder=self if self._held_bytes else None)
+            self._held_bytes += len(chunk)
+            self._body.write(chunk)
+        self._body.seek(0)
+
+    def read(self, n=None):
+        return self._body.read(n)
+
+    def release(self):
+        self._body.close()
+        self._budget.release(self._held_bytes, holder=self)
+        self._held_bytes = 0
+
+    def close(self):
+        self.release()
+        self._message.close()
+
+
+class SpooledMessage:
+    def __init__(self, message, budget: ByteBudget, spool_config: SpoolConfig):
+        self._message = message
+        self._body = SpooledBody(budget, spool_config)
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+    @property
+    def spilled_bytes(self) -> int:
+        return self._body.spilled_bytes
+
+    def prefetch(self):
+        while chunk := self._message.read(PREFETCH_READ_SIZE):
+            self._body.write(chunk)
+        self._body.seal()
+
+    def read(self, n=None):
+        return self._body.read(n)
+
+    def release(self):
+        self._body.close()
+
+    def close(self):
+        self.release()
+        self._message.close()
+
+
+class _PipelineItem:
+    def __init__(
+        self,
+        inbox_entry,
+        forward_message_event: ForwardMessageEvent,
+        lease_store: Optional[LeaseStore] = None,
+    ):
+        self.inbox_entry = inbox_entry
+        self.event = forward_message_event
+        self.message: Union[PrefetchedMessage, SpooledMessage, None] = None
+        self._lease_store = lease_store
+        self._lease = None
+        self._finished = False
+
+    @property
+    def prefetched_message(self) -> Union[PrefetchedMessage, SpooledMessage]:
+        if self.message is None:
+            raise ValueError(f"Message {self.inbox_entry.id} has not been retrieved")
+        return self.message
+
+    def acquire_lease(self) -> bool:
+        if self._lease_store is None:
+            return True
+        self._lease = self._lease_store.try_acquire(self.inbox_entry.id)
+        return self._lease is not None
+
+    def finish(self, acknowledged: bool = False):
+        if self._finished:
+            return
+        self._finished = True
+        if self.message is not None:
+            self.message.close()
+        self.event.finish()
+        if self._lease is not None and not acknowledged:
+            self._lease_store.release(self._lease)
+
+
+class _Batch:
+    def __init__(self):
+        self._failed = Event()
+        self._lock = Lock()
+        self._first_failure: Optional[Exception] = None
+
+    @property
+    def failed(self) -> bool:
+        return self._failed.is_set()
+
+    def fail(self, exception: Exception):
+        with self._lock:
+            if self._first_failure is None:
+                self._first_failure = exception
+        self._failed.set()
+
+    def raise_first_failure(self):
+        if self._first_failure is not None:
+            raise self._first_failure
+
+
+class _Stage:
+    def __init__(
+        self,
+        handler: Callable[[_PipelineItem], Optional[_PipelineItem]],
+        config: StageConfig,
+        batch: _Batch,
+        downstream: Optional["_Stage"] = None,
+    ):
+        self._handler = handler
+        self._batch = batch
+        self._downstream = downstream
+        self._queue: Queue = Queue(maxsize=config.queue_size)
+        self._workers = [Thread(target=self._run) for _ in range(config.worker_count)]
+        for worker in self._workers:
+            worker.start()
+
+    def put(self, item: _PipelineItem):
+        self._queue.put(item)
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put(_END_OF_BATCH)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        while (item := self._queue.get()) is not _END_OF_BATCH:
+            self._handle(item)
+
+    def _handle(self, item: _PipelineItem):
+        try:
+            result = self._handler(item)
+        except Exception as e:
+            item.finish()
+            self._batch.fail(e)
+            return
+        if result is not None and self._downstream is not None:
+            self._downstream.put(result)
+
+
+class PipelinedMeshToS3Forwarder(MeshToS3Forwarder):
+    def __init__(
+        self,
+        inbox: MeshInbox,
+        uploader: S3Uploader,
+        probe: LoggingProbe,
+        pipeline_config: PipelineConfig,
+        lease_store: Optional[LeaseStore] = None,
+        connection_counter: Optional[ConnectionCounter] = None,
+    ):
+        super().__init__(
+            inbox,
+            uploader,
+            probe,
+            lease_store=lease_store,
+            connection_counter=connection_counter,
+        )
+        self._config = pipeline_config
+        self._memory_budget = ByteBudget(pipeline_config.memory_budget_bytes)
+        if pipeline_config.spool is not None:
+            os.makedirs(pipeline_config.spool.directory, exist_ok=True)
+
+    def forward_messages(self, preceding_poll_delay: Optional[PollDelay] = None) -> int:
+        inbox_entries = self._poll_messages(preceding_poll_delay)
+        batch = _Batch()
+        acknowledge_stage = _Stage(self._acknowledge, self._config.acknowledge, batch)
+        upload_stage = _Stage(self._upload, self._config.upload, batch, acknowledge_stage)
+        download_stage = _Stage(self._download, self._config.download, batch, upload_stage)
+        for inbox_entry in inbox_entries:
+            if batch.failed:
+                break
+            download_stage.put(
+                _PipelineItem(
+                    inbox_entry, self._probe.new_forward_message_event(), self._lease_store
+                )
+            )
+        for stage in (download_stage, upload_stage, acknowledge_stage):
+            stage.close()
+        batch.raise_first_failure()
+        return len(inbox_entries)
+
+    def _download(self, item: _PipelineItem) -> Optional[_PipelineItem]:
+        if not item.acquire_lease():
+            item.event.record_leased_elsewhere(item.inbox_entry.id)
+            item.finish()
+            return None
+        return self._run_stage(self._retrieve_and_prefetch, item, DOWNLOAD_STAGE)
+
+    def _upload(self, item: _PipelineItem) -> Optional[_PipelineItem]:
+        return self._run_stage(self._upload_prefetched, item, UPLOAD_STAGE)
+
+    def _acknowledge(self, item: _PipelineItem) -> None:
+        if self._run_stage(self._acknowledge_message, item, ACKNOWLEDGE_STAGE) is not None:
+            item.finish(acknowledged=True)
+
+    def _retrieve_and_prefetch(self, item: _PipelineItem):
+        message = item.inbox_entry.retrieve()
+        prefetched: Union[PrefetchedMessage, SpooledMessage]
+        if self._config.spool is None:
+            prefetched = PrefetchedMessage(message, self._memory_budget)
+        else:
+            prefetched = SpooledMessage(message, self._memory_budget, self._config.spool)
+        item.message = prefetched
+        item.event.record_message_metadata(message)
+        message.validate()
+        prefetched.prefetch()
+        if isinstance(prefetched, SpooledMessage) and prefetched.spilled_bytes > 0:
+            item.event.record_spill(prefetched.spilled_bytes)
+        item.event.record_download(message.bytes_read, message.read_sec)
+
+    def _acknowledge_message(self, item: _PipelineItem):
+        item.prefetched_message.acknowledge()
+
+    def _upload_prefetched(self, item: _PipelineItem):
+        self._uploader.upload(item.prefetched_message, item.event)
+        item.prefetched_message.release()
+
+    def _run_stage(self, stage_work, item: _PipelineItem, stage: str) -> Optional[_PipelineItem]:
+        with recording_forward_errors(item.event):
+            with item.event.timing(stage):
+                stage_work(item)
+            return item
+        item.finish()
+        return None
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Protocol
+
+from s3mesh.mesh import InvalidMeshHeader, MissingMeshHeader
+from s3mesh.s3 import S3Uploader
+
+DEAD_LETTER_QUARANTINE = "dead-letter"
+SKIP_QUARANTINE = "skip"
+
+
+@dataclass
+class QuarantineConfig:
+    mode: str
+    dead_letter_prefix: str = "dead-letter/"
+    skip_cache_size: int = 10000
+
+
+class Quarantine(Protocol):
+    poison_count: int
+    needs_body: bool
+
+    def quarantine(self, message, forward_message_event):
+        ...
+
+    def should_skip(self, message_id: str) -> bool:
+        ...
+
+
+@contextmanager
+def quarantining_poison(quarantine: Optional[Quarantine], message, forward_message_event):
+    try:
+        yield
+    except (MissingMeshHeader, InvalidMeshHeader):
+        if quarantine is not None:
+            quarantine.quarantine(message, forward_message_event)
+        raise
+
+
+class DeadLetterQuarantine:
+    needs_body = True
+
+    def __init__(self, uploader: S3Uploader, dead_letter_prefix: str):
+        self._uploader = uploader
+        self._dead_letter_prefix = dead_letter_prefix
+        self._lock = Lock()
+        self.poison_count = 0
+
+    def quarantine(self, message, forward_message_event):
+        self._uploader.upload_dead_letter(message, self._dead_letter_prefix, forward_message_event)
+        message.acknowledge()
+        forward_message_event.record_quarantine(DEAD_LETTER_QUARANTINE)
+        with self._lock:
+            self.poison_count += 1
+
+    def should_skip(self, message_id: str) -> bool:
+        return False
+
+
+class SkipQuarantine:
+    needs_body = False
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._message_ids: OrderedDict[str, None] = OrderedDict()
+        self.poison_count = 0
+
+    def quarantine(self, message, forward_message_event):
+        forward_message_event.record_quarantine(SKIP_QUARANTINE)
+        with self._lock:
+            self._message_ids[message.id] = None
+            while len(self._message_ids) > self._max_entries:
+                self._message_ids.popitem(last=False)
+            self.poison_count += 1
+
+    def should_skip(self, message_id: str) -> bool:
+        with self._lock:
+            return message_id in self._message_ids
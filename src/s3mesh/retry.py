@@ -0,0 +1,82 @@
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from itertools import count
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from s3mesh.backoff import jittered_backoff_sec
+
+
+@dataclass(frozen=True)
+class MessageRetryConfig:
+    max_attempts: int = 3
+    backoff_sec: float = 1
+    max_backoff_sec: float = 10
+    systemic_failures: int = 3
+
+
+NO_MESSAGE_RETRY = MessageRetryConfig(max_attempts=1, systemic_failures=1)
+
+
+class MessageRetryQueue:
+    def __init__(
+        self,
+        config: MessageRetryConfig,
+        clock: Callable[[], float] = time.monotonic,
+        wait: Optional[Callable[[float], bool]] = None,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self._config = config
+        self._clock = clock
+        self._wait = wait or Event().wait
+        self._jitter = jitter
+        self._lock = Lock()
+        self._attempts: Dict[str, int] = {}
+        self._pending: List[Tuple[float, int, Any]] = []
+        self._sequence = count()
+        self._failed_since_success: Set[str] = set()
+        self._systemic = False
+
+    def attempt(self, inbox_entry) -> int:
+        with self._lock:
+            return self._attempts.get(inbox_entry.id, 0) + 1
+
+    def record_success(self):
+        with self._lock:
+            self._failed_since_success.clear()
+
+    def retry_later(self, inbox_entry) -> bool:
+        with self._lock:
+            attempts = self._attempts.get(inbox_entry.id, 0) + 1
+            self._attempts[inbox_entry.id] = attempts
+            self._failed_since_success.add(inbox_entry.id)
+            if len(self._failed_since_success) >= self._config.systemic_failures:
+                self._systemic = True
+            if attempts >= self._config.max_attempts:
+                return False
+            due = self._clock() + jittered_backoff_sec(
+                attempts, self._config.backoff_sec, self._config.max_backoff_sec, self._jitter
+            )
+            heapq.heappush(self._pending, (due, next(self._sequence), inbox_entry))
+            return True
+
+    def failures_look_systemic(self) -> bool:
+        with self._lock:
+            return self._systemic
+
+    def wait_for_due(self) -> List:
+        with self._lock:
+            if not self._pending:
+                return []
+            earliest_due = self._pending[0][0]
+        wait_sec = earliest_due - self._clock()
+        if wait_sec > 0 and self._wait(wait_sec):
+            return []
+        with self._lock:
+            now = max(self._clock(), earliest_due)
+            due = []
+            while self._pending and self._pending[0][0] <= now:
+                due.append(heapq.heappop(self._pending)[2])
+            return due
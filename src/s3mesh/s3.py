@@ -1,14 +1,169 @@
-from s3mesh.mesh import MeshMessage
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Tuple
+
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+
+from s3mesh.compression import CompressingStream, compression_codec
+from s3mesh.digest import DigestingStream, digest_algorithm
+from s3mesh.mesh import MeshMessage, MeshMessageMetadata
 from s3mesh.monitoring.event.forward import ForwardMessageEvent
 
+MiB = 1024 * 1024
+
+SINGLE_PUT_UPLOAD = "SINGLE_PUT"
+MULTIPART_UPLOAD = "MULTIPART"
+
+
+@dataclass
+class UploadConfig:
+    multipart_threshold_bytes: int = 8 * MiB
+    part_size_bytes: int = 8 * MiB
+    max_concurrency: int = 10
+    compression: Optional[str] = None
+    digest_algorithm: Optional[str] = None
+
+
+def build_s3_key(message: MeshMessageMetadata) -> str:
+    s3_file_name = message.file_name.replace(" ", "_")
+    return f"{message.date_delivered.strftime('%Y/%m/%d')}/{s3_file_name}"
+
+
+def _read_up_to(stream, n: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < n and (data := stream.read(n - len(buffer))):
+        buffer += data
+    return bytes(buffer)
+
+
+class _PeekedStream:
+    def __init__(self, head: bytes, stream):
+        self._head = BytesIO(head)
+        self._stream = stream
+        self.bytes_read = 0
+
+    def read(self, n=None) -> bytes:
+        if n is None or n < 0:
+            data = self._head.read() + self._stream.read()
+        else:
+            data = self._head.read(n)
+            data += _read_up_to(self._stream, n - len(data))
+        self.bytes_read += len(data)
+        return data
+
+
+def _put_object_checksum_args(digesting: Optional[DigestingStream]) -> dict:
+    if digesting is None:
+        return {}
+    return {
+        digesting.algorithm.put_object_checksum_arg: digesting.base64_digest,
+        "Metadata": {digesting.algorithm.name: digesting.hex_digest},
+    }
+
+
+def _multipart_checksum_args(digesting: Optional[DigestingStream]) -> dict:
+    if digesting is None or digesting.algorithm.multipart_checksum_algorithm is None:
+        return {}
+    return {"ChecksumAlgorithm": digesting.algorithm.multipart_checksum_algorithm}
+
 
 class S3Uploader:
-    def __init__(self, s3_client, bucket_name: str):
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key_prefix: str = "",
+        upload_config: Optional[UploadConfig] = None,
+        transfer_manager=None,
+    ):
         self._s3_client = s3_client
         self._bucket_name = bucket_name
+        self._key_prefix = key_prefix
+        self._upload_config = upload_config or UploadConfig()
+        self._codec = None
+        if self._upload_config.compression is not None:
+            self._codec = compression_codec(self._upload_config.compression)
+        self._digest_algorithm = None
+        if self._upload_config.digest_algorithm is not None:
+            self._digest_algorithm = digest_algorithm(self._upload_config.digest_algorithm)
+        transfer_config = TransferConfig(
+            multipart_threshold=self._upload_config.multipart_threshold_bytes,
+            multipart_chunksize=self._upload_config.part_size_bytes,
+            max_concurrency=self._upload_config.max_concurrency,
+        )
+        peeked_bytes = self._upload_config.multipart_threshold_bytes + 1
+        part_bytes = (
+            self._upload_config.part_size_bytes * transfer_config.max_in_memory_upload_chunks
+        )
+        self.max_buffered_bytes = peeked_bytes + part_bytes
+        self._transfer_manager = transfer_manager or create_transfer_manager(
+            s3_client, transfer_config
+        )
+
+    def upload(self, message: MeshMessage, forward_message_event: ForwardMessageEvent) -> str:
+        if self._codec is None:
+            return self._upload(message, build_s3_key(message), {}, forward_message_event)
+        compressed = CompressingStream(message, self._codec)
+        key = self._upload(
+            compressed,
+            f"{build_s3_key(message)}{self._codec.key_suffix}",
+            {"ContentEncoding": self._codec.content_encoding},
+            forward_message_event,
+        )
+        forward_message_event.record_compression(
+            self._upload_config.compression,
+            compressed.compression_ratio,
+            compressed.cpu_sec,
+        )
+        return key
 
-    def upload(self, message: MeshMessage, forward_message_event: ForwardMessageEvent):
-        s3_file_name = message.file_name.replace(" ", "_")
-        key = f"{message.date_delivered.strftime('%Y/%m/%d')}/{s3_file_name}"
-        self._s3_client.upload_fileobj(message, self._bucket_name, key)
+    def upload_dead_letter(
+        self, message, dead_letter_prefix: str, forward_message_event: ForwardMessageEvent
+    ) -> str:
+        return self._upload(message, f"{dead_letter_prefix}{message.id}", {}, forward_message_event)
+
+    def _upload(self, body, s3_key: str, extra_args: dict, forward_message_event) -> str:
+        if self._digest_algorithm is None:
+            return self._transfer(body, s3_key, extra_args, forward_message_event)
+        digesting = DigestingStream(body, self._digest_algorithm)
+        key = self._transfer(digesting, s3_key, extra_args, forward_message_event, digesting)
+        forward_message_event.record_digest(
+            digesting.algorithm.name, digesting.hex_digest, digesting.bytes_per_sec
+        )
+        return key
+
+    def _transfer(
+        self,
+        body,
+        s3_key: str,
+        extra_args: dict,
+        forward_message_event,
+        digesting: Optional[DigestingStream] = None,
+    ) -> str:
+        key = f"{self._key_prefix}{s3_key}"
+        started = time.monotonic()
+        head = _read_up_to(body, self._upload_config.multipart_threshold_bytes + 1)
+        if len(head) <= self._upload_config.multipart_threshold_bytes:
+            put_object_args = {**extra_args, **_put_object_checksum_args(digesting)}
+            strategy, size_bytes = self._put_object(head, key, put_object_args)
+        else:
+            multipart_args = {**extra_args, **_multipart_checksum_args(digesting)}
+            stream = _PeekedStream(head, body)
+            strategy, size_bytes = self._upload_multipart(stream, key, multipart_args)
         forward_message_event.record_s3_key(key)
+        forward_message_event.record_upload(strategy, size_bytes, time.monotonic() - started)
+        return key
+
+    def _put_object(self, body: bytes, key: str, extra_args: dict) -> Tuple[str, int]:
+        self._s3_client.put_object(Bucket=self._bucket_name, Key=key, Body=body, **extra_args)
+        return SINGLE_PUT_UPLOAD, len(body)
+
+    def _upload_multipart(
+        self, stream: _PeekedStream, key: str, extra_args: dict
+    ) -> Tuple[str, int]:
+        self._transfer_manager.upload(stream, self._bucket_name, key, extra_args).result()
+        return MULTIPART_UPLOAD, stream.bytes_read
+
+    def close(self):
+        self._transfer_manager.shutdown()
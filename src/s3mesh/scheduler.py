@@ -0,0 +1,74 @@
+import random
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+from s3mesh.backoff import jittered_backoff_sec
+
+BACKLOG_POLL_DELAY = "BACKLOG"
+IDLE_POLL_DELAY = "IDLE"
+BURST_POLL_DELAY = "BURST"
+BACKOFF_POLL_DELAY = "BACKOFF"
+
+
+@dataclass(frozen=True)
+class PollDelay:
+    seconds: float
+    reason: str
+
+
+class PollScheduler(Protocol):
+    def after_success(self, batch_count: int, backlog: bool) -> PollDelay:
+        ...
+
+    def after_failure(self) -> PollDelay:
+        ...
+
+
+class FixedPollScheduler:
+    def __init__(self, poll_frequency_sec: float):
+        self._poll_frequency_sec = poll_frequency_sec
+
+    def after_success(self, batch_count: int, backlog: bool) -> PollDelay:
+        if backlog:
+            return PollDelay(0, BACKLOG_POLL_DELAY)
+        return PollDelay(self._poll_frequency_sec, IDLE_POLL_DELAY)
+
+    def after_failure(self) -> PollDelay:
+        return PollDelay(self._poll_frequency_sec, BACKOFF_POLL_DELAY)
+
+
+class AdaptivePollScheduler:
+    def __init__(
+        self,
+        poll_frequency_sec: float,
+        burst_poll_frequency_sec: float,
+        max_backoff_sec: float,
+        burst_window_polls: int,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self._poll_frequency_sec = poll_frequency_sec
+        self._burst_poll_frequency_sec = burst_poll_frequency_sec
+        self._max_backoff_sec = max_backoff_sec
+        self._burst_window_polls = burst_window_polls
+        self._jitter = jitter
+        self._consecutive_failures = 0
+        self._polls_since_traffic = burst_window_polls
+
+    def after_success(self, batch_count: int, backlog: bool) -> PollDelay:
+        self._consecutive_failures = 0
+        self._polls_since_traffic = 0 if batch_count > 0 else self._polls_since_traffic + 1
+        if backlog:
+            return PollDelay(0, BACKLOG_POLL_DELAY)
+        if self._polls_since_traffic < self._burst_window_polls:
+            return PollDelay(self._burst_poll_frequency_sec, BURST_POLL_DELAY)
+        return PollDelay(self._poll_frequency_sec, IDLE_POLL_DELAY)
+
+    def after_failure(self) -> PollDelay:
+        self._consecutive_failures += 1
+        backoff_sec = jittered_backoff_sec(
+            self._consecutive_failures,
+            self._poll_frequency_sec,
+            self._max_backoff_sec,
+            self._jitter,
+        )
+        return PollDelay(backoff_sec, BACKOFF_POLL_DELAY)
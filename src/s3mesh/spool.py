@@ -0,0 +1,74 @@
+import mmap
+import tempfile
+from dataclasses import dataclass
+from io import BytesIO
+from typing import IO, Optional, Union
+
+from s3mesh.budget import ByteBudget
+
+
+@dataclass
+class SpoolConfig:
+    directory: str
+    max_message_memory_bytes: int = 8 * 1024 * 1024
+
+
+class SpooledBody:
+    def __init__(self, budget: ByteBudget, config: SpoolConfig):
+        self._budget = budget
+        self._config = config
+        self._memory = BytesIO()
+        self._held_bytes = 0
+        self._file: Optional[IO[bytes]] = None
+        self._mapped: Optional[mmap.mmap] = None
+        self._reader: Union[BytesIO, mmap.mmap, None] = None
+        self.spilled_bytes = 0
+
+    def write(self, data: bytes):
+        if self._file is None and not self._fits_in_memory(len(data)):
+            self._spill()
+        if self._file is None:
+            self._memory.write(data)
+        else:
+            self._file.write(data)
+            self.spilled_bytes += len(data)
+
+    def seal(self):
+        if self._file is None:
+            self._memory.seek(0)
+            self._reader = self._memory
+            return
+        self._file.flush()
+        self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._reader = self._mapped
+
+    def read(self, n=None) -> bytes:
+        if self._reader is None:
+            raise ValueError("The spooled body has not been sealed")
+        return self._reader.read(n)
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+        if self._file is not None:
+            self._file.close()
+        self._memory.close()
+        self._budget.release(self._held_bytes)
+        self._held_bytes = 0
+
+    def _fits_in_memory(self, n: int) -> bool:
+        if self._held_bytes + n > self._config.max_message_memory_bytes:
+            return False
+        if not self._budget.try_acquire(n):
+            return False
+        self._held_bytes += n
+        return True
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(dir=self._config.directory)
+        self._file.write(self._memory.getbuffer())
+        self.spilled_bytes = self._memory.tell()
+        self._memory.close()
+        self._memory = BytesIO()
+        self._budget.release(self._held_bytes)
+        self._held_bytes = 0
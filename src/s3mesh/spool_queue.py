@@ -0,0 +1,318 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from io import BytesIO
+from os.path import join
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Set
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from s3mesh.connections import ConnectionCounter
+from s3mesh.forwarder import MeshToS3Forwarder, record_streamed_download
+from s3mesh.lease import LeaseStore
+from s3mesh.mesh import MeshClientNetworkError, MeshInbox
+from s3mesh.monitoring.event.base import ACKNOWLEDGE_STAGE, SPOOL_STAGE, UPLOAD_STAGE
+from s3mesh.monitoring.event.forward import ForwardMessageEvent
+from s3mesh.monitoring.probe import LoggingProbe
+from s3mesh.quarantine import Quarantine, quarantining_poison
+from s3mesh.retry import MessageRetryConfig, MessageRetryQueue
+from s3mesh.s3 import S3Uploader
+from s3mesh.scheduler import PollDelay
+
+logger = logging.getLogger(__name__)
+
+ACKNOWLEDGE_ON_SPOOL = "spool"
+ACKNOWLEDGE_ON_S3 = "s3"
+
+SPOOL_WRITE_SIZE = 1024 * 1024
+BODY_SUFFIX = ".body"
+METADATA_SUFFIX = ".json"
+PARTIAL_SUFFIX = ".partial"
+
+
+@dataclass
+class SpoolQueueConfig:
+    directory: str
+    acknowledge_on: str = ACKNOWLEDGE_ON_SPOOL
+    drain_interval_sec: float = 1
+    max_bytes: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class SpoolEntry:
+    sequence: int
+    message_id: str
+    file_name: str
+    date_delivered: str
+    sender: str
+    recipient: str
+    chunk_count: int
+    size_bytes: int
+    content_compressed: bool = False
+    uploaded: bool = False
+
+
+class QueuedMessage:
+    def __init__(self, entry: SpoolEntry, body):
+        self.id = entry.message_id
+        self.file_name = entry.file_name
+        self.date_delivered = datetime.fromisoformat(entry.date_delivered)
+        self.sender = entry.sender
+        self.recipient = entry.recipient
+        self.chunk_count = entry.chunk_count
+        self.content_compressed = entry.content_compressed
+        self.bytes_read = 0
+        self._body = body
+
+    def read(self, n=None):
+        data = self._body.read(n)
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self._body.close()
+
+
+def _write_durably(path: str, stream) -> int:
+    partial_path = f"{path}{PARTIAL_SUFFIX}"
+    size_bytes = 0
+    with open(partial_path, "wb") as f:
+        while data := stream.read(SPOOL_WRITE_SIZE):
+            f.write(data)
+            size_bytes += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial_path, path)
+    return size_bytes
+
+
+def _fsync_directory(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SpoolQueue:
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._recover_entries()
+        self._size_bytes = sum(e.size_bytes for e in self._entries.values())
+        self._next_sequence = max((e.sequence for e in self._entries.values()), default=-1) + 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            return message_id in self._entries
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return self._max_bytes is not None and self._size_bytes >= self._max_bytes
+
+    def put(self, message) -> SpoolEntry:
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        size_bytes = _write_durably(self._path(sequence, message.id, BODY_SUFFIX), message)
+        entry = SpoolEntry(
+            sequence=sequence,
+            message_id=message.id,
+            file_name=message.file_name,
+            date_delivered=message.date_delivered.isoformat(),
+            sender=message.sender,
+            recipient=message.recipient,
+            chunk_count=message.chunk_count,
+            size_bytes=size_bytes,
+            content_compressed=message.content_compressed,
+        )
+        self._write_metadata(entry)
+        with self._lock:
+            self._size_bytes += size_bytes
+        return entry
+
+    def mark_uploaded(self, entry: SpoolEntry) -> SpoolEntry:
+        uploaded_entry = replace(entry, uploaded=True)
+        self._write_metadata(uploaded_entry)
+        return uploaded_entry
+
+    def entries(self) -> List[SpoolEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def open(self, entry: SpoolEntry) -> QueuedMessage:
+        body_path = self._path(entry.sequence, entry.message_id, BODY_SUFFIX)
+        return QueuedMessage(entry, open(body_path, "rb"))
+
+    def remove(self, entry: SpoolEntry):
+        os.remove(self._path(entry.sequence, entry.message_id, METADATA_SUFFIX))
+        os.remove(self._path(entry.sequence, entry.message_id, BODY_SUFFIX))
+        _fsync_directory(self._directory)
+        with self._lock:
+            if self._entries.pop(entry.message_id, None) is not None:
+                self._size_bytes -= entry.size_bytes
+
+    def _write_metadata(self, entry: SpoolEntry):
+        metadata = BytesIO(json.dumps(asdict(entry)).encode("utf-8"))
+        _write_durably(self._path(entry.sequence, entry.message_id, METADATA_SUFFIX), metadata)
+        _fsync_directory(self._directory)
+        with self._lock:
+            self._entries[entry.message_id] = entry
+
+    def _recover_entries(self) -> Dict[str, SpoolEntry]:
+        file_names = set(os.listdir(self._directory))
+        entries = []
+        for file_name in file_names:
+            if file_name.endswith(METADATA_SUFFIX):
+                with open(join(self._directory, file_name)) as f:
+                    entries.append(SpoolEntry(**json.load(f)))
+        self._discard_incomplete_writes(file_names, entries)
+        return {entry.message_id: entry for entry in sorted(entries, key=lambda e: e.sequence)}
+
+    def _discard_incomplete_writes(self, file_names, entries):
+        complete = {self._name(e.sequence, e.message_id, BODY_SUFFIX) for e in entries}
+        complete |= {self._name(e.sequence, e.message_id, METADATA_SUFFIX) for e in entries}
+        for file_name in file_names - complete:
+            os.remove(join(self._directory, file_name))
+
+    def _path(self, sequence: int, message_id: str, suffix: str) -> str:
+        return join(self._directory, self._name(sequence, message_id, suffix))
+
+    @staticmethod
+    def _name(sequence: int, message_id: str, suffix: str) -> str:
+        return f"{sequence:020d}-{message_id}{suffix}"
+
+
+class SpoolingMeshToS3Forwarder(MeshToS3Forwarder):
+    def __init__(
+        self,
+        inbox: MeshInbox,
+        uploader: S3Uploader,
+        probe: LoggingProbe,
+        spool_queue: SpoolQueue,
+        acknowledge_on: str = ACKNOWLEDGE_ON_SPOOL,
+        drain_interval_sec: float = 1,
+        worker_count: int = 1,
+        lease_store: Optional[LeaseStore] = None,
+        connection_counter: Optional[ConnectionCounter] = None,
+        retry_config: Optional[MessageRetryConfig] = None,
+        quarantine: Optional[Quarantine] = None,
+        validate_headers_first: bool = False,
+    ):
+        super().__init__(
+            inbox,
+            uploader,
+            probe,
+            worker_count=worker_count,
+            lease_store=lease_store,
+            connection_counter=connection_counter,
+            retry_config=retry_config,
+            quarantine=quarantine,
+            validate_headers_first=validate_headers_first,
+        )
+        self._spool_queue = spool_queue
+        self._acknowledge_on = acknowledge_on
+        self._drain_interval_sec = drain_interval_sec
+        self._drainer = Thread(target=self._drain, name="spool-drainer", daemon=True)
+        self._acknowledged_lock = Lock()
+        self._acknowledged_since_listing: Set[str] = set()
+
+    def start(self):
+        self._drainer.start()
+
+    def close(self):
+        self.stop()
+        if self._drainer.is_alive():
+            self._drainer.join()
+        super().close()
+
+    def drain(self) -> int:
+        return sum(self._drain_entry(entry) for entry in self._spool_queue.entries())
+
+    def forward_messages(self, preceding_poll_delay: Optional[PollDelay] = None) -> int:
+        if self._spool_queue.is_full():
+            return 0
+        return super().forward_messages(preceding_poll_delay)
+
+    def _list_messages(self, poll_inbox_event):
+        with self._acknowledged_lock:
+            self._acknowledged_since_listing.clear()
+        return super()._list_messages(poll_inbox_event)
+
+    def _process_message(self, inbox_entry, retry_queue: MessageRetryQueue):
+        if self._is_spooled(inbox_entry.id) or self._spool_queue.is_full():
+            return
+        super()._process_message(inbox_entry, retry_queue)
+
+    def _is_spooled(self, message_id: str) -> bool:
+        if message_id in self._spool_queue:
+            return True
+        with self._acknowledged_lock:
+            return message_id in self._acknowledged_since_listing
+
+    def _forward_message(self, message, forward_message_event: ForwardMessageEvent):
+        try:
+            with quarantining_poison(self._quarantine, message, forward_message_event):
+                forward_message_event.record_message_metadata(message)
+                message.validate()
+            with forward_message_event.timing(SPOOL_STAGE):
+                self._spool_queue.put(message)
+            record_streamed_download(forward_message_event, message, SPOOL_STAGE)
+            forward_message_event.record_spool_depth(len(self._spool_queue))
+            if self._acknowledge_on == ACKNOWLEDGE_ON_SPOOL:
+                with forward_message_event.timing(ACKNOWLEDGE_STAGE):
+                    message.acknowledge()
+        finally:
+            message.close()
+
+    def _drain(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Failed to drain the spool queue")
+            self._stopping.wait(self._drain_interval_sec)
+
+    def _drain_entry(self, entry: SpoolEntry) -> bool:
+        forward_message_event = self._probe.new_forward_message_event()
+        try:
+            self._upload_spooled(entry, forward_message_event)
+            return True
+        except MeshClientNetworkError as e:
+            forward_message_event.record_mesh_client_network_error(e)
+        except (BotoCoreError, ClientError) as e:
+            forward_message_event.record_s3_error(e)
+        finally:
+            forward_message_event.finish()
+        return False
+
+    def _upload_spooled(self, entry: SpoolEntry, forward_message_event: ForwardMessageEvent):
+        message = self._spool_queue.open(entry)
+        try:
+            forward_message_event.record_message_metadata(message)
+            if not entry.uploaded:
+                with forward_message_event.timing(UPLOAD_STAGE):
+                    self._uploader.upload(message, forward_message_event)
+        finally:
+            message.close()
+        if self._acknowledge_on == ACKNOWLEDGE_ON_S3:
+            self._acknowledge_uploaded(entry, forward_message_event)
+        self._spool_queue.remove(entry)
+        forward_message_event.record_spool_depth(len(self._spool_queue))
+
+    def _acknowledge_uploaded(self, entry: SpoolEntry, forward_message_event: ForwardMessageEvent):
+        if not entry.uploaded:
+            entry = self._spool_queue.mark_uploaded(entry)
+        with forward_message_event.timing(ACKNOWLEDGE_STAGE):
+            self._inbox.entry(entry.message_id).acknowledge()
+        with self._acknowledged_lock:
+            self._acknowledged_since_listing.add(entry.message_id)
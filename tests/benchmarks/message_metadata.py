@@ -0,0 +1,95 @@
+import logging
+import timeit
+from datetime import datetime
+
+from s3mesh.mesh import MeshMessage, MeshMessageMetadata
+from s3mesh.monitoring.event.forward import ForwardMessageEvent
+from s3mesh.s3 import build_s3_key
+from tests.builders.mesh import build_mex_headers
+
+MESSAGE_COUNT = 10000
+REPEATS = 5
+
+logger = logging.getLogger(__name__)
+
+
+class _ClientMessage:
+    def __init__(self, message_id: str, mex_headers: dict):
+        self._message_id = message_id
+        self._mex_headers = mex_headers
+
+    def id(self):
+        return self._message_id
+
+    def mex_header(self, key):
+        return self._mex_headers[key]
+
+
+class _UncachedMessage(MeshMessageMetadata):
+    def __init__(self, client_message: _ClientMessage):
+        self.id = client_message.id()
+        self._client_message = client_message
+
+    def _mex_header(self, header_name: str) -> str:
+        return self._client_message.mex_header(header_name)
+
+    @property
+    def file_name(self) -> str:
+        return self._read_header("filename")
+
+    @property
+    def date_delivered(self) -> datetime:
+        return datetime.strptime(self._read_header("statustimestamp"), "%Y%m%d%H%M%S")
+
+    @property
+    def sender(self) -> str:
+        return self._read_header("from")
+
+    @property
+    def recipient(self) -> str:
+        return self._read_header("to")
+
+
+class _DiscardingOutput:
+    def log_event(self, event_name, fields):
+        pass
+
+
+def _client_messages():
+    return [
+        _ClientMessage(f"message-{i}", build_mex_headers(status_timestamp="20240102030405"))
+        for i in range(MESSAGE_COUNT)
+    ]
+
+
+def _forward_metadata(messages):
+    for message in messages:
+        forward_message_event = ForwardMessageEvent(_DiscardingOutput())
+        forward_message_event.record_message_metadata(message)
+        message.validate()
+        build_s3_key(message)
+        forward_message_event.finish()
+
+
+def _best_usec_per_message(message_type) -> float:
+    client_messages = _client_messages()
+    timings = timeit.repeat(
+        lambda: _forward_metadata([message_type(m) for m in client_messages]),
+        number=1,
+        repeat=REPEATS,
+    )
+    return min(timings) / MESSAGE_COUNT * 1_000_000
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    uncached = _best_usec_per_message(_UncachedMessage)
+    cached = _best_usec_per_message(MeshMessage)
+    logger.info(f"{MESSAGE_COUNT} messages, best of {REPEATS}")
+    logger.info(f"re-reading headers: {uncached:.2f}us per message")
+    logger.info(f"parsed once:        {cached:.2f}us per message")
+    logger.info(f"saving:             {uncached - cached:.2f}us per message")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,96 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+from s3mesh.aio.forwarder import AsyncMeshToS3Forwarder
 from s3mesh.forwarder import MeshToS3Forwarder
+from s3mesh.pipeline import PipelineConfig, PipelinedMeshToS3Forwarder
+from s3mesh.spool_queue import ACKNOWLEDGE_ON_SPOOL, SpoolingMeshToS3Forwarder
+from tests.builders.mesh import mock_inbox_entry, mock_mesh_message
 
 
-def build_forwarder(**kwargs):
+def _mock_mesh_inbox(**kwargs):
     mock_mesh_inbox = kwargs.get("mesh_inbox", MagicMock())
-    mock_s3_uploader = kwargs.get("s3_uploader", MagicMock())
-    mock_probe = kwargs.get("probe", MagicMock())
-    mock_mesh_inbox.read_messages.return_value = kwargs.get("incoming_messages", [])
-    mock_mesh_inbox.read_messages.side_effect = kwargs.get("read_error", None)
+    mock_mesh_inbox.list_messages.return_value = kwargs.get(
+        "inbox_entries",
+        [mock_inbox_entry(message) for message in kwargs.get("incoming_messages", [])],
+    )
+    mock_mesh_inbox.list_messages.side_effect = kwargs.get("read_error", None)
     mock_mesh_inbox.count_messages.side_effect = kwargs.get("count_error", None)
     mock_mesh_inbox.count_messages.return_value = kwargs.get("inbox_message_count", 0)
+    return mock_mesh_inbox
+
+
+def build_forwarder(**kwargs):
+    return MeshToS3Forwarder(
+        _mock_mesh_inbox(**kwargs),
+        kwargs.get("s3_uploader", MagicMock()),
+        kwargs.get("probe", MagicMock()),
+        worker_count=kwargs.get("worker_count", 1),
+        in_flight_budget=kwargs.get("in_flight_budget", None),
+        concurrency_share=kwargs.get("concurrency_share", None),
+        lease_store=kwargs.get("lease_store", None),
+        forwarded_index=kwargs.get("forwarded_index", None),
+        journal=kwargs.get("journal", None),
+        connection_counter=kwargs.get("connection_counter", None),
+        retry_config=kwargs.get("retry_config", None),
+        quarantine=kwargs.get("quarantine", None),
+        validate_headers_first=kwargs.get("validate_headers_first", False),
+    )
+
+
+def build_pipelined_forwarder(**kwargs):
+    return PipelinedMeshToS3Forwarder(
+        _mock_mesh_inbox(**kwargs),
+        kwargs.get("s3_uploader", MagicMock()),
+        kwargs.get("probe", MagicMock()),
+        kwargs.get("pipeline_config", PipelineConfig()),
+        lease_store=kwargs.get("lease_store", None),
+    )
+
+
+def build_spooling_forwarder(spool_queue, **kwargs):
+    return SpoolingMeshToS3Forwarder(
+        _mock_mesh_inbox(**kwargs),
+        kwargs.get("s3_uploader", MagicMock()),
+        kwargs.get("probe", MagicMock()),
+        spool_queue,
+        acknowledge_on=kwargs.get("acknowledge_on", ACKNOWLEDGE_ON_SPOOL),
+        drain_interval_sec=kwargs.get("drain_interval_sec", 0.01),
+    )
+
+
+def _mock_async_inbox_entry(message):
+    inbox_entry = MagicMock()
+    inbox_entry.id = message.id
+    inbox_entry.retrieve = AsyncMock(return_value=message)
+    return inbox_entry
+
+
+def mock_async_mesh_message(message=None):
+    message = mock_mesh_message() if message is None else message
+    message.acknowledge = AsyncMock(side_effect=message.acknowledge.side_effect)
+    return message
+
+
+def build_async_forwarder(**kwargs):
+    mock_mesh_inbox = MagicMock()
+    mock_mesh_inbox.list_messages = AsyncMock(
+        return_value=kwargs.get(
+            "inbox_entries",
+            [_mock_async_inbox_entry(m) for m in kwargs.get("incoming_messages", [])],
+        ),
+        side_effect=kwargs.get("read_error", None),
+    )
+    mock_mesh_inbox.count_messages = AsyncMock(
+        return_value=kwargs.get("inbox_message_count", 0),
+        side_effect=kwargs.get("count_error", None),
+    )
+    mock_s3_uploader = kwargs.get("s3_uploader", MagicMock())
+    mock_s3_uploader.upload = AsyncMock(side_effect=mock_s3_uploader.upload.side_effect)
 
-    return MeshToS3Forwarder(mock_mesh_inbox, mock_s3_uploader, mock_probe)
+    return AsyncMeshToS3Forwarder(
+        mock_mesh_inbox,
+        mock_s3_uploader,
+        kwargs.get("probe", MagicMock()),
+        max_concurrency=kwargs.get("max_concurrency", 10),
+        sessions=kwargs.get("sessions", None),
+    )
@@ -1,3 +1,4 @@
+from io import BytesIO
 from unittest.mock import MagicMock
 
 from requests import ConnectionError, HTTPError, Request, Response
@@ -6,6 +7,7 @@ from s3mesh.mesh import (
     MESH_MESSAGE_TYPE_DATA,
     MESH_STATUS_EVENT_TRANSFER,
     MESH_STATUS_SUCCESS,
+    InvalidMeshHeader,
     MeshClientNetworkError,
     MeshInbox,
 )
@@ -66,16 +68,40 @@ def mock_mesh_message(**kwargs):
     message.validate.side_effect = kwargs.get("validation_error", None)
     message.acknowledge.side_effect = kwargs.get("acknowledge_error", None)
     message.date_delivered = kwargs.get("date_delivered", a_datetime())
+    message.chunk_count = kwargs.get("chunk_count", 1)
+    message.content_compressed = kwargs.get("content_compressed", False)
+    message.read.side_effect = BytesIO(kwargs.get("body", bytes(a_string(), "utf-8"))).read
     return message
 
 
-def mock_mesh_inbox(client_messages=None, iterate_messages_error=None, count_messages_error=None):
+def mock_inbox_entry(message=None, retrieve_error=None):
+    message = mock_mesh_message() if message is None else message
+    inbox_entry = MagicMock()
+    inbox_entry.id = message.id
+    inbox_entry.retrieve.return_value = message
+    inbox_entry.retrieve.side_effect = retrieve_error
+    return inbox_entry
+
+
+def mock_mesh_client(client_messages=None, list_messages_error=None, count_messages_error=None):
     client_messages = [] if client_messages is None else client_messages
-    mock_mesh_client = MagicMock()
-    mock_mesh_client.iterate_all_messages.return_value = iter(client_messages)
-    mock_mesh_client.iterate_all_messages.side_effect = iterate_messages_error
-    mock_mesh_client.count_messages.side_effect = count_messages_error
-    return MeshInbox(mock_mesh_client)
+    messages_by_id = {message.id(): message for message in client_messages}
+    mock_client = MagicMock()
+    mock_client.list_messages.return_value = list(messages_by_id.keys())
+    mock_client.list_messages.side_effect = list_messages_error
+    mock_client.retrieve_message.side_effect = lambda message_id: messages_by_id[message_id]
+    mock_client.count_messages.side_effect = count_messages_error
+    return mock_client
+
+
+def mock_mesh_inbox(client_messages=None, list_messages_error=None, count_messages_error=None):
+    return MeshInbox(
+        mock_mesh_client(
+            client_messages=client_messages,
+            list_messages_error=list_messages_error,
+            count_messages_error=count_messages_error,
+        )
+    )
 
 
 def mesh_client_http_error():
@@ -94,3 +120,11 @@ def mesh_client_connection_error():
 
 def mesh_client_error(error_message="A message"):
     return MeshClientNetworkError(error_message)
+
+
+def an_invalid_header_exception(**kwargs):
+    return InvalidMeshHeader(
+        header_name=kwargs.get("header_name", a_string()),
+        header_value=kwargs.get("header_value", a_string()),
+        expected_header_value=kwargs.get("expected_header_value", a_string()),
+    )
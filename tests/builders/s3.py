@@ -0,0 +1,10 @@
+from unittest.mock import MagicMock
+
+
+def a_recording_uploader():
+    uploaded_bodies = {}
+    uploader = MagicMock()
+    uploader.upload.side_effect = lambda message, _: uploaded_bodies.update(
+        {message.id: message.read()}
+    )
+    return uploader, uploaded_bodies
@@ -0,0 +1,140 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call
+
+import pytest
+
+from s3mesh.aio.s3 import AsyncS3Error
+from s3mesh.forwarder import RetryableException
+from s3mesh.mesh import MissingMeshHeader
+from s3mesh.monitoring.event.base import LISTING_STAGE, POLL_STAGE
+from tests.builders.common import a_string
+from tests.builders.forwarder import build_async_forwarder, mock_async_mesh_message
+from tests.builders.mesh import mesh_client_error, mock_mesh_message
+
+
+def test_forwards_and_acknowledges_messages():
+    mock_messages = [mock_async_mesh_message() for _ in range(5)]
+    mock_uploader = MagicMock()
+    forwarder = build_async_forwarder(incoming_messages=mock_messages, s3_uploader=mock_uploader)
+
+    forwarder.forward_messages()
+
+    assert mock_uploader.upload.await_count == 5
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_awaited_once()
+        mock_message.close.assert_called_once()
+
+
+def test_records_poll_and_forward_events():
+    probe = MagicMock()
+    mock_message = mock_async_mesh_message()
+    forwarder = build_async_forwarder(incoming_messages=[mock_message], probe=probe)
+
+    forwarder.forward_messages()
+
+    poll_inbox_event = call.new_poll_inbox_event()
+    probe.assert_has_calls(
+        [
+            poll_inbox_event,
+            poll_inbox_event.timing(POLL_STAGE),
+            poll_inbox_event.timing().__enter__(),
+            poll_inbox_event.timing(LISTING_STAGE),
+            poll_inbox_event.timing().__enter__(),
+            poll_inbox_event.timing().__exit__(None, None, None),
+            poll_inbox_event.record_message_batch_count(1),
+            poll_inbox_event.record_backlog_remaining(0),
+            poll_inbox_event.timing().__exit__(None, None, None),
+            poll_inbox_event.finish(),
+        ]
+    )
+    probe.new_forward_message_event().record_message_metadata.assert_called_once_with(mock_message)
+    probe.new_forward_message_event().finish.assert_called_once()
+
+
+def test_records_missing_header_and_does_not_upload():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    header_error = MissingMeshHeader(header_name=a_string())
+    mock_message = mock_async_mesh_message(mock_mesh_message(validation_error=header_error))
+    mock_uploader = MagicMock()
+
+    forwarder = build_async_forwarder(
+        incoming_messages=[mock_message], s3_uploader=mock_uploader, probe=probe
+    )
+
+    forwarder.forward_messages()
+
+    forward_message_event.record_missing_mesh_header.assert_called_once_with(header_error)
+    mock_uploader.upload.assert_not_awaited()
+
+
+def test_raises_retryable_exception_when_acknowledge_raises_mesh_network_exception():
+    failing_message = mock_async_mesh_message(
+        mock_mesh_message(acknowledge_error=mesh_client_error())
+    )
+    forwarder = build_async_forwarder(incoming_messages=[failing_message])
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+
+def test_records_s3_error_and_raises_retryable_exception_when_upload_fails():
+    probe = MagicMock()
+    s3_error = AsyncS3Error("500 HTTP Error: Internal Server Error")
+    mock_message = mock_async_mesh_message()
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = s3_error
+    forwarder = build_async_forwarder(
+        incoming_messages=[mock_message], s3_uploader=mock_uploader, probe=probe
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    probe.new_forward_message_event().record_s3_error.assert_called_once_with(s3_error)
+    mock_message.acknowledge.assert_not_awaited()
+
+
+def test_raises_retryable_exception_when_listing_raises_mesh_network_exception():
+    forwarder = build_async_forwarder(read_error=mesh_client_error())
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+
+def test_limits_concurrent_transfers():
+    in_flight = {"current": 0, "max": 0}
+
+    async def track_upload(message, _):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = track_upload
+    forwarder = build_async_forwarder(
+        incoming_messages=[mock_async_mesh_message() for _ in range(10)],
+        s3_uploader=mock_uploader,
+        max_concurrency=3,
+    )
+
+    forwarder.forward_messages()
+
+    assert in_flight["max"] == 3
+
+
+def test_reports_whether_mailbox_is_empty():
+    assert build_async_forwarder(inbox_message_count=0).is_mailbox_empty() is True
+    assert build_async_forwarder(inbox_message_count=2).is_mailbox_empty() is False
+
+
+def test_closes_sessions_when_closed():
+    session = MagicMock()
+    session.close = AsyncMock()
+    forwarder = build_async_forwarder(sessions=[session])
+
+    forwarder.close()
+
+    session.close.assert_awaited_once()
@@ -0,0 +1,166 @@
+import asyncio
+import hmac
+from hashlib import sha256
+
+import pytest
+from aiohttp import web
+
+from s3mesh.aio.forwarder import LazyClientSession
+from s3mesh.aio.mesh import AsyncMeshClient, AsyncMeshInbox, MeshAuthTokenGenerator
+from s3mesh.mesh import MeshClientNetworkError, MissingMeshHeader
+from tests.builders.common import a_string
+
+MAILBOX = "test_inbox"
+
+
+class _FakeMesh:
+    def __init__(self, messages, acknowledged, list_status=200):
+        self._messages = messages
+        self._acknowledged = acknowledged
+        self._list_status = list_status
+
+    async def list_messages(self, request):
+        return web.json_response(
+            {"messages": list(self._messages.keys())}, status=self._list_status
+        )
+
+    async def count_messages(self, request):
+        return web.json_response({"count": len(self._messages)})
+
+    async def retrieve_message(self, request):
+        headers, chunks = self._messages[request.match_info["message_id"]]
+        return web.Response(body=chunks[0], headers=headers)
+
+    async def retrieve_chunk(self, request):
+        _, chunks = self._messages[request.match_info["message_id"]]
+        return web.Response(body=chunks[int(request.match_info["chunk"]) - 1])
+
+    async def acknowledge(self, request):
+        self._acknowledged.append(request.match_info["message_id"])
+        return web.json_response({})
+
+
+def _fake_mesh_app(messages, acknowledged, list_status=200):
+    fake_mesh = _FakeMesh(messages, acknowledged, list_status)
+    inbox_path = f"/messageexchange/{MAILBOX}/inbox"
+    app = web.Application()
+    app.router.add_get(inbox_path, fake_mesh.list_messages)
+    app.router.add_get(f"/messageexchange/{MAILBOX}/count", fake_mesh.count_messages)
+    app.router.add_get(f"{inbox_path}/{{message_id}}", fake_mesh.retrieve_message)
+    app.router.add_get(f"{inbox_path}/{{message_id}}/{{chunk}}", fake_mesh.retrieve_chunk)
+    app.router.add_put(f"{inbox_path}/{{message_id}}/status/acknowledged", fake_mesh.acknowledge)
+    return app
+
+
+async def _with_inbox(app, test):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    session = LazyClientSession(connection_limit=10)
+    client = AsyncMeshClient(session, f"http://127.0.0.1:{port}", MAILBOX, a_string(), b"key")
+    try:
+        return await test(AsyncMeshInbox(client))
+    finally:
+        await session.close()
+        await runner.cleanup()
+
+
+def test_lists_retrieves_reads_and_acknowledges_messages():
+    message_id = a_string()
+    messages = {message_id: ({"Mex-FileName": "a_file.dat", "Mex-From": "sender"}, [b"data"])}
+    acknowledged = []
+
+    async def test(inbox):
+        inbox_entries = await inbox.list_messages()
+        message = await inbox_entries[0].retrieve()
+        body = await message.read()
+        await message.acknowledge()
+        message.close()
+        return message, body
+
+    message, body = asyncio.run(_with_inbox(_fake_mesh_app(messages, acknowledged), test))
+
+    assert message.id == message_id
+    assert message.file_name == "a_file.dat"
+    assert message.sender == "sender"
+    assert body == b"data"
+    assert acknowledged == [message_id]
+
+
+def test_reads_all_chunks_of_a_chunked_message():
+    message_id = a_string()
+    messages = {message_id: ({"Mex-Chunk-Range": "1:3"}, [b"one-", b"two-", b"three"])}
+
+    async def test(inbox):
+        message = await (await inbox.list_messages())[0].retrieve()
+        return await message.read()
+
+    assert asyncio.run(_with_inbox(_fake_mesh_app(messages, []), test)) == b"one-two-three"
+
+
+def test_streams_chunked_message_in_reads_of_at_most_the_requested_size():
+    message_id = a_string()
+    messages = {message_id: ({"Mex-Chunk-Range": "1:3"}, [b"one-", b"two-", b"three"])}
+
+    async def test(inbox):
+        message = await (await inbox.list_messages())[0].retrieve()
+        reads = []
+        while data := await message.read(3):
+            reads.append(data)
+        message.close()
+        return message, reads
+
+    message, reads = asyncio.run(_with_inbox(_fake_mesh_app(messages, []), test))
+
+    assert b"".join(reads) == b"one-two-three"
+    assert max(len(data) for data in reads) <= 3
+    assert message.bytes_read == 13
+
+
+def test_generates_mesh_auth_tokens_with_an_incrementing_nonce_count():
+    token_generator = MeshAuthTokenGenerator(b"key", MAILBOX, "password")
+
+    first_token, second_token = token_generator(), token_generator()
+
+    scheme, auth_data = first_token.split(" ")
+    mailbox, nonce, nonce_count, timestamp, digest = auth_data.split(":")
+    private_auth_data = f"{mailbox}:{nonce}:{nonce_count}:password:{timestamp}"
+    assert scheme == "NHSMESH"
+    assert (mailbox, nonce_count) == (MAILBOX, "0")
+    assert digest == hmac.new(b"key", private_auth_data.encode("ascii"), sha256).hexdigest()
+    assert second_token.split(":")[2] == "1"
+
+
+def test_raises_missing_header_for_absent_mex_header():
+    messages = {a_string(): ({}, [b"data"])}
+
+    async def test(inbox):
+        message = await (await inbox.list_messages())[0].retrieve()
+        message.close()
+        return message
+
+    message = asyncio.run(_with_inbox(_fake_mesh_app(messages, []), test))
+
+    with pytest.raises(MissingMeshHeader):
+        message.file_name
+
+
+def test_counts_messages():
+    messages = {a_string(): ({}, [b""]), a_string(): ({}, [b""])}
+
+    async def test(inbox):
+        return await inbox.count_messages()
+
+    assert asyncio.run(_with_inbox(_fake_mesh_app(messages, []), test)) == 2
+
+
+def test_raises_network_error_when_listing_returns_an_http_error():
+    async def test(inbox):
+        await inbox.list_messages()
+
+    with pytest.raises(MeshClientNetworkError) as e:
+        asyncio.run(_with_inbox(_fake_mesh_app({}, [], list_status=400), test))
+
+    assert e.value.error_message.startswith("400 HTTP Error: Bad Request")
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp import web
+from botocore.credentials import Credentials
+
+from s3mesh.aio.forwarder import LazyClientSession
+from s3mesh.aio.s3 import AsyncS3Error, AsyncS3Uploader
+from s3mesh.s3 import UploadConfig
+
+
+def _message(body: bytes):
+    message = MagicMock()
+    message.file_name = "a file.dat"
+    message.date_delivered = datetime(year=2020, month=11, day=2)
+    message.read = AsyncMock(side_effect=BytesIO(body).read)
+    return message
+
+
+class _FakeS3:
+    def __init__(self, part_status=200):
+        self.objects = {}
+        self.parts = {}
+        self.aborted = []
+        self.authorizations = []
+        self._part_status = part_status
+
+    async def put(self, request):
+        self.authorizations.append(request.headers.get("Authorization", ""))
+        if "partNumber" in request.query:
+            return await self._upload_part(request)
+        self.objects[request.path] = await request.read()
+        return web.Response()
+
+    async def post(self, request):
+        if "uploads" in request.query:
+            return web.Response(body=b"<Result><UploadId>upload/1</UploadId></Result>")
+        parts = self.parts.pop(request.query["uploadId"])
+        self.objects[request.path] = b"".join(parts[number] for number in sorted(parts))
+        return web.Response(body=b"<CompleteMultipartUploadResult/>")
+
+    async def delete(self, request):
+        self.aborted.append(request.query["uploadId"])
+        return web.Response(status=204)
+
+    async def _upload_part(self, request):
+        if self._part_status != 200:
+            return web.Response(status=self._part_status)
+        parts = self.parts.setdefault(request.query["uploadId"], {})
+        parts[int(request.query["partNumber"])] = await request.read()
+        return web.Response(headers={"ETag": f'"etag-{request.query["partNumber"]}"'})
+
+
+def _upload(fake_s3, message, upload_config=None, forward_message_event=None):
+    async def run():
+        app = web.Application()
+        app.router.add_put("/{bucket}/{key:.*}", fake_s3.put)
+        app.router.add_post("/{bucket}/{key:.*}", fake_s3.post)
+        app.router.add_delete("/{bucket}/{key:.*}", fake_s3.delete)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        session = LazyClientSession(connection_limit=1)
+        uploader = AsyncS3Uploader(
+            session,
+            Credentials("access-key", "secret-key"),
+            "eu-west-2",
+            "test_bucket",
+            endpoint_url=f"http://127.0.0.1:{runner.addresses[0][1]}",
+            upload_config=upload_config,
+        )
+        try:
+            await uploader.upload(message, forward_message_event or MagicMock())
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_puts_signed_object_under_date_delivered_key():
+    fake_s3 = _FakeS3()
+    forward_message_event = MagicMock()
+
+    _upload(fake_s3, _message(b"payload"), forward_message_event=forward_message_event)
+
+    assert fake_s3.objects == {"/test_bucket/2020/11/02/a_file.dat": b"payload"}
+    assert fake_s3.authorizations[0].startswith("AWS4-HMAC-SHA256 Credential=access-key/")
+    forward_message_event.record_s3_key.assert_called_once_with("2020/11/02/a_file.dat")
+
+
+def test_streams_messages_over_the_threshold_as_multipart_uploads():
+    fake_s3 = _FakeS3()
+    message = _message(b"0123456789")
+
+    _upload(fake_s3, message, UploadConfig(multipart_threshold_bytes=4, part_size_bytes=4))
+
+    assert fake_s3.objects == {"/test_bucket/2020/11/02/a_file.dat": b"0123456789"}
+    assert max(read.args[0] for read in message.read.await_args_list) <= 4
+
+
+def test_aborts_multipart_upload_and_raises_s3_error_when_a_part_fails():
+    fake_s3 = _FakeS3(part_status=500)
+
+    with pytest.raises(AsyncS3Error) as e:
+        _upload(
+            fake_s3,
+            _message(b"0123456789"),
+            UploadConfig(multipart_threshold_bytes=4, part_size_bytes=4),
+        )
+
+    assert str(e.value).startswith("500 HTTP Error: Internal Server Error")
+    assert fake_s3.aborted == ["upload/1"]
+    assert fake_s3.objects == {}
@@ -0,0 +1,16 @@
+from s3mesh.backoff import jittered_backoff_sec
+
+
+def test_doubles_backoff_with_each_failure_up_to_the_maximum():
+    backoffs = [jittered_backoff_sec(failures, 1, 5, lambda: 1.0) for failures in range(1, 6)]
+
+    assert backoffs == [1, 2, 4, 5, 5]
+
+
+def test_jitters_backoff_between_half_and_all_of_its_ceiling():
+    assert jittered_backoff_sec(3, 1, 10, lambda: 0.0) == 2
+    assert jittered_backoff_sec(3, 1, 10, lambda: 0.5) == 3
+
+
+def test_caps_the_exponent_for_long_failure_streaks():
+    assert jittered_backoff_sec(10_000, 1, 60, lambda: 1.0) == 60
@@ -0,0 +1,182 @@
+from threading import Thread
+from unittest.mock import MagicMock
+
+from s3mesh.budget import BudgetedMessage, ByteBudget, FairConcurrencyBudget
+
+
+def test_acquire_and_release_track_used_bytes():
+    budget = ByteBudget(limit_bytes=100)
+
+    budget.acquire(60)
+    assert budget.used_bytes == 60
+
+    budget.release(60)
+    assert budget.used_bytes == 0
+
+
+def test_allows_a_single_acquire_larger_than_the_limit_when_nothing_is_held():
+    budget = ByteBudget(limit_bytes=10)
+
+    budget.acquire(50)
+
+    assert budget.used_bytes == 50
+
+
+def test_try_acquire_refuses_bytes_beyond_the_limit_without_waiting():
+    budget = ByteBudget(limit_bytes=100)
+
+    assert budget.try_acquire(80)
+    assert not budget.try_acquire(30)
+    assert budget.used_bytes == 80
+
+
+def test_blocks_acquire_until_enough_bytes_are_released():
+    budget = ByteBudget(limit_bytes=100)
+    budget.acquire(80)
+
+    waiting_thread = Thread(target=budget.acquire, args=(50,))
+    waiting_thread.start()
+    waiting_thread.join(timeout=0.1)
+    assert waiting_thread.is_alive()
+
+    budget.release(80)
+    waiting_thread.join(timeout=1)
+
+    assert not waiting_thread.is_alive()
+    assert budget.used_bytes == 50
+
+
+def test_budgeted_message_holds_bytes_read_until_released():
+    message = MagicMock()
+    message.read.return_value = b"0123456789"
+    budget = ByteBudget(limit_bytes=100)
+    budgeted_message = BudgetedMessage(message, budget, max_held_bytes=100)
+
+    assert budgeted_message.read(10) == b"0123456789"
+    assert budgeted_message.read(10) == b"0123456789"
+    assert budget.used_bytes == 20
+
+    budgeted_message.release()
+    assert budget.used_bytes == 0
+
+
+def test_budgeted_message_delegates_to_wrapped_message():
+    message = MagicMock()
+    message.file_name = "a_file.dat"
+    budgeted_message = BudgetedMessage(message, ByteBudget(limit_bytes=100), max_held_bytes=100)
+
+    budgeted_message.acknowledge()
+
+    assert budgeted_message.file_name == "a_file.dat"
+    message.acknowledge.assert_called_once()
+
+
+def test_budgeted_message_holds_no_more_than_its_upload_can_buffer():
+    message = MagicMock()
+    message.read.return_value = b"0123456789"
+    budget = ByteBudget(limit_bytes=100)
+    budgeted_message = BudgetedMessage(message, budget, max_held_bytes=25)
+
+    for _ in range(4):
+        budgeted_message.read(10)
+
+    assert budget.used_bytes == 25
+
+
+def test_budgeted_message_may_overdraw_the_limit_once_it_holds_bytes():
+    message = MagicMock()
+    message.read.return_value = b"0123456789"
+    budget = ByteBudget(limit_bytes=15)
+    budgeted_message = BudgetedMessage(message, budget, max_held_bytes=100)
+
+    budgeted_message.read(10)
+    budgeted_message.read(10)
+
+    assert budget.used_bytes == 20
+
+
+def test_budgeted_message_waits_for_other_messages_to_release_bytes():
+    message = MagicMock()
+    message.read.return_value = b"0123456789"
+    budget = ByteBudget(limit_bytes=15)
+    budget.acquire(10)
+    budgeted_message = BudgetedMessage(message, budget, max_held_bytes=100)
+
+    waiting_thread = Thread(target=budgeted_message.read, args=(10,))
+    waiting_thread.start()
+    waiting_thread.join(timeout=0.1)
+    assert waiting_thread.is_alive()
+
+    budget.release(10)
+    waiting_thread.join(timeout=1)
+
+    assert not waiting_thread.is_alive()
+    assert budget.used_bytes == 10
+
+
+def test_only_one_holder_may_overdraw_the_limit():
+    budget = ByteBudget(limit_bytes=100)
+    first_holder, second_holder = object(), object()
+    budget.acquire(50)
+    budget.acquire(40)
+
+    budget.acquire(30, holder=first_holder)
+    waiting_thread = Thread(target=budget.acquire, args=(30, second_holder))
+    waiting_thread.start()
+    waiting_thread.join(timeout=0.1)
+    assert waiting_thread.is_alive()
+
+    budget.release(80, holder=first_holder)
+    waiting_thread.join(timeout=1)
+
+    assert not waiting_thread.is_alive()
+    assert budget.used_bytes == 70
+
+
+def test_concurrency_share_holds_a_slot_while_entered():
+    budget = FairConcurrencyBudget(limit=2)
+
+    with budget.share("gp2gp"):
+        assert budget.in_use("gp2gp") == 1
+
+    assert budget.in_use("gp2gp") == 0
+
+
+def test_blocks_concurrency_share_until_a_slot_is_released():
+    budget = FairConcurrencyBudget(limit=1)
+    budget.acquire("gp2gp")
+
+    waiting_thread = Thread(target=budget.acquire, args=("pds",))
+    waiting_thread.start()
+    waiting_thread.join(timeout=0.1)
+    assert waiting_thread.is_alive()
+
+    budget.release("gp2gp")
+    waiting_thread.join(timeout=1)
+
+    assert not waiting_thread.is_alive()
+    assert budget.in_use("pds") == 1
+
+
+def test_gives_released_slot_to_the_waiting_share_using_the_fewest_slots():
+    budget = FairConcurrencyBudget(limit=2)
+    budget.acquire("flooded")
+    budget.acquire("flooded")
+
+    flooded_thread = Thread(target=budget.acquire, args=("flooded",))
+    flooded_thread.start()
+    flooded_thread.join(timeout=0.1)
+    quiet_thread = Thread(target=budget.acquire, args=("quiet",))
+    quiet_thread.start()
+    quiet_thread.join(timeout=0.1)
+
+    budget.release("flooded")
+    quiet_thread.join(timeout=1)
+
+    assert not quiet_thread.is_alive()
+    assert flooded_thread.is_alive()
+    assert budget.in_use("quiet") == 1
+
+    budget.release("quiet")
+    flooded_thread.join(timeout=1)
+    assert not flooded_thread.is_alive()
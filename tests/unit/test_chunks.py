@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from io import BytesIO
+from threading import Event
+from typing import Optional
+from unittest.mock import MagicMock, patch
+
+from mesh_client import Message
+
+from s3mesh.chunks import ChunkReadAheadMeshClient
+from s3mesh.connections import PooledMeshClient
+
+MESSAGE_ID = "a-message"
+
+
+def _a_response(body: bytes, chunk_range: Optional[str] = None):
+    response = MagicMock()
+    response.headers = {} if chunk_range is None else {"Mex-Chunk-Range": chunk_range}
+    response.raw = BytesIO(body)
+    return response
+
+
+class _FakeMesh:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.fetched_chunks = []
+        self.chunk_fetched = Event()
+
+    def retrieve_message(self, client, message_id):
+        return Message(message_id, _a_response(self.chunks[0], f"1:{len(self.chunks)}"), client)
+
+    def retrieve_message_chunk(self, client, message_id, chunk_num):
+        self.fetched_chunks.append(int(chunk_num))
+        self.chunk_fetched.set()
+        return _a_response(self.chunks[int(chunk_num) - 1])
+
+
+@contextmanager
+def _patched_mesh(fake_mesh):
+    with patch.object(
+        PooledMeshClient, "retrieve_message", autospec=True, side_effect=fake_mesh.retrieve_message
+    ), patch.object(
+        PooledMeshClient,
+        "retrieve_message_chunk",
+        autospec=True,
+        side_effect=fake_mesh.retrieve_message_chunk,
+    ):
+        yield
+
+
+def _build_client(chunk_read_ahead):
+    return ChunkReadAheadMeshClient(
+        "https://mesh", "a-mailbox", "a-password", chunk_read_ahead=chunk_read_ahead
+    )
+
+
+def test_reads_all_chunks_in_order():
+    fake_mesh = _FakeMesh([b"first ", b"second ", b"third"])
+
+    with _patched_mesh(fake_mesh):
+        message = _build_client(chunk_read_ahead=2).retrieve_message(MESSAGE_ID)
+
+        assert message.read() == b"first second third"
+    assert fake_mesh.fetched_chunks == [2, 3]
+
+
+def test_fetches_chunks_ahead_of_the_reader():
+    fake_mesh = _FakeMesh([b"first", b"second"])
+
+    with _patched_mesh(fake_mesh):
+        message = _build_client(chunk_read_ahead=1).retrieve_message(MESSAGE_ID)
+
+        assert fake_mesh.chunk_fetched.wait(timeout=1)
+        assert message.read(5) == b"first"
+
+
+def test_does_not_read_ahead_further_than_the_window():
+    fake_mesh = _FakeMesh([b"1", b"2", b"3", b"4"])
+
+    with _patched_mesh(fake_mesh):
+        message = _build_client(chunk_read_ahead=1).retrieve_message(MESSAGE_ID)
+        fake_mesh.chunk_fetched.wait(timeout=1)
+        message.close()
+
+    assert fake_mesh.fetched_chunks == [2]
+
+
+def test_returns_unchunked_messages_unchanged():
+    fake_mesh = _FakeMesh([b"only chunk"])
+
+    with _patched_mesh(fake_mesh):
+        message = _build_client(chunk_read_ahead=2).retrieve_message(MESSAGE_ID)
+
+        assert isinstance(message, Message)
+        assert message.read() == b"only chunk"
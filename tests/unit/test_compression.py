@@ -0,0 +1,88 @@
+import gzip
+import tracemalloc
+from io import BytesIO
+
+import pytest
+
+from s3mesh.compression import (
+    GZIP_COMPRESSION,
+    ZSTD_COMPRESSION,
+    CompressingStream,
+    GzipDecompressingStream,
+    compression_codec,
+)
+
+A_PAYLOAD = b"<record><field>value</field></record>" * 1000
+
+
+def _read_in_parts(stream, part_size):
+    parts = []
+    while part := stream.read(part_size):
+        parts.append(part)
+    return b"".join(parts), parts
+
+
+def test_compresses_a_stream_with_gzip_in_bounded_reads():
+    stream = CompressingStream(BytesIO(A_PAYLOAD), compression_codec(GZIP_COMPRESSION))
+
+    compressed, parts = _read_in_parts(stream, 64)
+
+    assert gzip.decompress(compressed) == A_PAYLOAD
+    assert all(len(part) <= 64 for part in parts)
+
+
+def test_reads_the_whole_compressed_stream_when_no_size_given():
+    stream = CompressingStream(BytesIO(A_PAYLOAD), compression_codec(GZIP_COMPRESSION))
+
+    assert gzip.decompress(stream.read()) == A_PAYLOAD
+    assert stream.read() == b""
+
+
+def test_reports_compression_ratio_and_cpu_time():
+    stream = CompressingStream(BytesIO(A_PAYLOAD), compression_codec(GZIP_COMPRESSION))
+
+    compressed = stream.read()
+
+    assert stream.raw_bytes == len(A_PAYLOAD)
+    assert stream.compressed_bytes == len(compressed)
+    assert stream.compression_ratio == len(A_PAYLOAD) / len(compressed)
+    assert stream.cpu_sec >= 0
+
+
+def test_compresses_a_stream_with_zstd():
+    zstandard = pytest.importorskip("zstandard")
+    stream = CompressingStream(BytesIO(A_PAYLOAD), compression_codec(ZSTD_COMPRESSION))
+
+    compressed, _ = _read_in_parts(stream, 64)
+
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == A_PAYLOAD
+
+
+def test_rejects_unknown_compression():
+    with pytest.raises(ValueError):
+        compression_codec("lz4")
+
+
+def test_decompresses_a_gzip_stream_in_bounded_reads():
+    stream = GzipDecompressingStream(BytesIO(gzip.compress(A_PAYLOAD)))
+
+    decompressed, parts = _read_in_parts(stream, 64)
+
+    assert decompressed == A_PAYLOAD
+    assert all(len(part) <= 64 for part in parts)
+
+
+def test_buffers_no_more_than_requested_when_decompressing_highly_compressed_data():
+    zeros = gzip.compress(bytes(16 * 1024 * 1024))
+    stream = GzipDecompressingStream(BytesIO(zeros))
+
+    tracemalloc.start()
+    try:
+        first_part = stream.read(1024)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert first_part == bytes(1024)
+    assert peak_bytes < 1024 * 1024
+    assert len(stream.read()) == 16 * 1024 * 1024 - 1024
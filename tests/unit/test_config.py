@@ -17,6 +17,62 @@ def test_read_config_from_environment():
         "FORWARDER_HOME": "/home/mesh-forwarder",
         "S3_ENDPOINT_URL": "https://an.endpoint:3000",
         "SSM_ENDPOINT_URL": "https://an.endpoint:3001",
+        "FORWARDING_ENGINE": "pipeline",
+        "FORWARD_WORKER_COUNT": "8",
+        "MAX_IN_FLIGHT_BYTES": "104857600",
+        "PIPELINE_DOWNLOAD_WORKERS": "3",
+        "PIPELINE_DOWNLOAD_QUEUE_SIZE": "6",
+        "PIPELINE_UPLOAD_WORKERS": "5",
+        "PIPELINE_UPLOAD_QUEUE_SIZE": "10",
+        "PIPELINE_ACKNOWLEDGE_WORKERS": "2",
+        "PIPELINE_ACKNOWLEDGE_QUEUE_SIZE": "4",
+        "PIPELINE_MEMORY_BUDGET_BYTES": "1048576",
+        "ASYNC_MAX_CONCURRENCY": "250",
+        "POLL_SCHEDULER": "adaptive",
+        "BURST_POLL_FREQUENCY": "2",
+        "MAX_POLL_BACKOFF": "600",
+        "BURST_WINDOW_POLLS": "10",
+        "S3_KEY_PREFIX": "gp2gp/",
+        "MAILBOXES": '[{"name": "gp2gp"}]',
+        "MAILBOXES_MAX_CONCURRENCY": "16",
+        "LEASE_STORE": "s3",
+        "LEASE_TTL": "300",
+        "LEASE_S3_BUCKET_NAME": "lease-bucket",
+        "LEASE_S3_KEY_PREFIX": "claims/",
+        "LEASE_DIRECTORY": "/leases",
+        "FORWARDED_INDEX_PATH": "/forwarder/index.db",
+        "FORWARDED_INDEX_MAX_ENTRIES": "500",
+        "FORWARD_JOURNAL_PATH": "forward.journal",
+        "FORWARD_JOURNAL_COMPACT_AFTER": "50",
+        "MESH_CHUNK_READ_AHEAD": "2",
+        "S3_MULTIPART_THRESHOLD_BYTES": "1048576",
+        "S3_MULTIPART_PART_SIZE_BYTES": "16777216",
+        "S3_UPLOAD_CONCURRENCY": "4",
+        "S3_COMPRESSION": "zstd",
+        "S3_DIGEST_ALGORITHM": "sha256",
+        "MESH_CONTENT_COMPRESSED_POLICY": "decompress",
+        "PIPELINE_SPOOL_DIRECTORY": "spool",
+        "PIPELINE_SPOOL_MESSAGE_MEMORY_BYTES": "1024",
+        "SPOOL_QUEUE_DIRECTORY": "queue",
+        "SPOOL_QUEUE_ACKNOWLEDGE_ON": "s3",
+        "SPOOL_QUEUE_DRAIN_INTERVAL": "5",
+        "SPOOL_QUEUE_MAX_BYTES": "1073741824",
+        "MESH_MAX_POOL_CONNECTIONS": "4",
+        "S3_MAX_POOL_CONNECTIONS": "32",
+        "MESSAGE_RETRY_MAX_ATTEMPTS": "5",
+        "MESSAGE_RETRY_BACKOFF": "0.5",
+        "MESSAGE_RETRY_MAX_BACKOFF": "4",
+        "MESSAGE_RETRY_SYSTEMIC_FAILURES": "2",
+        "QUARANTINE_MODE": "dead-letter",
+        "QUARANTINE_DEAD_LETTER_PREFIX": "poison/",
+        "QUARANTINE_SKIP_CACHE_SIZE": "50",
+        "MESH_VALIDATE_HEADERS_FIRST": "true",
+        "METRICS_PROMETHEUS_PORT": "9100",
+        "METRICS_PROMETHEUS_ADDRESS": "127.0.0.1",
+        "METRICS_STATSD_HOST": "statsd.local",
+        "METRICS_STATSD_PORT": "9125",
+        "METRICS_STATSD_PREFIX": "forwarder",
+        "METRICS_STATSD_INTERVAL": "30",
     }
 
     expected_config = ForwarderConfig(
@@ -32,6 +88,62 @@ def test_read_config_from_environment():
         forwarder_home="/home/mesh-forwarder",
         s3_endpoint_url="https://an.endpoint:3000",
         ssm_endpoint_url="https://an.endpoint:3001",
+        forwarding_engine="pipeline",
+        forward_worker_count="8",
+        max_in_flight_bytes="104857600",
+        pipeline_download_workers="3",
+        pipeline_download_queue_size="6",
+        pipeline_upload_workers="5",
+        pipeline_upload_queue_size="10",
+        pipeline_acknowledge_workers="2",
+        pipeline_acknowledge_queue_size="4",
+        pipeline_memory_budget_bytes="1048576",
+        async_max_concurrency="250",
+        poll_scheduler="adaptive",
+        burst_poll_frequency="2",
+        max_poll_backoff="600",
+        burst_window_polls="10",
+        s3_key_prefix="gp2gp/",
+        mailboxes='[{"name": "gp2gp"}]',
+        mailboxes_max_concurrency="16",
+        lease_store="s3",
+        lease_ttl="300",
+        lease_s3_bucket_name="lease-bucket",
+        lease_s3_key_prefix="claims/",
+        lease_directory="/leases",
+        forwarded_index_path="/forwarder/index.db",
+        forwarded_index_max_entries="500",
+        forward_journal_path="forward.journal",
+        forward_journal_compact_after="50",
+        mesh_chunk_read_ahead="2",
+        s3_multipart_threshold_bytes="1048576",
+        s3_multipart_part_size_bytes="16777216",
+        s3_upload_concurrency="4",
+        s3_compression="zstd",
+        s3_digest_algorithm="sha256",
+        mesh_content_compressed_policy="decompress",
+        pipeline_spool_directory="spool",
+        pipeline_spool_message_memory_bytes="1024",
+        spool_queue_directory="queue",
+        spool_queue_acknowledge_on="s3",
+        spool_queue_drain_interval="5",
+        spool_queue_max_bytes="1073741824",
+        mesh_max_pool_connections="4",
+        s3_max_pool_connections="32",
+        message_retry_max_attempts="5",
+        message_retry_backoff="0.5",
+        message_retry_max_backoff="4",
+        message_retry_systemic_failures="2",
+        quarantine_mode="dead-letter",
+        quarantine_dead_letter_prefix="poison/",
+        quarantine_skip_cache_size="50",
+        mesh_validate_headers_first="true",
+        metrics_prometheus_port="9100",
+        metrics_prometheus_address="127.0.0.1",
+        metrics_statsd_host="statsd.local",
+        metrics_statsd_port="9125",
+        metrics_statsd_prefix="forwarder",
+        metrics_statsd_interval="30",
     )
 
     actual_config = ForwarderConfig.from_environment_variables(environment)
@@ -66,6 +178,62 @@ def test_read_config_from_environment_uses_default_when_no_var_set():
         forwarder_home="/home/mesh-forwarder",
         s3_endpoint_url=None,
         ssm_endpoint_url=None,
+        forwarding_engine="pool",
+        forward_worker_count="1",
+        max_in_flight_bytes=None,
+        pipeline_download_workers="2",
+        pipeline_download_queue_size="8",
+        pipeline_upload_workers="4",
+        pipeline_upload_queue_size="8",
+        pipeline_acknowledge_workers="1",
+        pipeline_acknowledge_queue_size="8",
+        pipeline_memory_budget_bytes="67108864",
+        async_max_concurrency="100",
+        poll_scheduler="fixed",
+        burst_poll_frequency="5",
+        max_poll_backoff="900",
+        burst_window_polls="6",
+        s3_key_prefix="",
+        mailboxes=None,
+        mailboxes_max_concurrency="8",
+        lease_store=None,
+        lease_ttl="900",
+        lease_s3_bucket_name=None,
+        lease_s3_key_prefix="leases/",
+        lease_directory=None,
+        forwarded_index_path=None,
+        forwarded_index_max_entries="10000",
+        forward_journal_path=None,
+        forward_journal_compact_after="1000",
+        mesh_chunk_read_ahead="0",
+        s3_multipart_threshold_bytes="8388608",
+        s3_multipart_part_size_bytes="8388608",
+        s3_upload_concurrency="10",
+        s3_compression=None,
+        s3_digest_algorithm=None,
+        mesh_content_compressed_policy="passthrough",
+        pipeline_spool_directory=None,
+        pipeline_spool_message_memory_bytes="8388608",
+        spool_queue_directory=None,
+        spool_queue_acknowledge_on="spool",
+        spool_queue_drain_interval="1",
+        spool_queue_max_bytes=None,
+        mesh_max_pool_connections="10",
+        s3_max_pool_connections=None,
+        message_retry_max_attempts="3",
+        message_retry_backoff="1",
+        message_retry_max_backoff="10",
+        message_retry_systemic_failures="3",
+        quarantine_mode=None,
+        quarantine_dead_letter_prefix="dead-letter/",
+        quarantine_skip_cache_size="10000",
+        mesh_validate_headers_first="false",
+        metrics_prometheus_port=None,
+        metrics_prometheus_address="",
+        metrics_statsd_host=None,
+        metrics_statsd_port="8125",
+        metrics_statsd_prefix="",
+        metrics_statsd_interval="10",
     )
 
     actual_config = ForwarderConfig.from_environment_variables(environment)
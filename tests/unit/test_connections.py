@@ -0,0 +1,107 @@
+import json
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from s3mesh.connections import ConnectionCounter, ConnectionStats, PooledMeshClient
+
+MAILBOX = "a-mailbox"
+
+
+class _MeshHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.endswith("/count"):
+            self._send_json({"count": 2})
+        else:
+            self._send_json({"messages": ["first", "second"]})
+
+    def do_PUT(self):
+        self._send_json({})
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Mex-Filename", "a_file.dat")
+        self.send_header("Content-Length", "1024")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@contextmanager
+def _a_mesh_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MeshHandler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _a_client(url, **kwargs):
+    return PooledMeshClient(url, MAILBOX, "a-password", **kwargs)
+
+
+def test_reuses_one_connection_across_requests():
+    counter = ConnectionCounter()
+
+    with _a_mesh_server() as url:
+        client = _a_client(url, connection_counter=counter)
+        for _ in range(5):
+            assert client.list_messages() == ["first", "second"]
+            assert client.count_messages() == 2
+            client.acknowledge_message("first")
+        client.close()
+
+    assert counter.take().new_connections == 1
+
+
+def test_counts_requests_waiting_for_a_pooled_connection():
+    counter = ConnectionCounter()
+
+    with _a_mesh_server() as url:
+        client = _a_client(url, max_connections=1, connection_counter=counter)
+        held = client.retrieve_message_chunk("first", 2)
+        waiting = Thread(target=client.count_messages)
+        waiting.start()
+        waiting.join(timeout=0.1)
+        assert waiting.is_alive()
+        held.content
+        waiting.join(timeout=1)
+        client.close()
+
+    stats = counter.take()
+    assert stats.new_connections == 1
+    assert stats.pool_waits == 1
+    assert stats.pool_wait_sec > 0
+
+
+def test_retrieves_message_headers_with_a_head_request():
+    with _a_mesh_server() as url:
+        client = _a_client(url)
+        headers = client.retrieve_message_headers("first")
+        client.close()
+
+    assert headers["mex-filename"] == "a_file.dat"
+    assert headers["Content-Length"] == "1024"
+
+
+def test_take_resets_the_counts():
+    counter = ConnectionCounter()
+    counter.record_new_connection()
+    counter.record_pool_wait(0.5)
+
+    assert counter.take() == ConnectionStats(new_connections=1, pool_waits=1, pool_wait_sec=0.5)
+    assert counter.take() == ConnectionStats(new_connections=0, pool_waits=0, pool_wait_sec=0.0)
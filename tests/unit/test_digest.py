@@ -0,0 +1,69 @@
+import base64
+import hashlib
+from io import BytesIO
+
+import pytest
+
+from s3mesh.digest import (
+    CRC32C_DIGEST,
+    MD5_DIGEST,
+    SHA256_DIGEST,
+    DigestingStream,
+    digest_algorithm,
+)
+
+A_PAYLOAD = b"some data to forward" * 100
+
+
+def _read_all(stream, part_size=64):
+    body = b""
+    while data := stream.read(part_size):
+        body += data
+    return body
+
+
+def test_digests_a_stream_while_it_is_read():
+    stream = DigestingStream(BytesIO(A_PAYLOAD), digest_algorithm(SHA256_DIGEST))
+
+    assert _read_all(stream) == A_PAYLOAD
+
+    assert stream.hex_digest == hashlib.sha256(A_PAYLOAD).hexdigest()
+    assert stream.base64_digest == base64.b64encode(hashlib.sha256(A_PAYLOAD).digest()).decode()
+    assert stream.bytes_hashed == len(A_PAYLOAD)
+
+
+def test_digests_a_stream_with_md5():
+    stream = DigestingStream(BytesIO(A_PAYLOAD), digest_algorithm(MD5_DIGEST))
+
+    _read_all(stream)
+
+    assert stream.hex_digest == hashlib.md5(A_PAYLOAD).hexdigest()
+
+
+def test_digests_a_stream_with_crc32c():
+    pytest.importorskip("awscrt")
+    stream = DigestingStream(BytesIO(b"123456789"), digest_algorithm(CRC32C_DIGEST))
+
+    _read_all(stream)
+
+    assert stream.hex_digest == "e3069283"
+
+
+def test_measures_hash_throughput():
+    stream = DigestingStream(BytesIO(A_PAYLOAD), digest_algorithm(SHA256_DIGEST))
+
+    _read_all(stream)
+
+    assert stream.hash_sec > 0
+    assert stream.bytes_per_sec == stream.bytes_hashed / stream.hash_sec
+
+
+def test_has_no_throughput_before_anything_is_hashed():
+    stream = DigestingStream(BytesIO(), digest_algorithm(SHA256_DIGEST))
+
+    assert stream.bytes_per_sec is None
+
+
+def test_rejects_unknown_digest_algorithm():
+    with pytest.raises(ValueError):
+        digest_algorithm("sha1")
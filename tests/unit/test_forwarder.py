@@ -1,20 +1,40 @@
-from unittest.mock import MagicMock, call
+from itertools import count
+from unittest.mock import ANY, DEFAULT, MagicMock, call
 
 import pytest
 
+from s3mesh.budget import ByteBudget, FairConcurrencyBudget
+from s3mesh.connections import ConnectionStats
 from s3mesh.forwarder import RetryableException
-from s3mesh.mesh import InvalidMeshHeader, MissingMeshHeader
+from s3mesh.index import ForwardedMessage
+from s3mesh.journal import CLAIMED, UPLOADED, JournalEntry
+from s3mesh.lease import Lease, LocalFileLeaseStore
+from s3mesh.mesh import (
+    MESH_INBOX_PAGE_LIMIT,
+    InvalidMeshHeader,
+    MeshClientNetworkError,
+    MissingMeshHeader,
+)
+from s3mesh.monitoring.event.base import (
+    ACKNOWLEDGE_STAGE,
+    COUNT_STAGE,
+    DOWNLOAD_STAGE,
+    LISTING_STAGE,
+    POLL_STAGE,
+    UPLOAD_STAGE,
+)
+from s3mesh.monitoring.event.forward import ForwardMessageEvent
+from s3mesh.quarantine import DeadLetterQuarantine, SkipQuarantine
+from s3mesh.retry import MessageRetryConfig
+from s3mesh.scheduler import IDLE_POLL_DELAY, PollDelay
 from tests.builders.common import a_string
 from tests.builders.forwarder import build_forwarder
-from tests.builders.mesh import mesh_client_error, mock_mesh_message
-
-
-def _an_invalid_header_exception(**kwargs):
-    return InvalidMeshHeader(
-        header_name=kwargs.get("header_name", a_string()),
-        header_value=kwargs.get("header_value", a_string()),
-        expected_header_value=kwargs.get("expected_header_value", a_string()),
-    )
+from tests.builders.mesh import (
+    an_invalid_header_exception,
+    mesh_client_error,
+    mock_inbox_entry,
+    mock_mesh_message,
+)
 
 
 def _a_missing_header_exception(**kwargs):
@@ -23,6 +43,14 @@ def _a_missing_header_exception(**kwargs):
     )
 
 
+def _timed(event, stage, *exit_args):
+    return [
+        event.timing(stage),
+        event.timing().__enter__(),
+        event.timing().__exit__(*(exit_args or (None, None, None))),
+    ]
+
+
 def test_validates_message():
     mock_message = mock_mesh_message()
 
@@ -102,7 +130,7 @@ def test_acknowledges_multiple_message():
 
 def test_catches_invalid_header_error():
     forwarder = build_forwarder(
-        incoming_messages=[mock_mesh_message(validation_error=_an_invalid_header_exception())]
+        incoming_messages=[mock_mesh_message(validation_error=an_invalid_header_exception())]
     )
 
     try:
@@ -114,7 +142,7 @@ def test_catches_invalid_header_error():
 def test_continues_uploading_messages_when_one_of_them_has_invalid_mesh_header():
     successful_message_1 = mock_mesh_message()
     successful_message_2 = mock_mesh_message()
-    unsuccessful_message = mock_mesh_message(validation_error=_an_invalid_header_exception())
+    unsuccessful_message = mock_mesh_message(validation_error=an_invalid_header_exception())
     mock_uploader = MagicMock()
     probe = MagicMock()
     forward_message_event = MagicMock()
@@ -190,18 +218,54 @@ def test_records_message_progress():
 
     forwarder.forward_messages()
 
+    poll_inbox_event = call.new_poll_inbox_event()
+    forward_message_event = call.new_forward_message_event()
     probe.assert_has_calls(
         [
-            call.new_poll_inbox_event(),
-            call.new_poll_inbox_event().record_message_batch_count(1),
-            call.new_poll_inbox_event().finish(),
-            call.new_forward_message_event(),
-            call.new_forward_message_event().record_message_metadata(mesh_message),
-            call.new_forward_message_event().finish(),
+            poll_inbox_event,
+            poll_inbox_event.timing(POLL_STAGE),
+            poll_inbox_event.timing().__enter__(),
+            *_timed(poll_inbox_event, LISTING_STAGE),
+            poll_inbox_event.record_message_batch_count(1),
+            poll_inbox_event.record_backlog_remaining(0),
+            poll_inbox_event.timing().__exit__(None, None, None),
+            poll_inbox_event.finish(),
+            forward_message_event,
+            forward_message_event.record_attempt(1),
+            *_timed(forward_message_event, DOWNLOAD_STAGE),
+            forward_message_event.record_message_metadata(mesh_message),
+            *_timed(forward_message_event, UPLOAD_STAGE),
+            forward_message_event.record_download(mesh_message.bytes_read, mesh_message.read_sec),
+            forward_message_event.record_stage_sec(DOWNLOAD_STAGE, mesh_message.read_sec),
+            forward_message_event.record_stage_sec(UPLOAD_STAGE, -mesh_message.read_sec),
+            *_timed(forward_message_event, ACKNOWLEDGE_STAGE),
+            forward_message_event.finish(),
         ]
     )
 
 
+def test_records_streamed_body_reads_as_download_time_rather_than_upload_time():
+    probe = MagicMock()
+    output = MagicMock()
+    clock = count()
+    probe.new_forward_message_event.return_value = ForwardMessageEvent(
+        output, clock=lambda: next(clock)
+    )
+    mesh_message = mock_mesh_message()
+    mesh_message.bytes_read = 100
+    mesh_message.read_sec = 0.25
+    forwarder = build_forwarder(incoming_messages=[mesh_message], probe=probe)
+
+    forwarder.forward_messages()
+
+    _, fields = output.log_event.call_args.args
+    assert fields["downloadedBytes"] == 100
+    assert fields["downloadBytesPerSec"] == 400
+    assert fields["downloadSec"] == 1.25
+    assert fields["uploadSec"] == 0.75
+    assert fields["acknowledgeSec"] == 1
+
+
 def test_records_error_when_message_is_missing_header():
     probe = MagicMock()
     forward_message_event = MagicMock()
@@ -234,7 +298,7 @@ def test_records_error_when_message_has_invalid_header():
     probe = MagicMock()
     forward_message_event = MagicMock()
     probe.new_forward_message_event.return_value = forward_message_event
-    header_error = _an_invalid_header_exception(
+    header_error = an_invalid_header_exception(
         header_name="fruit_header",
     )
     message = mock_mesh_message(
@@ -258,7 +322,7 @@ def test_records_error_when_message_has_invalid_header():
     )
 
 
-def test_raises_retryable_exception_when_inbox_read_messages_raises_mesh_network_exception():
+def test_raises_retryable_exception_when_inbox_list_messages_raises_mesh_network_exception():
     forwarder = build_forwarder(read_error=mesh_client_error())
 
     with pytest.raises(RetryableException):
@@ -289,12 +353,13 @@ def test_records_error_when_mesh_message_ack_raises_mesh_network_exception():
 
     forward_message_event.assert_has_calls(
         [
-            call.record_message_metadata(mock_message),
+            *_timed(call, ACKNOWLEDGE_STAGE, MeshClientNetworkError, ANY, ANY),
             call.record_mesh_client_network_error(network_error),
             call.finish(),
         ],
         any_order=False,
     )
+    forward_message_event.record_message_metadata.assert_called_once_with(mock_message)
 
 
 def test_records_mesh_error_when_polling_messages():
@@ -339,11 +404,14 @@ def test_records_inbox_message_count():
 
     forwarder.is_mailbox_empty()
 
+    count_messages_event = call.new_count_messages_event()
     probe.assert_has_calls(
         [
-            call.new_count_messages_event(),
-            call.new_count_messages_event().record_message_count(3),
-            call.new_count_messages_event().finish(),
+            count_messages_event,
+            *_timed(count_messages_event, COUNT_STAGE),
+            count_messages_event.record_message_count(3),
+            count_messages_event.record_backlog_remaining(3),
+            count_messages_event.finish(),
         ]
     )
 
@@ -357,10 +425,752 @@ def test_records_mesh_error_when_counting_messages():
     with pytest.raises(RetryableException):
         forwarder.is_mailbox_empty()
 
+    count_messages_event = call.new_count_messages_event()
     probe.assert_has_calls(
         [
-            call.new_count_messages_event(),
-            call.new_count_messages_event().record_mesh_client_network_error(network_error),
-            call.new_count_messages_event().finish(),
+            count_messages_event,
+            *_timed(count_messages_event, COUNT_STAGE, MeshClientNetworkError, ANY, ANY),
+            count_messages_event.record_mesh_client_network_error(network_error),
+            count_messages_event.finish(),
         ]
     )
+
+
+def test_forwards_and_acknowledges_all_messages_when_using_multiple_workers():
+    mock_messages = [mock_mesh_message() for _ in range(10)]
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        incoming_messages=mock_messages, s3_uploader=mock_uploader, worker_count=4
+    )
+
+    forwarder.forward_messages()
+
+    assert mock_uploader.upload.call_count == 10
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_called_once()
+
+
+def test_records_a_forward_event_per_message_when_using_multiple_workers():
+    mock_messages = [mock_mesh_message() for _ in range(5)]
+    probe = MagicMock()
+    forward_message_events = [MagicMock() for _ in mock_messages]
+    probe.new_forward_message_event.side_effect = forward_message_events
+
+    forwarder = build_forwarder(incoming_messages=mock_messages, probe=probe, worker_count=3)
+
+    forwarder.forward_messages()
+
+    for forward_message_event in forward_message_events:
+        forward_message_event.record_message_metadata.assert_called_once()
+        forward_message_event.finish.assert_called_once()
+
+
+def test_continues_past_invalid_messages_when_using_multiple_workers():
+    successful_message = mock_mesh_message()
+    unsuccessful_message = mock_mesh_message(validation_error=an_invalid_header_exception())
+
+    forwarder = build_forwarder(
+        incoming_messages=[unsuccessful_message, successful_message], worker_count=2
+    )
+
+    forwarder.forward_messages()
+
+    successful_message.acknowledge.assert_called_once()
+    unsuccessful_message.acknowledge.assert_not_called()
+
+
+def test_raises_retryable_exception_when_a_worker_raises_mesh_network_exception():
+    mock_messages = [
+        mock_mesh_message(),
+        mock_mesh_message(acknowledge_error=mesh_client_error()),
+        mock_mesh_message(),
+    ]
+    forwarder = build_forwarder(incoming_messages=mock_messages, worker_count=2)
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+
+def test_releases_in_flight_budget_after_each_message():
+    mock_message = mock_mesh_message(body=b"some bytes")
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = lambda message, _: message.read()
+    mock_uploader.max_buffered_bytes = 1024
+    budget = ByteBudget(limit_bytes=1024)
+
+    forwarder = build_forwarder(
+        incoming_messages=[mock_message, mock_mesh_message()],
+        s3_uploader=mock_uploader,
+        worker_count=2,
+        in_flight_budget=budget,
+    )
+
+    forwarder.forward_messages()
+
+    assert budget.used_bytes == 0
+    mock_message.acknowledge.assert_called_once()
+
+
+def test_retrieves_each_message_only_when_forwarding_it():
+    first_message = mock_mesh_message()
+    second_message = mock_mesh_message()
+    first_entry = mock_inbox_entry(first_message)
+    second_entry = mock_inbox_entry(second_message)
+    call_order = MagicMock()
+    call_order.attach_mock(first_entry.retrieve, "retrieve_first")
+    call_order.attach_mock(first_message.acknowledge, "acknowledge_first")
+    call_order.attach_mock(second_entry.retrieve, "retrieve_second")
+
+    forwarder = build_forwarder(inbox_entries=[first_entry, second_entry])
+
+    forwarder.forward_messages()
+
+    recorded_calls = call_order.mock_calls
+    assert recorded_calls.index(call.acknowledge_first()) < recorded_calls.index(
+        call.retrieve_second()
+    )
+
+
+def test_records_batch_count_from_inbox_listing():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+
+    forwarder = build_forwarder(
+        inbox_entries=[mock_inbox_entry(), mock_inbox_entry(), mock_inbox_entry()], probe=probe
+    )
+
+    forwarder.forward_messages()
+
+    poll_inbox_event.record_message_batch_count.assert_called_once_with(3)
+
+
+def test_closes_message_after_forwarding():
+    mock_message = mock_mesh_message()
+
+    forwarder = build_forwarder(incoming_messages=[mock_message])
+
+    forwarder.forward_messages()
+
+    mock_message.close.assert_called_once()
+
+
+def test_closes_message_when_it_fails_validation():
+    mock_message = mock_mesh_message(validation_error=an_invalid_header_exception())
+
+    forwarder = build_forwarder(incoming_messages=[mock_message])
+
+    forwarder.forward_messages()
+
+    mock_message.close.assert_called_once()
+
+
+def test_records_error_and_raises_retryable_exception_when_retrieving_a_message_fails():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    network_error = mesh_client_error("Network error")
+
+    forwarder = build_forwarder(
+        inbox_entries=[mock_inbox_entry(retrieve_error=network_error)], probe=probe
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    forward_message_event.assert_has_calls(
+        [call.record_mesh_client_network_error(network_error), call.finish()],
+        any_order=False,
+    )
+
+
+def test_records_preceding_poll_delay_on_poll_event():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    poll_delay = PollDelay(30, IDLE_POLL_DELAY)
+
+    forwarder = build_forwarder(probe=probe)
+
+    forwarder.forward_messages(poll_delay)
+
+    poll_inbox_event.record_poll_delay.assert_called_once_with(poll_delay)
+
+
+def test_records_mesh_connection_stats_on_poll_event():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    connection_counter = MagicMock()
+    connection_counter.take.return_value = ConnectionStats(2, 1, 0.25)
+
+    forwarder = build_forwarder(probe=probe, connection_counter=connection_counter)
+
+    forwarder.forward_messages()
+
+    poll_inbox_event.record_mesh_connections.assert_called_once_with(ConnectionStats(2, 1, 0.25))
+
+
+def test_returns_batch_count():
+    forwarder = build_forwarder(incoming_messages=[mock_mesh_message(), mock_mesh_message()])
+
+    assert forwarder.forward_messages() == 2
+
+
+def test_has_no_backlog_without_counting_when_listing_is_below_page_limit():
+    forwarder = build_forwarder(inbox_message_count=10)
+    mesh_inbox = forwarder._inbox
+
+    assert forwarder.has_backlog(MESH_INBOX_PAGE_LIMIT - 1) is False
+    mesh_inbox.count_messages.assert_not_called()
+
+
+def test_counts_messages_to_decide_backlog_when_listing_reached_page_limit():
+    assert build_forwarder(inbox_message_count=10).has_backlog(MESH_INBOX_PAGE_LIMIT) is True
+    assert build_forwarder(inbox_message_count=0).has_backlog(MESH_INBOX_PAGE_LIMIT) is False
+
+
+def test_records_unknown_backlog_on_poll_event_when_listing_reached_page_limit():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    inbox_entries = [mock_inbox_entry() for _ in range(MESH_INBOX_PAGE_LIMIT)]
+
+    forwarder = build_forwarder(inbox_entries=inbox_entries, probe=probe)
+
+    forwarder.forward_messages()
+
+    poll_inbox_event.record_backlog_remaining.assert_called_once_with(None)
+
+
+def test_holds_a_concurrency_share_slot_while_forwarding_each_message():
+    budget = FairConcurrencyBudget(limit=1)
+    slots_in_use = []
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = lambda *_: slots_in_use.append(budget.in_use("gp2gp"))
+
+    forwarder = build_forwarder(
+        incoming_messages=[mock_mesh_message(), mock_mesh_message()],
+        s3_uploader=mock_uploader,
+        worker_count=2,
+        concurrency_share=budget.share("gp2gp"),
+    )
+
+    forwarder.forward_messages()
+
+    assert slots_in_use == [1, 1]
+    assert budget.in_use("gp2gp") == 0
+
+
+def test_skips_messages_leased_by_another_replica():
+    leased_elsewhere = mock_inbox_entry()
+    leased_here = mock_inbox_entry()
+    lease_store = MagicMock()
+    lease_store.try_acquire.side_effect = lambda message_id: (
+        None if message_id == leased_elsewhere.id else Lease(message_id, "token")
+    )
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        inbox_entries=[leased_elsewhere, leased_here],
+        s3_uploader=mock_uploader,
+        lease_store=lease_store,
+    )
+
+    forwarder.forward_messages()
+
+    leased_elsewhere.retrieve.assert_not_called()
+    mock_uploader.upload.assert_called_once()
+
+
+def test_keeps_lease_of_acknowledged_message_until_it_expires(tmpdir):
+    inbox_entry = mock_inbox_entry()
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        lease_store=LocalFileLeaseStore(str(tmpdir), "this-replica", ttl_sec=60),
+    )
+
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.return_value.acknowledge.assert_called_once()
+    other_replica = LocalFileLeaseStore(str(tmpdir), "other-replica", ttl_sec=60)
+    assert other_replica.try_acquire(inbox_entry.id) is None
+
+
+def test_records_messages_leased_by_another_replica():
+    inbox_entry = mock_inbox_entry()
+    lease_store = MagicMock()
+    lease_store.try_acquire.return_value = None
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_forwarder(inbox_entries=[inbox_entry], probe=probe, lease_store=lease_store)
+
+    forwarder.forward_messages()
+
+    forward_message_event.record_leased_elsewhere.assert_called_once_with(inbox_entry.id)
+    forward_message_event.finish.assert_called_once()
+
+
+def test_releases_lease_when_forwarding_fails():
+    lease_store = MagicMock()
+    lease = Lease(a_string(), "token")
+    lease_store.try_acquire.return_value = lease
+
+    forwarder = build_forwarder(
+        inbox_entries=[mock_inbox_entry(retrieve_error=mesh_client_error())],
+        lease_store=lease_store,
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    lease_store.release.assert_called_once_with(lease)
+
+
+def test_only_acknowledges_messages_found_in_forwarded_index():
+    inbox_entry = mock_inbox_entry()
+    forwarded_message = ForwardedMessage(inbox_entry.id, a_string(), 42)
+    forwarded_index = MagicMock()
+    forwarded_index.get.return_value = forwarded_message
+    mock_uploader = MagicMock()
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        s3_uploader=mock_uploader,
+        probe=probe,
+        forwarded_index=forwarded_index,
+    )
+
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_not_called()
+    mock_uploader.upload.assert_not_called()
+    inbox_entry.acknowledge.assert_called_once()
+    forwarded_index.remove.assert_called_once_with(inbox_entry.id)
+    forward_message_event.record_forwarded_index_hit.assert_called_once_with(forwarded_message)
+
+
+def test_records_uploaded_message_in_forwarded_index_until_acknowledged():
+    message = mock_mesh_message(acknowledge_error=mesh_client_error())
+    message.bytes_read = 42
+    forwarded_index = MagicMock()
+    forwarded_index.get.return_value = None
+    mock_uploader = MagicMock()
+    mock_uploader.upload.return_value = "a_key"
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_forwarder(
+        incoming_messages=[message],
+        s3_uploader=mock_uploader,
+        probe=probe,
+        forwarded_index=forwarded_index,
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    forwarded_index.record.assert_called_once_with(ForwardedMessage(message.id, "a_key", 42))
+    forwarded_index.remove.assert_not_called()
+    forward_message_event.record_forwarded_index_miss.assert_called_once()
+
+
+def test_removes_acknowledged_message_from_forwarded_index():
+    message = mock_mesh_message()
+    forwarded_index = MagicMock()
+    forwarded_index.get.return_value = None
+
+    forwarder = build_forwarder(incoming_messages=[message], forwarded_index=forwarded_index)
+
+    forwarder.forward_messages()
+
+    message.acknowledge.assert_called_once()
+    forwarded_index.remove.assert_called_once_with(message.id)
+
+
+def test_journals_claim_upload_and_acknowledge_of_each_message():
+    message = mock_mesh_message()
+    journal = MagicMock()
+    mock_uploader = MagicMock()
+    mock_uploader.upload.return_value = "a_key"
+
+    forwarder = build_forwarder(
+        incoming_messages=[message], s3_uploader=mock_uploader, journal=journal
+    )
+
+    forwarder.forward_messages()
+
+    assert journal.mock_calls == [
+        call.record_claimed(message.id),
+        call.record_uploaded(message.id, "a_key"),
+        call.record_acknowledged(message.id),
+    ]
+
+
+def test_acknowledges_messages_uploaded_before_an_interruption():
+    journal = MagicMock()
+    journal.interrupted_entries.return_value = [
+        JournalEntry("downloading", CLAIMED),
+        JournalEntry("uploaded", UPLOADED, "a_key"),
+    ]
+    forwarder = build_forwarder(journal=journal)
+    mesh_inbox = forwarder._inbox
+
+    forwarder.recover_interrupted_forwards()
+
+    mesh_inbox.entry.assert_called_once_with("uploaded")
+    mesh_inbox.entry.return_value.acknowledge.assert_called_once()
+    mesh_inbox.entry.return_value.retrieve.assert_not_called()
+    journal.record_acknowledged.assert_called_once_with("uploaded")
+
+
+def test_records_error_and_keeps_journal_entry_when_recovering_acknowledge_fails():
+    journal = MagicMock()
+    journal.interrupted_entries.return_value = [JournalEntry("uploaded", UPLOADED, "a_key")]
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    forwarder = build_forwarder(journal=journal, probe=probe)
+    network_error = MeshClientNetworkError("Oh no!")
+    forwarder._inbox.entry.return_value.acknowledge.side_effect = network_error
+
+    forwarder.recover_interrupted_forwards()
+
+    forward_message_event.record_mesh_client_network_error.assert_called_once_with(network_error)
+    forward_message_event.finish.assert_called_once()
+    journal.record_acknowledged.assert_not_called()
+
+
+def test_closes_uploader_when_closed():
+    mock_uploader = MagicMock()
+
+    build_forwarder(s3_uploader=mock_uploader).close()
+
+    mock_uploader.close.assert_called_once()
+
+
+def test_closes_inbox_when_closed():
+    forwarder = build_forwarder()
+    mesh_inbox = forwarder._inbox
+
+    forwarder.close()
+
+    mesh_inbox.close.assert_called_once()
+
+
+def test_closes_forwarded_index_and_journal_when_closed():
+    forwarded_index = MagicMock()
+    journal = MagicMock()
+
+    build_forwarder(forwarded_index=forwarded_index, journal=journal).close()
+
+    forwarded_index.close.assert_called_once()
+    journal.close.assert_called_once()
+
+
+def test_retries_a_message_after_the_rest_of_the_batch():
+    message = mock_mesh_message()
+    flaky_entry = mock_inbox_entry(message)
+    flaky_entry.retrieve.side_effect = [mesh_client_error(), message]
+    other_entry = mock_inbox_entry()
+    retrieved = []
+    other_entry.retrieve.side_effect = lambda: retrieved.append(other_entry.id) or DEFAULT
+    message.acknowledge.side_effect = lambda: retrieved.append(flaky_entry.id)
+
+    forwarder = build_forwarder(
+        inbox_entries=[flaky_entry, other_entry],
+        retry_config=MessageRetryConfig(backoff_sec=0),
+    )
+
+    forwarder.forward_messages()
+
+    assert retrieved == [other_entry.id, flaky_entry.id]
+    assert flaky_entry.retrieve.call_count == 2
+
+
+def test_stops_waiting_to_retry_messages_once_stopped():
+    inbox_entry = mock_inbox_entry(retrieve_error=mesh_client_error())
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        retry_config=MessageRetryConfig(backoff_sec=60, max_backoff_sec=60),
+    )
+
+    forwarder.stop()
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_called_once()
+
+
+def test_records_attempt_on_each_forward_event():
+    probe = MagicMock()
+    message = mock_mesh_message()
+    inbox_entry = mock_inbox_entry(message)
+    inbox_entry.retrieve.side_effect = [mesh_client_error(), message]
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        probe=probe,
+        retry_config=MessageRetryConfig(backoff_sec=0),
+    )
+
+    forwarder.forward_messages()
+
+    assert probe.new_forward_message_event().record_attempt.call_args_list == [call(1), call(2)]
+
+
+def test_leaves_message_for_next_poll_when_retries_are_exhausted():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    inbox_entry = mock_inbox_entry(retrieve_error=mesh_client_error())
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        probe=probe,
+        retry_config=MessageRetryConfig(max_attempts=2, backoff_sec=0),
+    )
+
+    assert forwarder.forward_messages() == 1
+    assert inbox_entry.retrieve.call_count == 2
+    forward_message_event.record_retries_exhausted.assert_called_once()
+
+
+def test_aborts_batch_when_failures_look_systemic():
+    failing_entries = [mock_inbox_entry(retrieve_error=mesh_client_error()) for _ in range(2)]
+    untouched_entry = mock_inbox_entry()
+
+    forwarder = build_forwarder(
+        inbox_entries=[*failing_entries, untouched_entry],
+        retry_config=MessageRetryConfig(backoff_sec=0, systemic_failures=2),
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    untouched_entry.retrieve.assert_not_called()
+
+
+def test_aborts_concurrent_batch_when_failures_look_systemic():
+    failing_entries = [mock_inbox_entry(retrieve_error=mesh_client_error()) for _ in range(2)]
+
+    forwarder = build_forwarder(
+        inbox_entries=failing_entries,
+        worker_count=2,
+        retry_config=MessageRetryConfig(backoff_sec=0, systemic_failures=2),
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+
+def test_quarantines_poison_message_to_dead_letter_prefix_and_acknowledges_it():
+    mock_uploader = MagicMock()
+    header_error = _a_missing_header_exception()
+    message = mock_mesh_message(validation_error=header_error)
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_forwarder(
+        incoming_messages=[message],
+        s3_uploader=mock_uploader,
+        probe=probe,
+        quarantine=DeadLetterQuarantine(mock_uploader, "dead-letter/"),
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_not_called()
+    mock_uploader.upload_dead_letter.assert_called_once_with(
+        message, "dead-letter/", forward_message_event
+    )
+    message.acknowledge.assert_called_once()
+    forward_message_event.record_missing_mesh_header.assert_called_once_with(header_error)
+
+
+def test_quarantines_message_whose_metadata_cannot_be_read():
+    mock_uploader = MagicMock()
+    message = mock_mesh_message()
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    forward_message_event.record_message_metadata.side_effect = _a_missing_header_exception()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_forwarder(
+        incoming_messages=[message],
+        s3_uploader=mock_uploader,
+        probe=probe,
+        quarantine=DeadLetterQuarantine(mock_uploader, "dead-letter/"),
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload_dead_letter.assert_called_once()
+    message.acknowledge.assert_called_once()
+
+
+def test_skips_quarantined_poison_message_on_later_polls_without_retrieving_it():
+    inbox_entry = mock_inbox_entry(
+        mock_mesh_message(validation_error=an_invalid_header_exception())
+    )
+
+    forwarder = build_forwarder(inbox_entries=[inbox_entry], quarantine=SkipQuarantine(10))
+
+    forwarder.forward_messages()
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_called_once()
+    inbox_entry.acknowledge.assert_not_called()
+
+
+def test_records_poison_message_count_on_poll_event():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    quarantine = SkipQuarantine(10)
+    quarantine.poison_count = 4
+
+    forwarder = build_forwarder(probe=probe, quarantine=quarantine)
+
+    forwarder.forward_messages()
+
+    poll_inbox_event.record_poison_messages.assert_called_once_with(4)
+
+
+def _a_skip_quarantine_of(inbox_entries):
+    quarantine = SkipQuarantine(len(inbox_entries))
+    for inbox_entry in inbox_entries:
+        quarantine.quarantine(inbox_entry, MagicMock())
+    return quarantine
+
+
+def test_counts_skipped_poison_messages_towards_the_backlog():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    inbox_entries = [mock_inbox_entry() for _ in range(MESH_INBOX_PAGE_LIMIT)]
+
+    forwarder = build_forwarder(
+        inbox_entries=inbox_entries,
+        probe=probe,
+        quarantine=_a_skip_quarantine_of(inbox_entries[:10]),
+        inbox_message_count=2000,
+    )
+
+    batch_count = forwarder.forward_messages()
+
+    assert batch_count == MESH_INBOX_PAGE_LIMIT
+    assert forwarder.has_backlog(batch_count) is True
+    poll_inbox_event.record_skipped_messages.assert_called_once_with(10)
+    poll_inbox_event.record_backlog_remaining.assert_called_once_with(None)
+    inbox_entries[0].retrieve.assert_not_called()
+
+
+def test_does_not_repoll_a_page_of_only_skipped_poison_messages():
+    poison_entries = [mock_inbox_entry() for _ in range(MESH_INBOX_PAGE_LIMIT)]
+    mesh_inbox = MagicMock()
+
+    forwarder = build_forwarder(
+        mesh_inbox=mesh_inbox,
+        inbox_entries=poison_entries,
+        quarantine=_a_skip_quarantine_of(poison_entries),
+        inbox_message_count=MESH_INBOX_PAGE_LIMIT,
+    )
+
+    batch_count = forwarder.forward_messages()
+
+    assert forwarder.has_backlog(batch_count) is False
+    mesh_inbox.count_messages.assert_not_called()
+
+
+def test_warns_when_skipped_poison_messages_fill_the_inbox_page(caplog):
+    poison_entries = [mock_inbox_entry() for _ in range(MESH_INBOX_PAGE_LIMIT)]
+    forwarder = build_forwarder(
+        inbox_entries=poison_entries, quarantine=_a_skip_quarantine_of(poison_entries)
+    )
+
+    forwarder.forward_messages()
+
+    assert "skipped poison message" in caplog.text
+
+
+def _an_inbox_entry_with_headers(message=None, validation_error=None, size_bytes=2048):
+    inbox_entry = mock_inbox_entry(message)
+    headers = inbox_entry.retrieve_headers.return_value
+    headers.id = inbox_entry.id
+    headers.size_bytes = size_bytes
+    headers.validate.side_effect = validation_error
+    return inbox_entry
+
+
+def test_does_not_retrieve_body_of_message_rejected_on_headers():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    header_error = an_invalid_header_exception()
+    inbox_entry = _an_inbox_entry_with_headers(validation_error=header_error)
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry], probe=probe, validate_headers_first=True
+    )
+
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_not_called()
+    forward_message_event.record_body_download_avoided.assert_called_once_with(2048)
+    forward_message_event.record_invalid_mesh_header.assert_called_once_with(header_error)
+
+
+def test_retrieves_body_of_message_with_valid_headers():
+    message = mock_mesh_message()
+    inbox_entry = _an_inbox_entry_with_headers(message)
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry], s3_uploader=mock_uploader, validate_headers_first=True
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_called_once_with(message, ANY)
+    message.acknowledge.assert_called_once()
+
+
+def test_skip_quarantines_message_rejected_on_headers():
+    inbox_entry = _an_inbox_entry_with_headers(validation_error=_a_missing_header_exception())
+    quarantine = SkipQuarantine(10)
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry], quarantine=quarantine, validate_headers_first=True
+    )
+
+    forwarder.forward_messages()
+
+    assert quarantine.should_skip(inbox_entry.id) is True
+    inbox_entry.retrieve.assert_not_called()
+
+
+def test_retrieves_body_of_message_rejected_on_headers_for_dead_letter_quarantine():
+    message = mock_mesh_message(validation_error=_a_missing_header_exception())
+    inbox_entry = _an_inbox_entry_with_headers(
+        message, validation_error=_a_missing_header_exception()
+    )
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        inbox_entries=[inbox_entry],
+        quarantine=DeadLetterQuarantine(mock_uploader, "dead-letter/"),
+        validate_headers_first=True,
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload_dead_letter.assert_called_once_with(message, "dead-letter/", ANY)
+    message.acknowledge.assert_called_once()
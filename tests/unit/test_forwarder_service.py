@@ -1,13 +1,28 @@
 import logging
+from threading import Event
 from unittest.mock import MagicMock, call, patch
 
+import pytest
+
 from s3mesh.forwarder import RetryableException
-from s3mesh.forwarder_service import MeshToS3ForwarderService
+from s3mesh.forwarder_service import (
+    ForwardingConfig,
+    MeshToS3ForwarderService,
+    MultiMailboxForwarderService,
+    S3Config,
+    build_forwarder_service,
+    build_multi_mailbox_forwarder_service,
+)
+from s3mesh.quarantine import SKIP_QUARANTINE, QuarantineConfig
+from s3mesh.retry import MessageRetryConfig
+from s3mesh.s3 import UploadConfig
+from s3mesh.scheduler import BACKOFF_POLL_DELAY, BURST_POLL_DELAY, IDLE_POLL_DELAY, PollDelay
+from s3mesh.spool_queue import SpoolQueueConfig
 
 
 def test_calls_forward_messages_multiple_times_until_exit_event_is_set():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.return_value = False
+    forwarder.has_backlog.return_value = True
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, False, False, True]
 
@@ -21,7 +36,7 @@ def test_calls_forward_messages_multiple_times_until_exit_event_is_set():
 
 def test_logs_start_and_exit_of_the_service():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.return_value = False
+    forwarder.has_backlog.return_value = True
     exit_event = MagicMock()
     exit_event.is_set.return_value = True
 
@@ -53,11 +68,12 @@ def test_sets_exit_event_and_logs_request_to_stop_when_calling_stop():
 
     mock_info.assert_called_once_with("Received request to stop")
     exit_event.set.assert_called_once()
+    forwarder.stop.assert_called_once()
 
 
-def test_waits_when_mailbox_is_empty():
+def test_waits_when_there_is_no_backlog():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.return_value = True
+    forwarder.has_backlog.return_value = False
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, True]
 
@@ -69,9 +85,9 @@ def test_waits_when_mailbox_is_empty():
     exit_event.wait.assert_called_once_with(60)
 
 
-def test_does_not_wait_when_mailbox_is_not_empty():
+def test_does_not_wait_when_there_is_a_backlog():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.return_value = False
+    forwarder.has_backlog.return_value = True
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, True]
 
@@ -86,7 +102,7 @@ def test_does_not_wait_when_mailbox_is_not_empty():
 def test_waits_when_forward_messages_raises_retryable_exception():
     forwarder = MagicMock()
     forwarder.forward_messages.side_effect = RetryableException()
-    forwarder.is_mailbox_empty.return_value = False
+    forwarder.has_backlog.return_value = True
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, True]
 
@@ -98,9 +114,9 @@ def test_waits_when_forward_messages_raises_retryable_exception():
     exit_event.wait.assert_called_once_with(60)
 
 
-def test_waits_when_is_mailbox_empty_raises_retryable_exception():
+def test_waits_when_checking_for_backlog_raises_retryable_exception():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.side_effect = RetryableException()
+    forwarder.has_backlog.side_effect = RetryableException()
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, True]
 
@@ -114,7 +130,7 @@ def test_waits_when_is_mailbox_empty_raises_retryable_exception():
 
 def test_keeps_iterating_after_retryable_exception_was_caught():
     forwarder = MagicMock()
-    forwarder.is_mailbox_empty.side_effect = [RetryableException(), False]
+    forwarder.has_backlog.side_effect = [RetryableException(), True]
     exit_event = MagicMock()
     exit_event.is_set.side_effect = [False, False, True]
 
@@ -125,3 +141,346 @@ def test_keeps_iterating_after_retryable_exception_was_caught():
     forwarder_service.start()
 
     assert forwarder.forward_messages.call_count == 2
+
+
+def test_closes_forwarder_when_exiting():
+    forwarder = MagicMock()
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, exit_event=exit_event
+    )
+    forwarder_service.start()
+
+    forwarder.close.assert_called_once()
+
+
+def test_starts_metrics_exporters_and_closes_them_when_exiting():
+    forwarder = MagicMock()
+    exporter = MagicMock()
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder,
+        poll_frequency_sec=0,
+        exit_event=exit_event,
+        metrics_exporters=[exporter],
+    )
+    forwarder_service.start()
+
+    exporter.start.assert_called_once()
+    exporter.close.assert_called_once()
+
+
+def test_closes_forwarder_and_metrics_exporters_when_forwarding_fails_unexpectedly():
+    forwarder = MagicMock()
+    forwarder.forward_messages.side_effect = OSError("disk full")
+    exporter = MagicMock()
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, metrics_exporters=[exporter]
+    )
+    with pytest.raises(OSError):
+        forwarder_service.start()
+
+    forwarder.close.assert_called_once()
+    exporter.close.assert_called_once()
+
+
+def test_waits_for_delay_chosen_by_poll_scheduler():
+    forwarder = MagicMock()
+    forwarder.forward_messages.return_value = 4
+    forwarder.has_backlog.return_value = False
+    poll_scheduler = MagicMock()
+    poll_scheduler.after_success.return_value = PollDelay(7.5, BURST_POLL_DELAY)
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder,
+        poll_frequency_sec=60,
+        exit_event=exit_event,
+        poll_scheduler=poll_scheduler,
+    )
+    forwarder_service.start()
+
+    poll_scheduler.after_success.assert_called_once_with(4, False)
+    forwarder.has_backlog.assert_called_once_with(4)
+    exit_event.wait.assert_called_once_with(7.5)
+
+
+def test_asks_poll_scheduler_for_delay_after_retryable_exception():
+    forwarder = MagicMock()
+    forwarder.forward_messages.side_effect = RetryableException()
+    poll_scheduler = MagicMock()
+    poll_scheduler.after_failure.return_value = PollDelay(12, BACKOFF_POLL_DELAY)
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder,
+        poll_frequency_sec=60,
+        exit_event=exit_event,
+        poll_scheduler=poll_scheduler,
+    )
+    forwarder_service.start()
+
+    exit_event.wait.assert_called_once_with(12)
+
+
+def test_passes_previous_poll_delay_to_next_forward():
+    forwarder = MagicMock()
+    forwarder.has_backlog.return_value = False
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, False, True]
+
+    forwarder_service = MeshToS3ForwarderService(
+        forwarder=forwarder, poll_frequency_sec=60, exit_event=exit_event
+    )
+    forwarder_service.start()
+
+    forwarder.forward_messages.assert_has_calls([call(None), call(PollDelay(60, IDLE_POLL_DELAY))])
+
+
+def test_multi_mailbox_service_runs_every_mailbox_service():
+    services = {"gp2gp": MagicMock(), "pds": MagicMock()}
+
+    MultiMailboxForwarderService(services).start()
+
+    services["gp2gp"].start.assert_called_once()
+    services["pds"].start.assert_called_once()
+
+
+def test_multi_mailbox_service_stops_every_mailbox_when_one_of_them_exits():
+    exit_event = Event()
+    stopped_service = MagicMock()
+    running_service = MagicMock()
+    running_service.start.side_effect = lambda: exit_event.wait(timeout=1)
+
+    MultiMailboxForwarderService(
+        {"gp2gp": stopped_service, "pds": running_service}, exit_event
+    ).start()
+
+    assert exit_event.is_set()
+    stopped_service.stop.assert_called_once()
+    running_service.stop.assert_called_once()
+
+
+def test_multi_mailbox_service_raises_the_failure_of_a_crashed_mailbox():
+    exit_event = Event()
+    crashed_service = MagicMock()
+    crashed_service.start.side_effect = OSError("disk full")
+    running_service = MagicMock()
+    running_service.start.side_effect = lambda: exit_event.wait(timeout=1)
+
+    with pytest.raises(OSError):
+        MultiMailboxForwarderService(
+            {"gp2gp": crashed_service, "pds": running_service}, exit_event
+        ).start()
+
+    running_service.stop.assert_called_once()
+
+
+def test_multi_mailbox_service_starts_and_closes_metrics_exporters():
+    exporter = MagicMock()
+
+    MultiMailboxForwarderService({"a": MagicMock()}, metrics_exporters=[exporter]).start()
+
+    exporter.start.assert_called_once()
+    exporter.close.assert_called_once()
+
+
+def test_multi_mailbox_service_sets_exit_event_and_stops_every_mailbox_when_calling_stop():
+    exit_event = Event()
+    service = MagicMock()
+
+    MultiMailboxForwarderService({"a": service}, exit_event).stop()
+
+    assert exit_event.is_set()
+    service.stop.assert_called_once()
+
+
+def test_multi_mailbox_service_requires_pool_forwarding_engine():
+    with pytest.raises(ValueError):
+        build_multi_mailbox_forwarder_service(
+            [], max_concurrency=1, forwarding_config=ForwardingConfig(engine="pipeline")
+        )
+
+
+def test_leasing_is_not_supported_by_asyncio_engine():
+    with pytest.raises(ValueError):
+        build_forwarder_service(
+            MagicMock(),
+            MagicMock(),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(engine="asyncio"),
+            lease_store=MagicMock(),
+        )
+
+
+@pytest.mark.parametrize(
+    "forwarding_config",
+    [
+        ForwardingConfig(engine="asyncio"),
+        ForwardingConfig(engine="pipeline"),
+        ForwardingConfig(spool_queue=SpoolQueueConfig("a_directory")),
+    ],
+)
+def test_forwarded_index_is_only_supported_by_pool_engine(forwarding_config):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            MagicMock(),
+            poll_frequency_sec=1,
+            forwarding_config=forwarding_config,
+            forwarded_index=MagicMock(),
+        )
+
+    assert str(e.value).startswith("The forwarded message index is not supported by the")
+
+
+@pytest.mark.parametrize(
+    "forwarding_config",
+    [
+        ForwardingConfig(engine="asyncio"),
+        ForwardingConfig(engine="pipeline"),
+        ForwardingConfig(spool_queue=SpoolQueueConfig("a_directory")),
+    ],
+)
+def test_forward_journal_is_only_supported_by_pool_engine(forwarding_config):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            MagicMock(),
+            poll_frequency_sec=1,
+            forwarding_config=forwarding_config,
+            journal=MagicMock(),
+        )
+
+    assert str(e.value).startswith("The forward journal is not supported by the")
+
+
+def test_s3_compression_is_not_supported_by_asyncio_engine():
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None, upload=UploadConfig(compression="gzip")),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(engine="asyncio"),
+        )
+
+    assert str(e.value) == "S3 compression is not supported by the asyncio forwarding engine"
+
+
+def test_digesting_uploads_is_not_supported_by_asyncio_engine():
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None, upload=UploadConfig(digest_algorithm="sha256")),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(engine="asyncio"),
+        )
+
+    assert str(e.value) == "Digesting uploads is not supported by the asyncio forwarding engine"
+
+
+@pytest.mark.parametrize(
+    "forwarding_config, setting",
+    [
+        (ForwardingConfig(engine="asyncio", worker_count=4), "Forwarding with several workers"),
+        (ForwardingConfig(engine="asyncio", chunk_read_ahead=2), "MESH chunk read-ahead"),
+        (ForwardingConfig(engine="asyncio", max_in_flight_bytes=1024), "Capping in-flight bytes"),
+    ],
+)
+def test_thread_pool_settings_are_not_supported_by_asyncio_engine(forwarding_config, setting):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None),
+            poll_frequency_sec=1,
+            forwarding_config=forwarding_config,
+        )
+
+    assert str(e.value) == f"{setting} is not supported by the asyncio forwarding engine"
+
+
+@pytest.mark.parametrize("engine", ["asyncio", "pipeline"])
+def test_message_retry_settings_are_only_supported_by_pool_engine(engine):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(
+                engine=engine, message_retry=MessageRetryConfig(max_attempts=5)
+            ),
+        )
+
+    assert str(e.value).startswith("Retrying messages within a poll is not supported by the")
+
+
+def test_default_message_retry_settings_are_accepted_by_pipeline_engine():
+    with patch("s3mesh.forwarder_service.boto3"):
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(
+                engine="pipeline", message_retry=MessageRetryConfig()
+            ),
+        )
+
+
+@pytest.mark.parametrize("engine", ["asyncio", "pipeline"])
+def test_quarantine_is_only_supported_by_pool_engine(engine):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(
+                engine=engine, quarantine=QuarantineConfig(SKIP_QUARANTINE)
+            ),
+        )
+
+    assert str(e.value).startswith("Quarantining poison messages is not supported by the")
+
+
+@pytest.mark.parametrize("engine", ["asyncio", "pipeline"])
+def test_validating_headers_first_is_only_supported_by_pool_engine(engine):
+    with pytest.raises(ValueError) as e:
+        build_forwarder_service(
+            MagicMock(),
+            S3Config("a_bucket", None),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(engine=engine, validate_headers_first=True),
+        )
+
+    assert str(e.value).startswith("Validating headers first is not supported by the")
+
+
+def test_spool_queue_requires_pool_forwarding_engine():
+    with pytest.raises(ValueError):
+        build_forwarder_service(
+            MagicMock(),
+            MagicMock(),
+            poll_frequency_sec=1,
+            forwarding_config=ForwardingConfig(
+                engine="pipeline", spool_queue=SpoolQueueConfig("a_directory")
+            ),
+        )
+
+
+def test_recovers_interrupted_forwards_and_starts_forwarder_before_polling():
+    forwarder = MagicMock()
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+
+    MeshToS3ForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, exit_event=exit_event
+    ).start()
+
+    assert forwarder.mock_calls[:2] == [call.recover_interrupted_forwards(), call.start()]
+    forwarder.forward_messages.assert_called_once()
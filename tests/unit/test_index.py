@@ -0,0 +1,48 @@
+from os import path
+
+from s3mesh.index import ForwardedMessage, ForwardedMessageIndex
+
+
+def test_returns_recorded_message(tmpdir):
+    index = ForwardedMessageIndex(path.join(tmpdir, "index.db"), max_entries=10)
+    forwarded_message = ForwardedMessage("msg-1", "2020/11/02/a_file.dat", 42)
+
+    index.record(forwarded_message)
+
+    assert index.get("msg-1") == forwarded_message
+
+
+def test_returns_none_for_unknown_message(tmpdir):
+    index = ForwardedMessageIndex(path.join(tmpdir, "index.db"), max_entries=10)
+
+    assert index.get("msg-1") is None
+
+
+def test_forgets_removed_message(tmpdir):
+    index = ForwardedMessageIndex(path.join(tmpdir, "index.db"), max_entries=10)
+    index.record(ForwardedMessage("msg-1", "a_key", 42))
+
+    index.remove("msg-1")
+
+    assert index.get("msg-1") is None
+
+
+def test_evicts_oldest_messages_beyond_max_entries(tmpdir):
+    index = ForwardedMessageIndex(path.join(tmpdir, "index.db"), max_entries=2)
+
+    for message_id in ["msg-1", "msg-2", "msg-3"]:
+        index.record(ForwardedMessage(message_id, "a_key", 42))
+
+    assert len(index) == 2
+    assert index.get("msg-1") is None
+    assert index.get("msg-3") is not None
+
+
+def test_persists_messages_across_restarts(tmpdir):
+    index_path = path.join(tmpdir, "index.db")
+    forwarded_message = ForwardedMessage("msg-1", "a_key", 42)
+    index = ForwardedMessageIndex(index_path, max_entries=10)
+    index.record(forwarded_message)
+    index.close()
+
+    assert ForwardedMessageIndex(index_path, max_entries=10).get("msg-1") == forwarded_message
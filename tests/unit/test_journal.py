@@ -0,0 +1,70 @@
+import json
+from os import path
+
+from s3mesh.journal import CLAIMED, UPLOADED, ForwardJournal, JournalEntry
+
+
+def _read_lines(journal_path):
+    with open(journal_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_appends_each_transition(tmpdir):
+    journal_path = path.join(tmpdir, "forward.journal")
+    journal = ForwardJournal(journal_path, compact_after_entries=100)
+
+    journal.record_claimed("msg-1")
+    journal.record_uploaded("msg-1", "a_key", etag='"etag"')
+    journal.record_acknowledged("msg-1")
+
+    assert [line["state"] for line in _read_lines(journal_path)] == [
+        "CLAIMED",
+        "UPLOADED",
+        "ACKNOWLEDGED",
+    ]
+    assert journal.pending_entries() == []
+
+
+def test_reports_interrupted_forwards_after_restart(tmpdir):
+    journal_path = path.join(tmpdir, "forward.journal")
+    journal = ForwardJournal(journal_path, compact_after_entries=100)
+    journal.record_claimed("downloading")
+    journal.record_claimed("uploaded")
+    journal.record_uploaded("uploaded", "a_key")
+    journal.record_claimed("acknowledged")
+    journal.record_uploaded("acknowledged", "another_key")
+    journal.record_acknowledged("acknowledged")
+    journal.close()
+
+    restarted_journal = ForwardJournal(journal_path, compact_after_entries=100)
+
+    assert restarted_journal.interrupted_entries() == [
+        JournalEntry("downloading", CLAIMED),
+        JournalEntry("uploaded", UPLOADED, "a_key"),
+    ]
+    assert restarted_journal.pending_entries() == [JournalEntry("uploaded", UPLOADED, "a_key")]
+
+
+def test_compacts_journal_to_pending_entries(tmpdir):
+    journal_path = path.join(tmpdir, "forward.journal")
+    journal = ForwardJournal(journal_path, compact_after_entries=4)
+
+    journal.record_claimed("msg-1")
+    journal.record_uploaded("msg-1", "a_key")
+    journal.record_acknowledged("msg-1")
+    journal.record_claimed("msg-2")
+
+    assert _read_lines(journal_path) == [
+        {"message_id": "msg-2", "state": "CLAIMED", "s3_key": None, "etag": None}
+    ]
+
+
+def test_ignores_a_torn_final_line(tmpdir):
+    journal_path = path.join(tmpdir, "forward.journal")
+    with open(journal_path, "w") as f:
+        f.write(json.dumps({"message_id": "msg-1", "state": "UPLOADED", "s3_key": "a_key"}))
+        f.write('\n{"message_id": "msg-2", "sta')
+
+    journal = ForwardJournal(journal_path, compact_after_entries=100)
+
+    assert journal.interrupted_entries() == [JournalEntry("msg-1", UPLOADED, "a_key")]
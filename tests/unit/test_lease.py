@@ -0,0 +1,186 @@
+import json
+from io import BytesIO
+from os import path
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from s3mesh.lease import Lease, LocalFileLeaseStore, S3LeaseStore, holding_lease
+
+TTL_SEC = 60
+
+
+def _a_client_error(code):
+    return ClientError({"Error": {"Code": code}}, "PutObject")
+
+
+def _a_clock(now=1000.0):
+    clock = MagicMock()
+    clock.return_value = now
+    return clock
+
+
+def _an_existing_lease(expires_at, etag='"existing"'):
+    body = json.dumps({"owner": "other-replica", "expiresAt": expires_at}).encode("utf-8")
+    return {"Body": BytesIO(body), "ETag": etag}
+
+
+def _build_s3_lease_store(s3_client, clock=None):
+    return S3LeaseStore(
+        s3_client,
+        "a-bucket",
+        "leases/",
+        owner="this-replica",
+        ttl_sec=TTL_SEC,
+        clock=clock or _a_clock(),
+    )
+
+
+def test_s3_store_creates_lease_only_if_none_exists():
+    s3_client = MagicMock()
+    s3_client.put_object.return_value = {"ETag": '"new"'}
+
+    lease = _build_s3_lease_store(s3_client, _a_clock(1000.0)).try_acquire("msg-1")
+
+    assert lease == Lease("msg-1", '"new"')
+    s3_client.put_object.assert_called_once_with(
+        Bucket="a-bucket",
+        Key="leases/msg-1",
+        Body=json.dumps({"owner": "this-replica", "expiresAt": 1000.0 + TTL_SEC}),
+        IfNoneMatch="*",
+    )
+
+
+def test_s3_store_does_not_acquire_a_lease_held_by_another_replica():
+    s3_client = MagicMock()
+    s3_client.put_object.side_effect = _a_client_error("PreconditionFailed")
+    s3_client.get_object.return_value = _an_existing_lease(expires_at=1001.0)
+
+    assert _build_s3_lease_store(s3_client, _a_clock(1000.0)).try_acquire("msg-1") is None
+    s3_client.put_object.assert_called_once()
+
+
+def test_s3_store_takes_over_an_expired_lease_with_a_conditional_overwrite():
+    s3_client = MagicMock()
+    s3_client.put_object.side_effect = [_a_client_error("PreconditionFailed"), {"ETag": '"new"'}]
+    s3_client.get_object.return_value = _an_existing_lease(expires_at=999.0, etag='"expired"')
+
+    lease = _build_s3_lease_store(s3_client, _a_clock(1000.0)).try_acquire("msg-1")
+
+    assert lease == Lease("msg-1", '"new"')
+    assert s3_client.put_object.call_args.kwargs["IfMatch"] == '"expired"'
+
+
+def test_s3_store_does_not_acquire_when_another_replica_takes_over_first():
+    s3_client = MagicMock()
+    s3_client.put_object.side_effect = [
+        _a_client_error("PreconditionFailed"),
+        _a_client_error("PreconditionFailed"),
+    ]
+    s3_client.get_object.return_value = _an_existing_lease(expires_at=999.0)
+
+    assert _build_s3_lease_store(s3_client, _a_clock(1000.0)).try_acquire("msg-1") is None
+
+
+def test_s3_store_raises_unexpected_errors():
+    s3_client = MagicMock()
+    s3_client.put_object.side_effect = _a_client_error("AccessDenied")
+
+    with pytest.raises(ClientError):
+        _build_s3_lease_store(s3_client).try_acquire("msg-1")
+
+
+def test_s3_store_releases_only_the_lease_it_wrote():
+    s3_client = MagicMock()
+
+    _build_s3_lease_store(s3_client).release(Lease("msg-1", '"new"'))
+
+    s3_client.delete_object.assert_called_once_with(
+        Bucket="a-bucket", Key="leases/msg-1", IfMatch='"new"'
+    )
+
+
+def test_s3_store_ignores_release_of_a_lease_taken_over_by_another_replica():
+    s3_client = MagicMock()
+    s3_client.delete_object.side_effect = _a_client_error("PreconditionFailed")
+
+    _build_s3_lease_store(s3_client).release(Lease("msg-1", '"new"'))
+
+
+def test_file_store_grants_a_lease_to_one_owner_at_a_time(tmpdir):
+    directory = path.join(tmpdir, "leases")
+    first_replica = LocalFileLeaseStore(directory, "first", TTL_SEC)
+    second_replica = LocalFileLeaseStore(directory, "second", TTL_SEC)
+
+    lease = first_replica.try_acquire("msg-1")
+
+    assert lease is not None
+    assert second_replica.try_acquire("msg-1") is None
+
+    first_replica.release(lease)
+
+    assert second_replica.try_acquire("msg-1") is not None
+
+
+def test_file_store_takes_over_an_expired_lease(tmpdir):
+    clock = _a_clock(1000.0)
+    first_replica = LocalFileLeaseStore(str(tmpdir), "first", TTL_SEC, clock=clock)
+    second_replica = LocalFileLeaseStore(str(tmpdir), "second", TTL_SEC, clock=clock)
+    expired_lease = first_replica.try_acquire("msg-1")
+
+    clock.return_value = 1000.0 + TTL_SEC + 1
+    taken_over_lease = second_replica.try_acquire("msg-1")
+    first_replica.release(expired_lease)
+
+    assert taken_over_lease is not None
+    assert first_replica.try_acquire("msg-1") is None
+
+
+def test_holding_lease_keeps_lease_when_forwarding_succeeds():
+    lease_store = MagicMock()
+    lease_store.try_acquire.return_value = Lease("msg-1", "token")
+
+    with holding_lease(lease_store, "msg-1") as leased:
+        assert leased
+
+    lease_store.release.assert_not_called()
+
+
+def test_file_store_purges_expired_leases(tmpdir):
+    clock = _a_clock(1000.0)
+    lease_store = LocalFileLeaseStore(str(tmpdir), "this-replica", TTL_SEC, clock=clock)
+    lease_store.try_acquire("msg-1")
+
+    clock.return_value = 1000.0 + TTL_SEC + 1
+    lease_store.try_acquire("msg-2")
+
+    assert sorted(path.basename(p) for p in tmpdir.listdir("*.lease")) == ["msg-2.lease"]
+
+
+def test_holding_lease_releases_lease_when_forwarding_fails():
+    lease_store = MagicMock()
+    lease = Lease("msg-1", "token")
+    lease_store.try_acquire.return_value = lease
+
+    with pytest.raises(RuntimeError):
+        with holding_lease(lease_store, "msg-1") as leased:
+            assert leased
+            raise RuntimeError()
+
+    lease_store.release.assert_called_once_with(lease)
+
+
+def test_holding_lease_reports_lease_held_elsewhere():
+    lease_store = MagicMock()
+    lease_store.try_acquire.return_value = None
+
+    with holding_lease(lease_store, "msg-1") as leased:
+        assert not leased
+
+    lease_store.release.assert_not_called()
+
+
+def test_holding_lease_always_leases_without_a_store():
+    with holding_lease(None, "msg-1") as leased:
+        assert leased
@@ -1,62 +1,92 @@
+import gzip
+from io import BytesIO
 from unittest.mock import MagicMock
 
 import pytest
 
-from s3mesh.mesh import MeshClientNetworkError, MeshInbox
+from s3mesh.mesh import (
+    DECOMPRESS_CONTENT_COMPRESSED,
+    MeshClientNetworkError,
+    MeshInbox,
+    UnsuccessfulStatus,
+)
 from tests.builders.common import a_string
 from tests.builders.mesh import (
     TEST_INBOX_URL,
+    build_mex_headers,
     mesh_client_connection_error,
     mesh_client_http_error,
     mock_client_message,
+    mock_mesh_client,
     mock_mesh_inbox,
 )
 
 
-def test_returns_messages():
+def test_lists_inbox_entries():
     message_ids = [a_string(), a_string(), a_string()]
     client_messages = [mock_client_message(message_id=m_id) for m_id in message_ids]
     mesh_inbox = mock_mesh_inbox(client_messages=client_messages)
 
-    actual_messages_ids = [message.id for message in mesh_inbox.read_messages()]
+    actual_messages_ids = [inbox_entry.id for inbox_entry in mesh_inbox.list_messages()]
 
     assert actual_messages_ids == message_ids
 
 
-def test_raises_network_error_when_iterating_all_messages_raises_an_http_error():
-    def mock_iterate_all_messages():
-        raise mesh_client_http_error()
-        yield mock_client_message()
+def test_does_not_retrieve_messages_when_listing():
+    client_messages = [mock_client_message(), mock_client_message()]
+    mesh_client = mock_mesh_client(client_messages=client_messages)
+    mesh_inbox = MeshInbox(mesh_client)
 
-    client_inbox = MagicMock()
-    client_inbox.iterate_all_messages = mock_iterate_all_messages
+    mesh_inbox.list_messages()
 
-    mesh_inbox = MeshInbox(client_inbox)
+    mesh_client.retrieve_message.assert_not_called()
 
-    with pytest.raises(MeshClientNetworkError) as e:
-        mesh_inbox.read_messages()
 
-    assert e.value.error_message == f"400 HTTP Error: Bad request for url: {TEST_INBOX_URL}"
+def test_retrieves_message_from_inbox_entry():
+    message_id = a_string()
+    client_message = mock_client_message(message_id=message_id)
+    mesh_client = mock_mesh_client(client_messages=[client_message])
+    mesh_inbox = MeshInbox(mesh_client)
+
+    inbox_entry = mesh_inbox.list_messages()[0]
+    message = inbox_entry.retrieve()
+
+    mesh_client.retrieve_message.assert_called_once_with(message_id)
+    assert message.id == message_id
+
 
+def test_raises_network_error_when_listing_messages_raises_an_http_error():
+    mesh_inbox = mock_mesh_inbox(list_messages_error=mesh_client_http_error())
 
-def test_raises_network_error_when_iterating_all_messages_raises_a_connection_error():
-    def mock_iterate_all_messages():
-        raise mesh_client_connection_error()
-        yield mock_client_message()
+    with pytest.raises(MeshClientNetworkError) as e:
+        mesh_inbox.list_messages()
+
+    assert e.value.error_message == f"400 HTTP Error: Bad request for url: {TEST_INBOX_URL}"
 
-    client_inbox = MagicMock()
-    client_inbox.iterate_all_messages = mock_iterate_all_messages
 
-    mesh_inbox = MeshInbox(client_inbox)
+def test_raises_network_error_when_listing_messages_raises_a_connection_error():
+    mesh_inbox = mock_mesh_inbox(list_messages_error=mesh_client_connection_error())
 
     with pytest.raises(MeshClientNetworkError) as e:
-        mesh_inbox.read_messages()
+        mesh_inbox.list_messages()
 
     assert e.value.error_message == (
         f"ConnectionError received when attempting to connect to: {TEST_INBOX_URL}"
     )
 
 
+def test_raises_network_error_when_retrieving_a_message_raises_an_http_error():
+    mesh_client = MagicMock()
+    mesh_client.list_messages.return_value = [a_string()]
+    mesh_client.retrieve_message.side_effect = mesh_client_http_error()
+    inbox_entry = MeshInbox(mesh_client).list_messages()[0]
+
+    with pytest.raises(MeshClientNetworkError) as e:
+        inbox_entry.retrieve()
+
+    assert e.value.error_message == f"400 HTTP Error: Bad request for url: {TEST_INBOX_URL}"
+
+
 def test_raises_network_error_when_counting_messages_raises_an_http_error():
     mesh_inbox = mock_mesh_inbox(count_messages_error=mesh_client_http_error())
 
@@ -75,3 +105,91 @@ def test_raises_network_error_when_counting_messages_raises_a_connection_error()
     assert e.value.error_message == (
         f"ConnectionError received when attempting to connect to: {TEST_INBOX_URL}"
     )
+
+
+def test_acknowledges_inbox_entry_without_retrieving_it():
+    message_id = a_string()
+    mesh_client = MagicMock()
+    mesh_client.list_messages.return_value = [message_id]
+    inbox_entry = MeshInbox(mesh_client).list_messages()[0]
+
+    inbox_entry.acknowledge()
+
+    mesh_client.acknowledge_message.assert_called_once_with(message_id)
+    mesh_client.retrieve_message.assert_not_called()
+
+
+def test_raises_network_error_when_acknowledging_an_inbox_entry_raises_an_http_error():
+    mesh_client = MagicMock()
+    mesh_client.list_messages.return_value = [a_string()]
+    mesh_client.acknowledge_message.side_effect = mesh_client_http_error()
+    inbox_entry = MeshInbox(mesh_client).list_messages()[0]
+
+    with pytest.raises(MeshClientNetworkError):
+        inbox_entry.acknowledge()
+
+
+def test_builds_inbox_entry_for_a_known_message_id():
+    message_id = a_string()
+    mesh_client = MagicMock()
+
+    inbox_entry = MeshInbox(mesh_client).entry(message_id)
+
+    assert inbox_entry.id == message_id
+    mesh_client.list_messages.assert_not_called()
+
+
+def test_retrieves_messages_with_the_content_compressed_policy():
+    mex_headers = build_mex_headers(content_compressed="Y")
+    client_message = mock_client_message(mex_headers=mex_headers)
+    client_message.read.side_effect = BytesIO(gzip.compress(b"some data")).read
+    mesh_client = mock_mesh_client(client_messages=[client_message])
+
+    inbox = MeshInbox(mesh_client, DECOMPRESS_CONTENT_COMPRESSED)
+    message = inbox.list_messages()[0].retrieve()
+
+    assert message.read() == b"some data"
+
+
+def _mex_response_headers(**kwargs):
+    headers = {
+        f"Mex-{key.capitalize()}": value for key, value in build_mex_headers(**kwargs).items()
+    }
+    headers["Content-Length"] = "1024"
+    return headers
+
+
+def test_retrieves_headers_without_retrieving_the_message():
+    message_id = a_string()
+    mesh_client = MagicMock()
+    mesh_client.retrieve_message_headers.return_value = _mex_response_headers(
+        file_name="a_file.dat"
+    )
+
+    headers = MeshInbox(mesh_client).entry(message_id).retrieve_headers()
+
+    mesh_client.retrieve_message_headers.assert_called_once_with(message_id)
+    mesh_client.retrieve_message.assert_not_called()
+    assert headers.id == message_id
+    assert headers.file_name == "a_file.dat"
+    assert headers.size_bytes == 1024
+
+
+def test_validates_retrieved_headers():
+    mesh_client = MagicMock()
+    mesh_client.retrieve_message_headers.return_value = _mex_response_headers(
+        status_success="ERROR"
+    )
+
+    headers = MeshInbox(mesh_client).entry(a_string()).retrieve_headers()
+
+    with pytest.raises(UnsuccessfulStatus):
+        headers.validate()
+
+
+def test_raises_network_error_when_retrieving_headers_raises_an_http_error():
+    mesh_client = MagicMock()
+    mesh_client.retrieve_message_headers.side_effect = mesh_client_http_error()
+
+    with pytest.raises(MeshClientNetworkError):
+        MeshInbox(mesh_client).entry(a_string()).retrieve_headers()
@@ -1,6 +1,11 @@
+import gzip
+from io import BytesIO
+from unittest.mock import MagicMock
+
 import pytest
 
 from s3mesh.mesh import (
+    DECOMPRESS_CONTENT_COMPRESSED,
     MESH_MESSAGE_TYPE_DATA,
     MESH_STATUS_EVENT_TRANSFER,
     MESH_STATUS_SUCCESS,
@@ -53,6 +58,15 @@ def test_calls_read_on_underlying_client_message():
     assert actual_value == expected_value
 
 
+def test_calls_close_on_underlying_client_message():
+    client_message = mock_client_message()
+    message = MeshMessage(client_message)
+
+    message.close()
+
+    client_message.close.assert_called_once()
+
+
 def test_exposes_filename():
     mocked_timestamp = a_timestamp()
     mocked_filename = a_filename(mocked_timestamp)
@@ -313,3 +327,91 @@ def test_mesh_network_error_raised_when_ack_raises_connection_error():
     assert e.value.error_message == (
         f"ConnectionError received when attempting to connect to: {TEST_INBOX_URL}"
     )
+
+
+def test_counts_bytes_read_from_underlying_client_message():
+    client_message = mock_client_message()
+    client_message.read.side_effect = [b"some", b"data", b""]
+    message = MeshMessage(client_message)
+
+    while message.read(4):
+        pass
+
+    assert message.bytes_read == 8
+
+
+def test_exposes_chunk_count():
+    mex_headers = {**build_mex_headers(), "chunk-range": "2:5"}
+    client_message = mock_client_message(mex_headers=mex_headers)
+    message = MeshMessage(client_message)
+
+    assert message.chunk_count == 5
+
+
+def test_defaults_chunk_count_to_one_when_message_is_not_chunked():
+    message = MeshMessage(mock_client_message())
+
+    assert message.chunk_count == 1
+
+
+@pytest.mark.parametrize("chunk_range", ["5", "2:", "2:five", "2:0"])
+def test_defaults_chunk_count_to_one_when_chunk_range_is_malformed(chunk_range):
+    mex_headers = {**build_mex_headers(), "chunk-range": chunk_range}
+    message = MeshMessage(mock_client_message(mex_headers=mex_headers))
+
+    assert message.chunk_count == 1
+
+
+def _a_compressed_client_message(body: bytes, content_compressed="Y"):
+    mex_headers = build_mex_headers(content_compressed=content_compressed)
+    client_message = mock_client_message(mex_headers=mex_headers)
+    client_message.read.side_effect = BytesIO(gzip.compress(body)).read
+    return client_message
+
+
+def test_exposes_content_compressed():
+    assert MeshMessage(_a_compressed_client_message(b"data")).content_compressed
+    assert not MeshMessage(mock_client_message()).content_compressed
+
+
+def test_passes_compressed_content_through_by_default():
+    client_message = _a_compressed_client_message(b"some data")
+    message = MeshMessage(client_message)
+
+    assert gzip.decompress(message.read()) == b"some data"
+
+
+def test_decompresses_compressed_content_when_configured():
+    client_message = _a_compressed_client_message(b"some data" * 100)
+    message = MeshMessage(client_message, DECOMPRESS_CONTENT_COMPRESSED)
+
+    body = b""
+    while data := message.read(7):
+        body += data
+
+    assert body == b"some data" * 100
+    assert message.bytes_read == 900
+
+
+def test_does_not_decompress_uncompressed_content():
+    client_message = mock_client_message()
+    client_message.read.side_effect = BytesIO(b"plain").read
+    message = MeshMessage(client_message, DECOMPRESS_CONTENT_COMPRESSED)
+
+    assert message.read() == b"plain"
+
+
+def test_reads_each_header_once():
+    client_message = mock_client_message()
+    mex_header = MagicMock(side_effect=client_message.mex_header)
+    client_message.mex_header = mex_header
+    message = MeshMessage(client_message)
+
+    for _ in range(3):
+        message.file_name
+        message.date_delivered
+        message.sender
+        message.recipient
+
+    read_headers = [header_name for (header_name,), _ in mex_header.call_args_list]
+    assert sorted(read_headers) == sorted(["filename", "statustimestamp", "from", "to"])
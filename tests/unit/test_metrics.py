@@ -0,0 +1,193 @@
+import pytest
+
+from s3mesh.monitoring.error import MESH_CLIENT_NETWORK_ERROR
+from s3mesh.monitoring.event.count import COUNT_MESSAGES_EVENT
+from s3mesh.monitoring.event.forward import FORWARD_MESSAGE_EVENT
+from s3mesh.monitoring.event.poll import POLL_INBOX_EVENT
+from s3mesh.monitoring.metrics import ForwarderMetrics, MetricsRegistry
+from s3mesh.quarantine import DEAD_LETTER_QUARANTINE, SKIP_QUARANTINE
+
+
+def _samples(registry, name):
+    family = next(f for f in registry.collect() if f.name == name)
+    return {
+        (f"{name}{suffix}", labels): value
+        for metric in family.metrics.values()
+        for suffix, labels, value in metric.samples()
+    }
+
+
+def test_counter_accumulates_increments():
+    registry = MetricsRegistry()
+    counter = registry.counter("a_total", "A counter")
+
+    counter.inc()
+    counter.inc(4)
+
+    assert _samples(registry, "a_total") == {("a_total", ()): 5}
+
+
+def test_gauge_keeps_last_value():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("a_gauge", "A gauge")
+
+    gauge.set(3)
+    gauge.set(1)
+
+    assert _samples(registry, "a_gauge") == {("a_gauge", ()): 1}
+
+
+def test_histogram_counts_observations_into_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("a_histogram", "A histogram", (1, 5))
+
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    assert _samples(registry, "a_histogram") == {
+        ("a_histogram_bucket", (("le", "1.0"),)): 2,
+        ("a_histogram_bucket", (("le", "5.0"),)): 3,
+        ("a_histogram_bucket", (("le", "+Inf"),)): 4,
+        ("a_histogram_sum", ()): 14.5,
+        ("a_histogram_count", ()): 4,
+    }
+
+
+def test_returns_the_same_metric_for_the_same_name_and_labels():
+    registry = MetricsRegistry()
+
+    first = registry.counter("a_total", "A counter", {"b": "1", "a": "2"})
+    second = registry.counter("a_total", "A counter", {"a": "2", "b": "1"})
+    other = registry.counter("a_total", "A counter", {"a": "3", "b": "1"})
+
+    assert first is second
+    assert first is not other
+
+
+def test_rejects_a_name_registered_with_another_type():
+    registry = MetricsRegistry()
+    registry.counter("a_metric", "A counter")
+
+    with pytest.raises(ValueError):
+        registry.gauge("a_metric", "A gauge")
+
+
+def test_records_event_fields_as_metrics():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(
+        FORWARD_MESSAGE_EVENT,
+        {"downloadSec": 0.2, "downloadedBytes": 100, "uploadedBytes": 120, "spoolDepth": 3},
+    )
+
+    events = _samples(registry, "s3mesh_events_total")
+    stage_seconds = _samples(registry, "s3mesh_stage_seconds")
+    assert events[("s3mesh_events_total", (("event", FORWARD_MESSAGE_EVENT),))] == 1
+    assert stage_seconds[("s3mesh_stage_seconds_sum", (("stage", "download"),))] == 0.2
+    assert _samples(registry, "s3mesh_downloaded_bytes_total") == {
+        ("s3mesh_downloaded_bytes_total", ()): 100
+    }
+    assert _samples(registry, "s3mesh_uploaded_bytes_total") == {
+        ("s3mesh_uploaded_bytes_total", ()): 120
+    }
+    assert _samples(registry, "s3mesh_message_bytes")[("s3mesh_message_bytes_count", ())] == 1
+    assert _samples(registry, "s3mesh_spool_depth") == {("s3mesh_spool_depth", ()): 3}
+
+
+def test_counts_errors_by_type():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(POLL_INBOX_EVENT, {"error": MESH_CLIENT_NETWORK_ERROR})
+    metrics.record_event(POLL_INBOX_EVENT, {"error": "SOMETHING_NEW"})
+
+    errors = _samples(registry, "s3mesh_errors_total")
+    assert errors[("s3mesh_errors_total", (("error", MESH_CLIENT_NETWORK_ERROR),))] == 1
+    assert errors[("s3mesh_errors_total", (("error", "SOMETHING_NEW"),))] == 1
+
+
+def test_records_quarantined_and_skipped_poison_messages():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(FORWARD_MESSAGE_EVENT, {"quarantine": SKIP_QUARANTINE})
+    metrics.record_event(FORWARD_MESSAGE_EVENT, {"quarantine": SKIP_QUARANTINE})
+    metrics.record_event(POLL_INBOX_EVENT, {"poisonMessages": 2, "skippedMessages": 1})
+
+    assert _samples(registry, "s3mesh_quarantined_messages_total") == {
+        ("s3mesh_quarantined_messages_total", (("quarantine", DEAD_LETTER_QUARANTINE),)): 0,
+        ("s3mesh_quarantined_messages_total", (("quarantine", SKIP_QUARANTINE),)): 2,
+    }
+    assert _samples(registry, "s3mesh_poison_messages") == {("s3mesh_poison_messages", ()): 2}
+    assert _samples(registry, "s3mesh_poll_skipped_messages") == {
+        ("s3mesh_poll_skipped_messages", ()): 1
+    }
+
+
+def test_counts_messages_and_bytes_spilled_to_disk():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(FORWARD_MESSAGE_EVENT, {"spilledToDisk": True, "spilledBytes": 300})
+    metrics.record_event(FORWARD_MESSAGE_EVENT, {"spilledToDisk": True, "spilledBytes": 200})
+
+    assert _samples(registry, "s3mesh_spilled_messages_total") == {
+        ("s3mesh_spilled_messages_total", ()): 2
+    }
+    assert _samples(registry, "s3mesh_spilled_bytes_total") == {
+        ("s3mesh_spilled_bytes_total", ()): 500
+    }
+
+
+def test_accumulates_mesh_connection_usage_of_each_poll():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(
+        POLL_INBOX_EVENT, {"meshNewConnections": 2, "meshPoolWaits": 1, "meshPoolWaitSec": 0.5}
+    )
+    metrics.record_event(
+        POLL_INBOX_EVENT, {"meshNewConnections": 0, "meshPoolWaits": 3, "meshPoolWaitSec": 0.25}
+    )
+
+    assert _samples(registry, "s3mesh_mesh_new_connections_total") == {
+        ("s3mesh_mesh_new_connections_total", ()): 2
+    }
+    assert _samples(registry, "s3mesh_mesh_pool_waits_total") == {
+        ("s3mesh_mesh_pool_waits_total", ()): 4
+    }
+    assert _samples(registry, "s3mesh_mesh_pool_wait_seconds_total") == {
+        ("s3mesh_mesh_pool_wait_seconds_total", ()): 0.75
+    }
+
+
+def test_sets_inbox_depth_from_counts_and_backlog_estimates():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(COUNT_MESSAGES_EVENT, {"inboxMessageCount": 700})
+    metrics.record_event(POLL_INBOX_EVENT, {"backlogRemaining": 0})
+
+    assert _samples(registry, "s3mesh_inbox_messages") == {("s3mesh_inbox_messages", ()): 0}
+
+
+def test_ignores_unset_fields():
+    registry = MetricsRegistry()
+    metrics = ForwarderMetrics(registry)
+
+    metrics.record_event(POLL_INBOX_EVENT, {"batchMessageCount": None, "backlogRemaining": 0})
+
+    assert _samples(registry, "s3mesh_poll_batch_messages") == {
+        ("s3mesh_poll_batch_messages", ()): 0
+    }
+
+
+def test_labels_metrics_of_each_mailbox():
+    registry = MetricsRegistry()
+    ForwarderMetrics(registry, {"mailbox": "a"}).record_event(POLL_INBOX_EVENT, {})
+    ForwarderMetrics(registry, {"mailbox": "b"}).record_event(POLL_INBOX_EVENT, {})
+
+    events = _samples(registry, "s3mesh_events_total")
+    assert events[("s3mesh_events_total", (("event", POLL_INBOX_EVENT), ("mailbox", "a")))] == 1
+    assert events[("s3mesh_events_total", (("event", POLL_INBOX_EVENT), ("mailbox", "b")))] == 1
@@ -0,0 +1,136 @@
+import socket
+from contextlib import contextmanager
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from s3mesh.monitoring.exporters import (
+    PROMETHEUS_CONTENT_TYPE,
+    PrometheusExporter,
+    StatsdExporter,
+    build_metrics_exporters,
+    render_prometheus,
+)
+from s3mesh.monitoring.metrics import MetricsConfig, MetricsRegistry
+
+
+@contextmanager
+def _a_statsd_server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(1)
+    try:
+        yield server
+    finally:
+        server.close()
+
+
+def _received_lines(server) -> list:
+    return server.recv(65536).decode("utf-8").split("\n")
+
+
+def test_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("a_total", "A counter", {"kind": 'say "hi"'}).inc(2)
+    registry.histogram("a_histogram", "A histogram", (1,)).observe(0.5)
+
+    assert render_prometheus(registry) == (
+        "# HELP a_total A counter\n"
+        "# TYPE a_total counter\n"
+        'a_total{kind="say \\"hi\\""} 2\n'
+        "# HELP a_histogram A histogram\n"
+        "# TYPE a_histogram histogram\n"
+        'a_histogram_bucket{le="1.0"} 1\n'
+        'a_histogram_bucket{le="+Inf"} 1\n'
+        "a_histogram_sum 0.5\n"
+        "a_histogram_count 1\n"
+    )
+
+
+def test_serves_metrics_over_http():
+    registry = MetricsRegistry()
+    registry.gauge("a_gauge", "A gauge").set(7)
+    exporter = PrometheusExporter(registry, 0, "127.0.0.1")
+    exporter.start()
+    try:
+        with urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=1) as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+    finally:
+        exporter.close()
+
+    assert content_type == PROMETHEUS_CONTENT_TYPE
+    assert "a_gauge 7\n" in body
+
+
+def test_serves_not_found_outside_metrics_path():
+    exporter = PrometheusExporter(MetricsRegistry(), 0, "127.0.0.1")
+    exporter.start()
+    try:
+        with pytest.raises(HTTPError) as error:
+            urlopen(f"http://127.0.0.1:{exporter.port}/other", timeout=1)
+    finally:
+        exporter.close()
+
+    assert error.value.code == 404
+
+
+def test_pushes_counter_increases_and_gauges_to_statsd():
+    registry = MetricsRegistry()
+    counter = registry.counter("a_total", "A counter", {"kind": "x"})
+    registry.gauge("a_gauge", "A gauge").set(3)
+
+    with _a_statsd_server() as server:
+        exporter = StatsdExporter(registry, "127.0.0.1", server.getsockname()[1], prefix="app")
+        counter.inc(5)
+        exporter.push()
+        first = _received_lines(server)
+        counter.inc(2)
+        exporter.push()
+        second = _received_lines(server)
+        exporter.close()
+
+    assert first == ["app.a_total.x:5|c", "app.a_gauge:3|g"]
+    assert second == ["app.a_total.x:2|c", "app.a_gauge:3|g"]
+
+
+def test_pushes_histograms_to_statsd_as_sum_and_count():
+    registry = MetricsRegistry()
+    registry.histogram("a_histogram", "A histogram", (1,)).observe(0.25)
+
+    with _a_statsd_server() as server:
+        exporter = StatsdExporter(registry, "127.0.0.1", server.getsockname()[1])
+        exporter.push()
+        lines = _received_lines(server)
+        exporter.close()
+
+    assert lines == ["a_histogram.sum:0.25|c", "a_histogram.count:1|c"]
+
+
+def test_splits_statsd_pushes_into_packets_that_fit_a_datagram():
+    registry = MetricsRegistry()
+    for i in range(100):
+        registry.gauge(f"a_long_gauge_name_{i:03d}", "A gauge").set(i)
+
+    with _a_statsd_server() as server:
+        exporter = StatsdExporter(registry, "127.0.0.1", server.getsockname()[1])
+        exporter.push()
+        packets = [server.recv(65536), server.recv(65536)]
+        exporter.close()
+
+    assert all(len(packet) <= 1432 for packet in packets)
+    assert packets[0].startswith(b"a_long_gauge_name_000:0|g\n")
+
+
+def test_builds_configured_exporters():
+    registry = MetricsRegistry()
+
+    exporters = build_metrics_exporters(
+        MetricsConfig(prometheus_port=0, prometheus_address="127.0.0.1", statsd_host="127.0.0.1"),
+        registry,
+    )
+    for exporter in exporters:
+        exporter.close()
+
+    assert [type(exporter) for exporter in exporters] == [PrometheusExporter, StatsdExporter]
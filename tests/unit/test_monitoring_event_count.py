@@ -39,3 +39,13 @@ def test_record_mesh_client_network_error():
     mock_output.log_event.assert_called_with(
         COUNT_MESSAGES_EVENT, {"error": MESH_CLIENT_NETWORK_ERROR, "errorMessage": error_message}
     )
+
+
+def test_record_backlog_remaining():
+    mock_output = MagicMock()
+
+    count_messages_event = CountMessagesEvent(mock_output)
+    count_messages_event.record_backlog_remaining(3)
+    count_messages_event.finish()
+
+    mock_output.log_event.assert_called_with(COUNT_MESSAGES_EVENT, {"backlogRemaining": 3})
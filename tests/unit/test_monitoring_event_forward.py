@@ -1,12 +1,20 @@
 from mock import MagicMock
 
+from s3mesh.index import ForwardedMessage
+from s3mesh.journal import UPLOADED, JournalEntry
 from s3mesh.mesh import InvalidMeshHeader, MissingMeshHeader
 from s3mesh.monitoring.error import (
     INVALID_MESH_HEADER_ERROR,
     MESH_CLIENT_NETWORK_ERROR,
     MISSING_MESH_HEADER_ERROR,
+    S3_ERROR,
+)
+from s3mesh.monitoring.event.forward import (
+    FORWARD_MESSAGE_EVENT,
+    FORWARDED_INDEX_HIT,
+    FORWARDED_INDEX_MISS,
+    ForwardMessageEvent,
 )
-from s3mesh.monitoring.event.forward import FORWARD_MESSAGE_EVENT, ForwardMessageEvent
 from tests.builders.common import a_string
 from tests.builders.mesh import mock_mesh_message
 
@@ -35,6 +43,8 @@ def test_record_message_metadata():
             "sender": message.sender,
             "recipient": message.recipient,
             "fileName": message.file_name,
+            "chunkCount": message.chunk_count,
+            "contentCompressed": False,
         },
     )
 
@@ -101,3 +111,164 @@ def test_record_mesh_client_network_error():
     mock_output.log_event.assert_called_with(
         FORWARD_MESSAGE_EVENT, {"error": MESH_CLIENT_NETWORK_ERROR, "errorMessage": error_message}
     )
+
+
+def test_record_leased_elsewhere():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_leased_elsewhere("msg-1")
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"messageId": "msg-1", "leasedElsewhere": True}
+    )
+
+
+def test_record_forwarded_index_hit():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_forwarded_index_hit(ForwardedMessage("msg-1", "a_key", 42))
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {
+            "messageId": "msg-1",
+            "forwardedIndex": FORWARDED_INDEX_HIT,
+            "s3Key": "a_key",
+            "sizeBytes": 42,
+        },
+    )
+
+
+def test_record_forwarded_index_miss():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_forwarded_index_miss()
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"forwardedIndex": FORWARDED_INDEX_MISS}
+    )
+
+
+def test_record_journal_recovery():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_journal_recovery(JournalEntry("msg-1", UPLOADED, "a_key"))
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"messageId": "msg-1", "journalState": UPLOADED, "s3Key": "a_key"}
+    )
+
+
+def test_record_upload():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_upload("MULTIPART", 1000, 0.5)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"uploadStrategy": "MULTIPART", "uploadedBytes": 1000, "uploadBytesPerSec": 2000},
+    )
+
+
+def test_record_download():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_download(1000, 0.25)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"downloadedBytes": 1000, "downloadBytesPerSec": 4000}
+    )
+
+
+def test_record_spill():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_spill(4096)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"spilledToDisk": True, "spilledBytes": 4096}
+    )
+
+
+def test_record_spool_depth():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_spool_depth(3)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(FORWARD_MESSAGE_EVENT, {"spoolDepth": 3})
+
+
+def test_record_s3_error():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_error(Exception("Slow down"))
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"error": S3_ERROR, "errorMessage": "Slow down"}
+    )
+
+
+def test_record_compression():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_compression("gzip", 7.123, 0.0012345678)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"compression": "gzip", "compressionRatio": 7.12, "compressionCpuSec": 0.001235},
+    )
+
+
+def test_record_digest():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_digest("sha256", "abc123", 1234567.8)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"digestAlgorithm": "sha256", "digest": "abc123", "digestBytesPerSec": 1234568},
+    )
+
+
+def test_record_quarantine():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_quarantine("dead-letter")
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(FORWARD_MESSAGE_EVENT, {"quarantine": "dead-letter"})
+
+
+def test_record_body_download_avoided():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_body_download_avoided(2048)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"bodyDownloadAvoided": True, "bodyBytesAvoided": 2048}
+    )
@@ -1,7 +1,12 @@
+from itertools import count
+
 from mock import MagicMock
 
+from s3mesh.connections import ConnectionStats
 from s3mesh.monitoring.error import MESH_CLIENT_NETWORK_ERROR
+from s3mesh.monitoring.event.base import LISTING_STAGE, POLL_STAGE
 from s3mesh.monitoring.event.poll import POLL_INBOX_EVENT, PollInboxEvent
+from s3mesh.scheduler import BACKOFF_POLL_DELAY, PollDelay
 
 
 def test_finish_calls_log_event_with_event_name():
@@ -36,3 +41,81 @@ def test_record_mesh_client_network_error():
     mock_output.log_event.assert_called_with(
         POLL_INBOX_EVENT, {"error": MESH_CLIENT_NETWORK_ERROR, "errorMessage": error_message}
     )
+
+
+def test_record_poll_delay():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_poll_delay(PollDelay(2.5, BACKOFF_POLL_DELAY))
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        POLL_INBOX_EVENT, {"pollDelaySec": 2.5, "pollDelayReason": BACKOFF_POLL_DELAY}
+    )
+
+
+def test_record_backlog_remaining():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_backlog_remaining(0)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"backlogRemaining": 0})
+
+
+def test_record_mesh_connections():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_mesh_connections(ConnectionStats(3, 2, 0.12345))
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        POLL_INBOX_EVENT, {"meshNewConnections": 3, "meshPoolWaits": 2, "meshPoolWaitSec": 0.123}
+    )
+
+
+def test_record_poison_messages():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_poison_messages(3)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"poisonMessages": 3})
+
+
+def test_record_skipped_messages():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_skipped_messages(2)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"skippedMessages": 2})
+
+
+def test_records_time_spent_in_each_stage():
+    mock_output = MagicMock()
+    clock = count(step=0.5)
+
+    poll_inbox_event = PollInboxEvent(mock_output, clock=lambda: next(clock))
+    with poll_inbox_event.timing(POLL_STAGE):
+        with poll_inbox_event.timing(LISTING_STAGE):
+            pass
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"listingSec": 0.5, "pollSec": 1.5})
+
+
+def test_accumulates_repeated_stage_timings():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_stage_sec(LISTING_STAGE, 0.25)
+    poll_inbox_event.record_stage_sec(LISTING_STAGE, 0.5)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"listingSec": 0.75})
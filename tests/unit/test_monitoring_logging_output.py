@@ -23,3 +23,16 @@ def test_log_event_logs_event_name_in_extra_fields():
     logging_output.log_event(event_name, {})
 
     mock_logger.info.assert_called_with(f"Observed {event_name}", extra={"event": event_name})
+
+
+def test_log_event_includes_common_fields():
+    mock_logger = MagicMock()
+    logging_output = LoggingOutput(mock_logger, common_fields={"mailbox": "gp2gp"})
+    event_name = "AN_EVENT"
+
+    logging_output.log_event(event_name, {"field": "field_value"})
+
+    mock_logger.info.assert_called_with(
+        f"Observed {event_name}",
+        extra={"mailbox": "gp2gp", "field": "field_value", "event": event_name},
+    )
@@ -57,3 +57,29 @@ def test_binds_poll_message_event_to_logger():
     mock_logger.info.assert_called_once_with(
         "Observed POLL_MESSAGE", extra={"event": "POLL_MESSAGE"}
     )
+
+
+def test_adds_common_fields_to_every_event():
+    mock_logger = MagicMock()
+
+    probe = LoggingProbe(mock_logger, common_fields={"mailbox": "gp2gp"})
+
+    probe.new_poll_inbox_event().finish()
+
+    mock_logger.info.assert_called_once_with(
+        "Observed POLL_MESSAGE", extra={"mailbox": "gp2gp", "event": "POLL_MESSAGE"}
+    )
+
+
+def test_records_events_in_metrics_before_logging_them():
+    mock_logger = MagicMock()
+    metrics = MagicMock()
+
+    probe = LoggingProbe(mock_logger, metrics=metrics)
+
+    poll_inbox_event = probe.new_poll_inbox_event()
+    poll_inbox_event.record_message_batch_count(2)
+    poll_inbox_event.finish()
+
+    metrics.record_event.assert_called_once_with("POLL_MESSAGE", {"batchMessageCount": 2})
+    mock_logger.info.assert_called_once()
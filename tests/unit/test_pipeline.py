@@ -0,0 +1,203 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from s3mesh.budget import ByteBudget
+from s3mesh.forwarder import RetryableException
+from s3mesh.lease import Lease
+from s3mesh.pipeline import PipelineConfig, PrefetchedMessage, StageConfig
+from s3mesh.spool import SpoolConfig
+from tests.builders.common import a_string
+from tests.builders.forwarder import build_pipelined_forwarder
+from tests.builders.mesh import (
+    an_invalid_header_exception,
+    mesh_client_error,
+    mock_inbox_entry,
+    mock_mesh_message,
+)
+from tests.builders.s3 import a_recording_uploader
+
+
+def test_uploads_prefetched_message_bodies():
+    bodies = {a_string(): bytes(a_string(), "utf-8") for _ in range(6)}
+    mock_messages = [mock_mesh_message(message_id=m_id, body=body) for m_id, body in bodies.items()]
+    uploader, uploaded_bodies = a_recording_uploader()
+
+    forwarder = build_pipelined_forwarder(incoming_messages=mock_messages, s3_uploader=uploader)
+
+    forwarder.forward_messages()
+
+    assert uploaded_bodies == bodies
+
+
+def test_acknowledges_every_uploaded_message():
+    mock_messages = [mock_mesh_message() for _ in range(6)]
+
+    forwarder = build_pipelined_forwarder(incoming_messages=mock_messages)
+
+    forwarder.forward_messages()
+
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_called_once()
+        mock_message.close.assert_called_once()
+
+
+def test_finishes_one_forward_event_per_message():
+    mock_messages = [mock_mesh_message() for _ in range(4)]
+    probe = MagicMock()
+    forward_message_events = [MagicMock() for _ in mock_messages]
+    probe.new_forward_message_event.side_effect = forward_message_events
+
+    forwarder = build_pipelined_forwarder(incoming_messages=mock_messages, probe=probe)
+
+    forwarder.forward_messages()
+
+    for forward_message_event in forward_message_events:
+        forward_message_event.record_message_metadata.assert_called_once()
+        forward_message_event.finish.assert_called_once()
+
+
+def test_does_not_prefetch_or_upload_invalid_messages():
+    invalid_message = mock_mesh_message(validation_error=an_invalid_header_exception())
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    uploader = MagicMock()
+
+    forwarder = build_pipelined_forwarder(
+        incoming_messages=[invalid_message], s3_uploader=uploader, probe=probe
+    )
+
+    forwarder.forward_messages()
+
+    invalid_message.read.assert_not_called()
+    uploader.upload.assert_not_called()
+    invalid_message.acknowledge.assert_not_called()
+    forward_message_event.record_invalid_mesh_header.assert_called_once()
+    forward_message_event.finish.assert_called_once()
+
+
+def test_raises_retryable_exception_when_acknowledge_raises_mesh_network_exception():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    network_error = mesh_client_error()
+    mock_message = mock_mesh_message(acknowledge_error=network_error)
+
+    forwarder = build_pipelined_forwarder(incoming_messages=[mock_message], probe=probe)
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    forward_message_event.record_mesh_client_network_error.assert_called_once_with(network_error)
+    forward_message_event.finish.assert_called_once()
+
+
+def test_raises_retryable_exception_when_retrieving_a_message_fails():
+    forwarder = build_pipelined_forwarder(
+        inbox_entries=[mock_inbox_entry(retrieve_error=mesh_client_error())]
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+
+def test_re_raises_unexpected_exceptions_from_a_stage():
+    uploader = MagicMock()
+    uploader.upload.side_effect = ValueError()
+
+    forwarder = build_pipelined_forwarder(
+        incoming_messages=[mock_mesh_message()], s3_uploader=uploader
+    )
+
+    with pytest.raises(ValueError):
+        forwarder.forward_messages()
+
+
+def test_forwards_with_single_slot_queues_and_a_budget_smaller_than_messages():
+    mock_messages = [mock_mesh_message(body=b"x" * 100) for _ in range(5)]
+    config = PipelineConfig(
+        download=StageConfig(2, 1),
+        upload=StageConfig(1, 1),
+        acknowledge=StageConfig(1, 1),
+        memory_budget_bytes=10,
+    )
+
+    forwarder = build_pipelined_forwarder(incoming_messages=mock_messages, pipeline_config=config)
+
+    forwarder.forward_messages()
+
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_called_once()
+
+
+def test_prefetched_message_releases_budget_when_closed():
+    budget = ByteBudget(limit_bytes=100)
+    mock_message = mock_mesh_message(body=b"0123456789")
+    prefetched_message = PrefetchedMessage(mock_message, budget)
+
+    prefetched_message.prefetch()
+    assert budget.used_bytes == 10
+    assert prefetched_message.read() == b"0123456789"
+
+    prefetched_message.close()
+    assert budget.used_bytes == 0
+    mock_message.close.assert_called_once()
+
+
+def test_spills_prefetched_bodies_beyond_the_memory_budget_to_disk(tmp_path):
+    bodies = {a_string(): b"x" * 100 for _ in range(3)}
+    mock_messages = [mock_mesh_message(message_id=m_id, body=body) for m_id, body in bodies.items()]
+    uploader, uploaded_bodies = a_recording_uploader()
+    probe = MagicMock()
+    forward_message_events = [MagicMock() for _ in mock_messages]
+    probe.new_forward_message_event.side_effect = forward_message_events
+    config = PipelineConfig(
+        memory_budget_bytes=10,
+        spool=SpoolConfig(str(tmp_path / "spool"), max_message_memory_bytes=10),
+    )
+
+    forwarder = build_pipelined_forwarder(
+        incoming_messages=mock_messages, s3_uploader=uploader, probe=probe, pipeline_config=config
+    )
+    forwarder.forward_messages()
+
+    assert uploaded_bodies == bodies
+    for forward_message_event in forward_message_events:
+        forward_message_event.record_spill.assert_called_once_with(100)
+    assert list((tmp_path / "spool").iterdir()) == []
+
+
+def test_skips_messages_leased_by_another_replica_and_keeps_leases_it_acknowledged():
+    leased_elsewhere = mock_inbox_entry()
+    leased_here = mock_inbox_entry()
+    lease_store = MagicMock()
+    lease_store.try_acquire.side_effect = lambda message_id: (
+        None if message_id == leased_elsewhere.id else Lease(message_id, "token")
+    )
+    uploader, uploaded_bodies = a_recording_uploader()
+
+    forwarder = build_pipelined_forwarder(
+        inbox_entries=[leased_elsewhere, leased_here], s3_uploader=uploader, lease_store=lease_store
+    )
+
+    forwarder.forward_messages()
+
+    leased_elsewhere.retrieve.assert_not_called()
+    assert list(uploaded_bodies) == [leased_here.retrieve.return_value.id]
+    lease_store.release.assert_not_called()
+
+
+def test_releases_lease_of_a_message_that_fails_validation():
+    lease_store = MagicMock()
+    lease = Lease(a_string(), "token")
+    lease_store.try_acquire.return_value = lease
+    invalid_message = mock_mesh_message(validation_error=an_invalid_header_exception())
+
+    forwarder = build_pipelined_forwarder(
+        inbox_entries=[mock_inbox_entry(invalid_message)], lease_store=lease_store
+    )
+
+    forwarder.forward_messages()
+
+    lease_store.release.assert_called_once_with(lease)
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from s3mesh.mesh import MissingMeshHeader
+from s3mesh.quarantine import (
+    DEAD_LETTER_QUARANTINE,
+    SKIP_QUARANTINE,
+    DeadLetterQuarantine,
+    SkipQuarantine,
+    quarantining_poison,
+)
+from tests.builders.mesh import mock_mesh_message
+
+
+def test_dead_letter_quarantine_uploads_then_acknowledges_the_message():
+    uploader = MagicMock()
+    message = mock_mesh_message()
+    call_order = MagicMock()
+    call_order.attach_mock(uploader.upload_dead_letter, "upload_dead_letter")
+    call_order.attach_mock(message.acknowledge, "acknowledge")
+    forward_message_event = MagicMock()
+
+    DeadLetterQuarantine(uploader, "dead-letter/").quarantine(message, forward_message_event)
+
+    assert [name for name, _, _ in call_order.mock_calls] == ["upload_dead_letter", "acknowledge"]
+    uploader.upload_dead_letter.assert_called_once_with(
+        message, "dead-letter/", forward_message_event
+    )
+    forward_message_event.record_quarantine.assert_called_once_with(DEAD_LETTER_QUARANTINE)
+
+
+def test_dead_letter_quarantine_counts_poison_messages():
+    quarantine = DeadLetterQuarantine(MagicMock(), "dead-letter/")
+
+    quarantine.quarantine(mock_mesh_message(), MagicMock())
+    quarantine.quarantine(mock_mesh_message(), MagicMock())
+
+    assert quarantine.poison_count == 2
+
+
+def test_skip_quarantine_skips_quarantined_messages():
+    quarantine = SkipQuarantine(max_entries=10)
+    message = mock_mesh_message()
+    forward_message_event = MagicMock()
+
+    quarantine.quarantine(message, forward_message_event)
+
+    assert quarantine.should_skip(message.id) is True
+    assert quarantine.should_skip("another-message") is False
+    assert quarantine.poison_count == 1
+    forward_message_event.record_quarantine.assert_called_once_with(SKIP_QUARANTINE)
+
+
+def test_skip_quarantine_forgets_oldest_message_beyond_max_entries():
+    quarantine = SkipQuarantine(max_entries=2)
+    messages = [mock_mesh_message() for _ in range(3)]
+
+    for message in messages:
+        quarantine.quarantine(message, MagicMock())
+
+    assert [quarantine.should_skip(message.id) for message in messages] == [False, True, True]
+
+
+def test_quarantines_and_reraises_header_errors():
+    quarantine = MagicMock()
+    message = mock_mesh_message()
+    forward_message_event = MagicMock()
+
+    with pytest.raises(MissingMeshHeader):
+        with quarantining_poison(quarantine, message, forward_message_event):
+            raise MissingMeshHeader(header_name="filename")
+
+    quarantine.quarantine.assert_called_once_with(message, forward_message_event)
+
+
+def test_does_not_quarantine_other_errors():
+    quarantine = MagicMock()
+
+    with pytest.raises(ValueError):
+        with quarantining_poison(quarantine, mock_mesh_message(), MagicMock()):
+            raise ValueError()
+
+    quarantine.quarantine.assert_not_called()
@@ -0,0 +1,119 @@
+from threading import Event
+from unittest.mock import MagicMock
+
+from s3mesh.retry import MessageRetryConfig, MessageRetryQueue
+from tests.builders.mesh import mock_inbox_entry
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def wait(self, seconds: float) -> bool:
+        self.waits.append(seconds)
+        self.now += seconds
+        return False
+
+
+def _a_retry_queue(clock=None, **config):
+    clock = clock or _FakeClock()
+    return MessageRetryQueue(
+        MessageRetryConfig(**config), clock=clock, wait=clock.wait, jitter=lambda: 1.0
+    )
+
+
+def test_counts_attempts_per_message():
+    retry_queue = _a_retry_queue()
+    inbox_entry = mock_inbox_entry()
+
+    assert retry_queue.attempt(inbox_entry) == 1
+    retry_queue.retry_later(inbox_entry)
+    assert retry_queue.attempt(inbox_entry) == 2
+
+
+def test_stops_retrying_a_message_after_max_attempts():
+    retry_queue = _a_retry_queue(max_attempts=2)
+    inbox_entry = mock_inbox_entry()
+
+    assert retry_queue.retry_later(inbox_entry) is True
+    assert retry_queue.wait_for_due() == [inbox_entry]
+    assert retry_queue.retry_later(inbox_entry) is False
+    assert retry_queue.wait_for_due() == []
+
+
+def test_waits_for_exponential_backoff_before_retrying():
+    clock = _FakeClock()
+    retry_queue = _a_retry_queue(clock, max_attempts=4, backoff_sec=1, max_backoff_sec=3)
+    inbox_entry = mock_inbox_entry()
+
+    for _ in range(3):
+        retry_queue.retry_later(inbox_entry)
+        retry_queue.wait_for_due()
+
+    assert clock.waits == [1, 2, 3]
+
+
+def test_returns_messages_in_order_they_become_due():
+    clock = _FakeClock()
+    retry_queue = _a_retry_queue(clock, backoff_sec=1)
+    first, second = mock_inbox_entry(), mock_inbox_entry()
+
+    retry_queue.retry_later(first)
+    clock.now += 0.5
+    retry_queue.retry_later(second)
+
+    assert retry_queue.wait_for_due() == [first]
+    assert retry_queue.wait_for_due() == [second]
+
+
+def test_failures_look_systemic_after_distinct_messages_fail_in_a_row():
+    retry_queue = _a_retry_queue(systemic_failures=2)
+    first, second = mock_inbox_entry(), mock_inbox_entry()
+
+    retry_queue.retry_later(first)
+    retry_queue.retry_later(first)
+    assert retry_queue.failures_look_systemic() is False
+
+    retry_queue.retry_later(second)
+    assert retry_queue.failures_look_systemic() is True
+
+
+def test_failures_still_look_systemic_after_a_later_success():
+    retry_queue = _a_retry_queue(systemic_failures=1)
+
+    retry_queue.retry_later(mock_inbox_entry())
+    retry_queue.record_success()
+
+    assert retry_queue.failures_look_systemic() is True
+
+
+def test_success_resets_systemic_failure_detection():
+    retry_queue = _a_retry_queue(systemic_failures=2)
+
+    retry_queue.retry_later(mock_inbox_entry())
+    retry_queue.record_success()
+    retry_queue.retry_later(mock_inbox_entry())
+
+    assert retry_queue.failures_look_systemic() is False
+
+
+def test_does_not_wait_when_nothing_is_pending():
+    wait = MagicMock()
+    retry_queue = MessageRetryQueue(MessageRetryConfig(), wait=wait)
+
+    assert retry_queue.wait_for_due() == []
+    wait.assert_not_called()
+
+
+def test_returns_nothing_when_the_wait_is_interrupted():
+    stopping = Event()
+    retry_queue = MessageRetryQueue(MessageRetryConfig(backoff_sec=60), wait=stopping.wait)
+    retry_queue.retry_later(mock_inbox_entry())
+
+    stopping.set()
+
+    assert retry_queue.wait_for_due() == []
@@ -1,32 +1,42 @@
+import base64
+import gzip
+import hashlib
 from datetime import datetime
-from unittest.mock import MagicMock
+from io import BytesIO
+from unittest.mock import ANY, MagicMock, patch
 
-from s3mesh.s3 import S3Uploader
+import pytest
+
+from s3mesh.s3 import MULTIPART_UPLOAD, SINGLE_PUT_UPLOAD, S3Uploader, UploadConfig
+
+
+def _a_mesh_message(file_name="a_file_A1BH13.dat", body=b"some data"):
+    mesh_message = MagicMock()
+    mesh_message.file_name = file_name
+    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mesh_message.read.side_effect = BytesIO(body).read
+    return mesh_message
 
 
 def test_upload():
     mock_s3_client = MagicMock()
     bucket_name = "test_bucket"
-    mesh_message = MagicMock()
     file_name = "a_file_A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mesh_message = _a_mesh_message(file_name=file_name, body=b"some data")
 
     uploader = S3Uploader(mock_s3_client, bucket_name)
     uploader.upload(mesh_message, MagicMock())
 
-    mock_s3_client.upload_fileobj.assert_called_once_with(
-        mesh_message, bucket_name, f"2020/11/02/{file_name}"
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket=bucket_name, Key=f"2020/11/02/{file_name}", Body=b"some data"
     )
 
 
 def test_upload_records_key():
     mock_s3_client = MagicMock()
     bucket_name = "test_bucket"
-    mesh_message = MagicMock()
     file_name = "a_file_A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mesh_message = _a_mesh_message(file_name=file_name)
     forward_message_event = MagicMock()
 
     uploader = S3Uploader(mock_s3_client, bucket_name)
@@ -40,14 +50,258 @@ def test_upload_records_key():
 def test_replaces_spaces_with_underscore():
     mock_s3_client = MagicMock()
     bucket_name = "test_bucket"
-    mesh_message = MagicMock()
-    file_name = "a file A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mesh_message = _a_mesh_message(file_name="a file A1BH13.dat")
 
     expected_key = "2020/11/02/a_file_A1BH13.dat"
 
     uploader = S3Uploader(mock_s3_client, bucket_name)
     uploader.upload(mesh_message, MagicMock())
 
-    mock_s3_client.upload_fileobj.assert_called_once_with(mesh_message, bucket_name, expected_key)
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket=bucket_name, Key=expected_key, Body=ANY
+    )
+
+
+def test_upload_prepends_key_prefix():
+    mock_s3_client = MagicMock()
+    mesh_message = _a_mesh_message()
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", key_prefix="gp2gp/")
+    uploader.upload(mesh_message, forward_message_event)
+
+    expected_key = "gp2gp/2020/11/02/a_file_A1BH13.dat"
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket="test_bucket", Key=expected_key, Body=ANY
+    )
+    forward_message_event.record_s3_key.assert_called_once_with(expected_key)
+
+
+def test_upload_returns_key():
+    uploader = S3Uploader(MagicMock(), "test_bucket")
+
+    assert uploader.upload(_a_mesh_message(), MagicMock()) == "2020/11/02/a_file_A1BH13.dat"
+
+
+def test_uploads_message_up_to_threshold_with_a_single_put():
+    mock_s3_client = MagicMock()
+    forward_message_event = MagicMock()
+    upload_config = UploadConfig(multipart_threshold_bytes=10)
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", upload_config=upload_config)
+    uploader.upload(_a_mesh_message(body=b"0123456789"), forward_message_event)
+
+    mock_s3_client.upload_fileobj.assert_not_called()
+    forward_message_event.record_upload.assert_called_once_with(SINGLE_PUT_UPLOAD, 10, ANY)
+
+
+def _a_transfer_manager(read_upload):
+    transfer_manager = MagicMock()
+
+    def upload(stream, *_):
+        read_upload(stream)
+        return MagicMock()
+
+    transfer_manager.upload.side_effect = upload
+    return transfer_manager
+
+
+def test_streams_message_above_threshold_into_a_multipart_upload():
+    uploaded_bodies = []
+    transfer_manager = _a_transfer_manager(
+        lambda stream: uploaded_bodies.append(stream.read(4) + stream.read(4) + stream.read())
+    )
+    mock_s3_client = MagicMock()
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        upload_config=UploadConfig(multipart_threshold_bytes=5),
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(body=b"0123456789abc"), forward_message_event)
+
+    mock_s3_client.put_object.assert_not_called()
+    transfer_manager.upload.assert_called_once_with(
+        ANY, "test_bucket", "2020/11/02/a_file_A1BH13.dat", {}
+    )
+    assert uploaded_bodies == [b"0123456789abc"]
+    forward_message_event.record_upload.assert_called_once_with(MULTIPART_UPLOAD, 13, ANY)
+
+
+def test_fills_multipart_reads_across_short_reads_from_the_message():
+    uploaded_parts = []
+    transfer_manager = _a_transfer_manager(
+        lambda stream: uploaded_parts.extend([stream.read(4), stream.read(4)])
+    )
+    mesh_message = _a_mesh_message()
+    mesh_message.read.side_effect = [b"01", b"23", b"4", b"56", b"7", b""]
+
+    uploader = S3Uploader(
+        MagicMock(),
+        "test_bucket",
+        upload_config=UploadConfig(multipart_threshold_bytes=2),
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(mesh_message, MagicMock())
+
+    assert uploaded_parts == [b"0123", b"4567"]
+
+
+def test_sizes_its_transfer_manager_from_upload_config():
+    upload_config = UploadConfig(part_size_bytes=6 * 1024 * 1024, max_concurrency=2)
+
+    with patch("s3mesh.s3.create_transfer_manager") as create_transfer_manager:
+        S3Uploader(MagicMock(), "test_bucket", upload_config=upload_config)
+
+    transfer_config = create_transfer_manager.call_args.args[1]
+    assert transfer_config.multipart_chunksize == 6 * 1024 * 1024
+    assert transfer_config.max_concurrency == 2
+
+
+def test_can_buffer_the_peeked_head_and_the_parts_held_by_its_transfer_manager():
+    upload_config = UploadConfig(multipart_threshold_bytes=100, part_size_bytes=10)
+
+    uploader = S3Uploader(
+        MagicMock(), "test_bucket", upload_config=upload_config, transfer_manager=MagicMock()
+    )
+
+    assert uploader.max_buffered_bytes == 101 + 10 * 10
+
+
+def test_reuses_one_transfer_manager_until_closed():
+    transfer_manager = _a_transfer_manager(lambda stream: stream.read())
+    uploader = S3Uploader(
+        MagicMock(),
+        "test_bucket",
+        upload_config=UploadConfig(multipart_threshold_bytes=1),
+        transfer_manager=transfer_manager,
+    )
+
+    uploader.upload(_a_mesh_message(), MagicMock())
+    uploader.upload(_a_mesh_message(), MagicMock())
+    uploader.close()
+
+    assert transfer_manager.upload.call_count == 2
+    transfer_manager.shutdown.assert_called_once()
+
+
+def test_compresses_small_messages_into_a_single_put():
+    mock_s3_client = MagicMock()
+    body = b"<xml>some data</xml>" * 100
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", upload_config=UploadConfig(compression="gzip")
+    )
+    key = uploader.upload(_a_mesh_message(body=body), forward_message_event)
+
+    assert key == "2020/11/02/a_file_A1BH13.dat.gz"
+    put_object_kwargs = mock_s3_client.put_object.call_args.kwargs
+    assert put_object_kwargs["Key"] == key
+    assert put_object_kwargs["ContentEncoding"] == "gzip"
+    assert gzip.decompress(put_object_kwargs["Body"]) == body
+    forward_message_event.record_s3_key.assert_called_once_with(key)
+    forward_message_event.record_compression.assert_called_once_with("gzip", ANY, ANY)
+    compression_ratio = forward_message_event.record_compression.call_args.args[1]
+    assert compression_ratio == len(body) / len(put_object_kwargs["Body"])
+
+
+def test_streams_compressed_messages_into_a_multipart_upload():
+    uploaded_bodies = []
+    transfer_manager = _a_transfer_manager(lambda stream: uploaded_bodies.append(stream.read()))
+    body = bytes(range(256)) * 64
+
+    uploader = S3Uploader(
+        MagicMock(),
+        "test_bucket",
+        upload_config=UploadConfig(multipart_threshold_bytes=16, compression="gzip"),
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(body=body), MagicMock())
+
+    transfer_manager.upload.assert_called_once_with(
+        ANY, "test_bucket", "2020/11/02/a_file_A1BH13.dat.gz", {"ContentEncoding": "gzip"}
+    )
+    assert gzip.decompress(uploaded_bodies[0]) == body
+
+
+def test_rejects_unsupported_compression():
+    with pytest.raises(ValueError):
+        S3Uploader(MagicMock(), "test_bucket", upload_config=UploadConfig(compression="lz4"))
+
+
+def test_sends_and_stores_the_digest_of_single_put_uploads():
+    mock_s3_client = MagicMock()
+    forward_message_event = MagicMock()
+    body = b"some data"
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", upload_config=UploadConfig(digest_algorithm="sha256")
+    )
+    uploader.upload(_a_mesh_message(body=body), forward_message_event)
+
+    sha256 = hashlib.sha256(body)
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket="test_bucket",
+        Key="2020/11/02/a_file_A1BH13.dat",
+        Body=body,
+        ChecksumSHA256=base64.b64encode(sha256.digest()).decode(),
+        Metadata={"sha256": sha256.hexdigest()},
+    )
+    forward_message_event.record_digest.assert_called_once_with("sha256", sha256.hexdigest(), ANY)
+
+
+def test_digests_the_compressed_object():
+    mock_s3_client = MagicMock()
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        upload_config=UploadConfig(compression="gzip", digest_algorithm="md5"),
+    )
+    uploader.upload(_a_mesh_message(body=b"some data"), forward_message_event)
+
+    put_object_kwargs = mock_s3_client.put_object.call_args.kwargs
+    md5 = hashlib.md5(put_object_kwargs["Body"])
+    assert put_object_kwargs["ContentMD5"] == base64.b64encode(md5.digest()).decode()
+    assert put_object_kwargs["Metadata"] == {"md5": md5.hexdigest()}
+
+
+def test_has_s3_verify_each_part_of_digested_multipart_uploads():
+    uploaded_bodies = []
+    transfer_manager = _a_transfer_manager(lambda stream: uploaded_bodies.append(stream.read()))
+    forward_message_event = MagicMock()
+    body = b"0123456789abc"
+
+    uploader = S3Uploader(
+        MagicMock(),
+        "test_bucket",
+        upload_config=UploadConfig(multipart_threshold_bytes=5, digest_algorithm="sha256"),
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(body=body), forward_message_event)
+
+    transfer_manager.upload.assert_called_once_with(
+        ANY, "test_bucket", "2020/11/02/a_file_A1BH13.dat", {"ChecksumAlgorithm": "SHA256"}
+    )
+    forward_message_event.record_digest.assert_called_once_with(
+        "sha256", hashlib.sha256(body).hexdigest(), ANY
+    )
+
+
+def test_uploads_dead_letter_under_prefix_keyed_by_message_id():
+    mock_s3_client = MagicMock()
+    forward_message_event = MagicMock()
+    mesh_message = _a_mesh_message(body=b"poison")
+    mesh_message.id = "a-message-id"
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", key_prefix="gp2gp/")
+    key = uploader.upload_dead_letter(mesh_message, "dead-letter/", forward_message_event)
+
+    assert key == "gp2gp/dead-letter/a-message-id"
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket="test_bucket", Key="gp2gp/dead-letter/a-message-id", Body=b"poison"
+    )
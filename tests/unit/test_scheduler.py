@@ -0,0 +1,82 @@
+from s3mesh.scheduler import (
+    BACKLOG_POLL_DELAY,
+    BACKOFF_POLL_DELAY,
+    BURST_POLL_DELAY,
+    IDLE_POLL_DELAY,
+    AdaptivePollScheduler,
+    FixedPollScheduler,
+    PollDelay,
+)
+
+
+def _an_adaptive_scheduler(**kwargs):
+    return AdaptivePollScheduler(
+        poll_frequency_sec=kwargs.get("poll_frequency_sec", 60),
+        burst_poll_frequency_sec=kwargs.get("burst_poll_frequency_sec", 5),
+        max_backoff_sec=kwargs.get("max_backoff_sec", 900),
+        burst_window_polls=kwargs.get("burst_window_polls", 3),
+        jitter=kwargs.get("jitter", lambda: 1.0),
+    )
+
+
+def test_fixed_scheduler_polls_immediately_while_backlog_exists():
+    assert FixedPollScheduler(60).after_success(500, backlog=True) == PollDelay(
+        0, BACKLOG_POLL_DELAY
+    )
+
+
+def test_fixed_scheduler_waits_poll_frequency_when_inbox_is_drained_or_failing():
+    scheduler = FixedPollScheduler(60)
+
+    assert scheduler.after_success(3, backlog=False) == PollDelay(60, IDLE_POLL_DELAY)
+    assert scheduler.after_failure() == PollDelay(60, BACKOFF_POLL_DELAY)
+    assert scheduler.after_failure() == PollDelay(60, BACKOFF_POLL_DELAY)
+
+
+def test_adaptive_scheduler_polls_immediately_while_backlog_exists():
+    scheduler = _an_adaptive_scheduler()
+
+    assert scheduler.after_success(500, backlog=True) == PollDelay(0, BACKLOG_POLL_DELAY)
+
+
+def test_adaptive_scheduler_waits_poll_frequency_when_idle():
+    scheduler = _an_adaptive_scheduler(poll_frequency_sec=60)
+
+    assert scheduler.after_success(0, backlog=False) == PollDelay(60, IDLE_POLL_DELAY)
+
+
+def test_adaptive_scheduler_shortens_interval_for_a_window_after_traffic():
+    scheduler = _an_adaptive_scheduler(burst_poll_frequency_sec=5, burst_window_polls=3)
+
+    delays = [scheduler.after_success(batch_count, backlog=False) for batch_count in [2, 0, 0, 0]]
+
+    assert delays == [
+        PollDelay(5, BURST_POLL_DELAY),
+        PollDelay(5, BURST_POLL_DELAY),
+        PollDelay(5, BURST_POLL_DELAY),
+        PollDelay(60, IDLE_POLL_DELAY),
+    ]
+
+
+def test_adaptive_scheduler_backs_off_exponentially_up_to_the_maximum():
+    scheduler = _an_adaptive_scheduler(poll_frequency_sec=10, max_backoff_sec=50)
+
+    delays = [scheduler.after_failure().seconds for _ in range(5)]
+
+    assert delays == [10, 20, 40, 50, 50]
+
+
+def test_adaptive_scheduler_applies_jitter_to_backoff():
+    scheduler = _an_adaptive_scheduler(poll_frequency_sec=10, jitter=lambda: 0.0)
+
+    assert scheduler.after_failure() == PollDelay(5, BACKOFF_POLL_DELAY)
+
+
+def test_adaptive_scheduler_resets_backoff_after_a_success():
+    scheduler = _an_adaptive_scheduler(poll_frequency_sec=10)
+    scheduler.after_failure()
+    scheduler.after_failure()
+
+    scheduler.after_success(0, backlog=False)
+
+    assert scheduler.after_failure().seconds == 10
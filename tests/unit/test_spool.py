@@ -0,0 +1,71 @@
+from s3mesh.budget import ByteBudget
+from s3mesh.spool import SpoolConfig, SpooledBody
+
+
+def _a_spooled_body(tmp_path, budget=None, max_message_memory_bytes=100):
+    return SpooledBody(
+        budget or ByteBudget(limit_bytes=100),
+        SpoolConfig(str(tmp_path), max_message_memory_bytes=max_message_memory_bytes),
+    )
+
+
+def test_keeps_bodies_within_budget_in_memory(tmp_path):
+    budget = ByteBudget(limit_bytes=100)
+    body = _a_spooled_body(tmp_path, budget)
+
+    body.write(b"0123")
+    body.write(b"4567")
+    body.seal()
+
+    assert body.spilled_bytes == 0
+    assert budget.used_bytes == 8
+    assert body.read(5) == b"01234"
+    assert body.read() == b"567"
+
+
+def test_spills_bodies_larger_than_the_per_message_limit(tmp_path):
+    budget = ByteBudget(limit_bytes=100)
+    body = _a_spooled_body(tmp_path, budget, max_message_memory_bytes=6)
+
+    body.write(b"0123")
+    body.write(b"4567")
+    body.write(b"89")
+    body.seal()
+
+    assert body.spilled_bytes == 10
+    assert budget.used_bytes == 0
+    assert body.read(3) == b"012"
+    assert body.read() == b"3456789"
+
+
+def test_spills_when_the_shared_budget_is_exhausted(tmp_path):
+    budget = ByteBudget(limit_bytes=10)
+    budget.acquire(8)
+    body = _a_spooled_body(tmp_path, budget)
+
+    body.write(b"0123")
+    body.seal()
+
+    assert body.spilled_bytes == 4
+    assert body.read() == b"0123"
+
+
+def test_releases_budget_when_closed(tmp_path):
+    budget = ByteBudget(limit_bytes=100)
+    body = _a_spooled_body(tmp_path, budget)
+    body.write(b"0123")
+    body.seal()
+
+    body.close()
+
+    assert budget.used_bytes == 0
+
+
+def test_removes_spilled_files_when_closed(tmp_path):
+    body = _a_spooled_body(tmp_path, max_message_memory_bytes=2)
+    body.write(b"0123")
+    body.seal()
+
+    body.close()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,323 @@
+import time
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+from s3mesh.spool_queue import ACKNOWLEDGE_ON_S3, SpoolQueue
+from tests.builders.forwarder import build_spooling_forwarder
+from tests.builders.mesh import mesh_client_error, mock_inbox_entry, mock_mesh_message
+from tests.builders.s3 import a_recording_uploader
+
+
+def _wait_until(condition, timeout_sec=5):
+    deadline = time.monotonic() + timeout_sec
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_spools_messages_in_arrival_order(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    first_message = mock_mesh_message(body=b"first")
+    second_message = mock_mesh_message(body=b"second")
+
+    spool_queue.put(first_message)
+    spool_queue.put(second_message)
+
+    assert len(spool_queue) == 2
+    assert first_message.id in spool_queue
+    entry = spool_queue.entries()[0]
+    assert entry.message_id == first_message.id
+    assert entry.size_bytes == 5
+
+
+def test_reopens_spooled_message_with_its_metadata_and_body(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    message = mock_mesh_message(body=b"a body", chunk_count=3)
+
+    spooled_message = spool_queue.open(spool_queue.put(message))
+
+    assert spooled_message.id == message.id
+    assert spooled_message.file_name == message.file_name
+    assert spooled_message.date_delivered == message.date_delivered
+    assert spooled_message.sender == message.sender
+    assert spooled_message.recipient == message.recipient
+    assert spooled_message.chunk_count == 3
+    assert spooled_message.read(2) + spooled_message.read() == b"a body"
+    assert spooled_message.bytes_read == 6
+    spooled_message.close()
+
+
+def test_removes_entries_and_their_files(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    entry = spool_queue.put(mock_mesh_message())
+
+    spool_queue.remove(entry)
+
+    assert len(spool_queue) == 0
+    assert spool_queue.entries() == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_recovers_spooled_messages_after_a_restart(tmp_path):
+    first_message = mock_mesh_message(body=b"first")
+    second_message = mock_mesh_message(body=b"second")
+    SpoolQueue(str(tmp_path)).put(first_message)
+    SpoolQueue(str(tmp_path)).put(second_message)
+
+    spool_queue = SpoolQueue(str(tmp_path))
+
+    entry = spool_queue.entries()[0]
+    assert entry.message_id == first_message.id
+    spool_queue.remove(entry)
+    assert spool_queue.open(spool_queue.entries()[0]).read() == b"second"
+
+
+def test_discards_writes_interrupted_by_a_crash(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    entry = spool_queue.put(mock_mesh_message())
+    (tmp_path / "00000000000000000001-b.body.partial").write_bytes(b"partial")
+    (tmp_path / "00000000000000000002-c.body").write_bytes(b"no metadata")
+
+    recovered_queue = SpoolQueue(str(tmp_path))
+
+    assert len(recovered_queue) == 1
+    assert recovered_queue.entries()[0] == entry
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_is_full_once_spooled_bodies_reach_max_bytes(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path), max_bytes=10)
+    spool_queue.put(mock_mesh_message(body=b"12345"))
+    assert not spool_queue.is_full()
+
+    entry = spool_queue.put(mock_mesh_message(body=b"67890"))
+
+    assert spool_queue.is_full()
+    assert SpoolQueue(str(tmp_path), max_bytes=10).is_full()
+    spool_queue.remove(entry)
+    assert not spool_queue.is_full()
+
+
+def test_acknowledges_messages_once_spooled_without_uploading_them(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    message = mock_mesh_message()
+    uploader = MagicMock()
+
+    forwarder = build_spooling_forwarder(
+        spool_queue, incoming_messages=[message], s3_uploader=uploader
+    )
+    forwarder.forward_messages()
+
+    message.acknowledge.assert_called_once()
+    message.close.assert_called_once()
+    uploader.upload.assert_not_called()
+    assert message.id in spool_queue
+
+
+def test_records_spool_depth_on_forward_events(tmp_path):
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = build_spooling_forwarder(
+        SpoolQueue(str(tmp_path)), incoming_messages=[mock_mesh_message()], probe=probe
+    )
+    forwarder.forward_messages()
+
+    forward_message_event.record_spool_depth.assert_called_once_with(1)
+
+
+def test_drains_spooled_messages_into_s3_and_removes_them(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    messages = [mock_mesh_message(body=b"first"), mock_mesh_message(body=b"second")]
+    uploader, uploaded_bodies = a_recording_uploader()
+    forwarder = build_spooling_forwarder(
+        spool_queue, incoming_messages=messages, s3_uploader=uploader
+    )
+    forwarder.forward_messages()
+
+    assert forwarder.drain() == 2
+
+    assert uploaded_bodies == {messages[0].id: b"first", messages[1].id: b"second"}
+    assert len(spool_queue) == 0
+
+
+def test_acknowledges_messages_only_once_uploaded_when_configured(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    message = mock_mesh_message()
+    mesh_inbox = MagicMock()
+    forwarder = build_spooling_forwarder(
+        spool_queue,
+        mesh_inbox=mesh_inbox,
+        incoming_messages=[message],
+        acknowledge_on=ACKNOWLEDGE_ON_S3,
+    )
+    forwarder.forward_messages()
+    message.acknowledge.assert_not_called()
+
+    forwarder.drain()
+
+    mesh_inbox.entry.assert_called_once_with(message.id)
+    mesh_inbox.entry.return_value.acknowledge.assert_called_once()
+
+
+def test_skips_messages_already_waiting_in_the_spool(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    message = mock_mesh_message()
+    spool_queue.put(mock_mesh_message(message_id=message.id))
+    inbox_entry = mock_inbox_entry(message)
+
+    forwarder = build_spooling_forwarder(
+        spool_queue, inbox_entries=[inbox_entry], acknowledge_on=ACKNOWLEDGE_ON_S3
+    )
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_not_called()
+
+
+def test_skips_messages_drained_and_acknowledged_after_they_were_listed(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    message = mock_mesh_message()
+    spool_queue.put(mock_mesh_message(message_id=message.id))
+    inbox_entry = mock_inbox_entry(message)
+    mesh_inbox = MagicMock()
+    forwarder = build_spooling_forwarder(
+        spool_queue, mesh_inbox=mesh_inbox, acknowledge_on=ACKNOWLEDGE_ON_S3
+    )
+    mesh_inbox.list_messages.side_effect = lambda: [inbox_entry] if forwarder.drain() else []
+
+    forwarder.forward_messages()
+
+    inbox_entry.retrieve.assert_not_called()
+    assert len(spool_queue) == 0
+
+
+def test_leaves_messages_in_the_inbox_while_the_spool_is_full(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path), max_bytes=5)
+    spool_queue.put(mock_mesh_message(body=b"12345"))
+    mesh_inbox = MagicMock()
+    forwarder = build_spooling_forwarder(spool_queue, mesh_inbox=mesh_inbox)
+
+    assert forwarder.forward_messages() == 0
+
+    mesh_inbox.list_messages.assert_not_called()
+
+
+def test_stops_spooling_a_batch_once_the_spool_is_full(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path), max_bytes=5)
+    first_message = mock_mesh_message(body=b"12345")
+    second_message = mock_mesh_message(body=b"67890")
+    second_inbox_entry = mock_inbox_entry(second_message)
+    forwarder = build_spooling_forwarder(
+        spool_queue, inbox_entries=[mock_inbox_entry(first_message), second_inbox_entry]
+    )
+
+    forwarder.forward_messages()
+
+    assert first_message.id in spool_queue
+    second_inbox_entry.retrieve.assert_not_called()
+
+
+def test_keeps_messages_spooled_when_upload_fails(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    uploader = MagicMock()
+    s3_error = ClientError({"Error": {"Code": "SlowDown"}}, "PutObject")
+    uploader.upload.side_effect = s3_error
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    forwarder = build_spooling_forwarder(
+        spool_queue, incoming_messages=[mock_mesh_message()], s3_uploader=uploader, probe=probe
+    )
+    forwarder.forward_messages()
+
+    assert forwarder.drain() == 0
+
+    assert len(spool_queue) == 1
+    forward_message_event.record_s3_error.assert_called_once_with(s3_error)
+
+
+def test_keeps_messages_spooled_when_acknowledge_after_upload_fails(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    mesh_inbox = MagicMock()
+    mesh_inbox.entry.return_value.acknowledge.side_effect = mesh_client_error()
+    forwarder = build_spooling_forwarder(
+        spool_queue,
+        mesh_inbox=mesh_inbox,
+        incoming_messages=[mock_mesh_message()],
+        acknowledge_on=ACKNOWLEDGE_ON_S3,
+    )
+    forwarder.forward_messages()
+
+    assert forwarder.drain() == 0
+
+    assert len(spool_queue) == 1
+    assert spool_queue.entries()[0].uploaded
+
+
+def test_only_acknowledges_uploaded_messages_on_the_next_drain(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    mesh_inbox = MagicMock()
+    mesh_inbox.entry.return_value.acknowledge.side_effect = [mesh_client_error(), None]
+    uploader = MagicMock()
+    forwarder = build_spooling_forwarder(
+        spool_queue,
+        mesh_inbox=mesh_inbox,
+        incoming_messages=[mock_mesh_message()],
+        s3_uploader=uploader,
+        acknowledge_on=ACKNOWLEDGE_ON_S3,
+    )
+    forwarder.forward_messages()
+    forwarder.drain()
+
+    assert SpoolQueue(str(tmp_path)).entries()[0].uploaded
+    assert forwarder.drain() == 1
+
+    assert len(spool_queue) == 0
+    uploader.upload.assert_called_once()
+
+
+def test_drains_later_messages_when_an_earlier_one_fails(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    failing_message = mock_mesh_message()
+    message = mock_mesh_message()
+    uploader = MagicMock()
+    uploader.upload.side_effect = [ClientError({"Error": {"Code": "SlowDown"}}, "PutObject"), None]
+    forwarder = build_spooling_forwarder(
+        spool_queue, incoming_messages=[failing_message, message], s3_uploader=uploader
+    )
+    forwarder.forward_messages()
+
+    assert forwarder.drain() == 1
+
+    assert failing_message.id in spool_queue
+    assert message.id not in spool_queue
+
+
+def test_uploads_messages_left_in_the_spool_once_started(tmp_path):
+    message = mock_mesh_message(body=b"left behind")
+    SpoolQueue(str(tmp_path)).put(message)
+    spool_queue = SpoolQueue(str(tmp_path))
+    uploader, uploaded_bodies = a_recording_uploader()
+    forwarder = build_spooling_forwarder(spool_queue, s3_uploader=uploader)
+
+    forwarder.start()
+    _wait_until(lambda: len(spool_queue) == 0)
+    forwarder.close()
+
+    assert uploaded_bodies == {message.id: b"left behind"}
+    uploader.close.assert_called_once()
+
+
+def test_keeps_draining_after_an_unexpected_failure(tmp_path):
+    spool_queue = SpoolQueue(str(tmp_path))
+    spool_queue.put(mock_mesh_message())
+    uploader = MagicMock()
+    uploader.upload.side_effect = [OSError("disk full"), None]
+    forwarder = build_spooling_forwarder(spool_queue, s3_uploader=uploader)
+
+    forwarder.start()
+    _wait_until(lambda: len(spool_queue) == 0)
+    forwarder.close()
+
+    assert uploader.upload.call_count == 2